@@ -0,0 +1,249 @@
+# Name: Bhoomi Raghav
+# Roll number: 2501730254
+# Course Code: ETCCPP102
+# Assignment: Library Inventory Manager (lookup benchmark)
+# Date: 2026-10-18
+
+import argparse
+import importlib.util
+import json
+import logging
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# The manager's file name has spaces, so it is loaded from its path
+_spec = importlib.util.spec_from_file_location(
+    'library_inventory_manager', Path(__file__).resolve().parent / 'library inventory manager.py')
+library = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(library)
+
+# --- Configuration ---
+DEFAULT_SIZES = (1_000, 10_000, 100_000, 1_000_000)
+QUERIES = 200 # Lookups and searches timed per catalog size
+WRITES = 2_000 # Issue/return operations timed per catalog size (more than JOURNAL_COMPACT_MIN)
+# Start-up rows measured with --startup: (loader, catalog format); 'original' is the loader before
+# __slots__, Status and .jsonl catalogs, the baseline the others are compared against
+STARTUP_LOADERS = (('original', '.json'), ('current', '.json'), ('current', '.jsonl'))
+VOCABULARY_SIZE = 20_000
+SEED = 42
+FIRST_NAMES = ('james', 'mary', 'ravi', 'anita', 'chen', 'fatima', 'olga', 'kwame', 'lucia', 'arjun',
+               'sofia', 'tomas', 'yuki', 'amara', 'elena', 'omar')
+LAST_NAMES = ('sharma', 'smith', 'garcia', 'okafor', 'nakamura', 'ivanova', 'rossi', 'khan', 'mensah',
+              'silva', 'dubois', 'kowalski', 'haddad', 'lindqvist', 'murphy', 'patel')
+
+# --- Synthetic Catalog ---
+
+def _word(rng):
+    return ''.join(rng.choice('abcdefghijklmnopqrstuvwxyz') for _ in range(rng.randint(3, 10)))
+
+def generate_catalog(size, rng):
+    """size catalog entries (as stored in library_catalog.json) with multi-word titles and unique ISBNs."""
+    vocabulary = [_word(rng) for _ in range(VOCABULARY_SIZE)]
+    isbns = rng.sample(range(10**12, 10**13), size)
+    return [{'title': ' '.join(rng.choices(vocabulary, k=rng.randint(2, 6))).title(),
+             'author': f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}".title(),
+             'isbn': str(isbn), 'status': 'issued' if rng.random() < 0.1 else 'available'}
+            for isbn in isbns]
+
+def make_queries(books, rng):
+    """ISBN lookups (90% hits) and {kind: title searches}: substrings of real titles, short fragments and misses."""
+    isbns = [rng.choice(books).isbn if rng.random() < 0.9 else str(rng.randrange(10**12)) for _ in range(QUERIES)]
+    titles = {'substring': [], 'short': [], 'miss': []}
+    for _ in range(QUERIES):
+        title = rng.choice(books).title
+        kind = rng.random()
+        if kind < 0.6: # A substring of an existing title, possibly spanning words
+            start = rng.randrange(len(title))
+            titles['substring'].append(title[start:start + rng.randint(3, 15)])
+        elif kind < 0.8: # A two-letter fragment (matches many books)
+            titles['short'].append(_word(rng)[:2])
+        else:
+            titles['miss'].append(_word(rng) + ' ' + _word(rng))
+    return isbns, titles
+
+# --- Linear Scans (the original LibraryManager lookups) ---
+
+def scan_isbn(books, isbn):
+    return next((book for book in books if book.isbn == isbn), None)
+
+def scan_title(books, query):
+    query = query.lower()
+    return [book for book in books if query in book.title.lower()]
+
+def rewrite_catalog(books, filepath):
+    """The original _save_catalog, run after every change: the whole catalog rewritten with indent=4."""
+    with filepath.open(mode='w', encoding='utf-8') as f:
+        json.dump([book.to_dict() for book in books], f, indent=4)
+
+def measure_writes(manager, work_dir, rng, writes=WRITES):
+    """Per-operation latency of journaled issue/return vs. one full catalog rewrite, and one compaction.
+
+    writes exceeds JOURNAL_COMPACT_MIN, so the latencies would include any
+    compaction triggered by an operation; compaction itself runs on close.
+    """
+    books = rng.sample(manager.books, min(writes, len(manager.books)))
+    latencies = []
+    for book in books:
+        action = 'issue' if book.is_available() else 'return'
+        started = time.perf_counter()
+        manager.issue_return_book(book.isbn, action)
+        latencies.append(time.perf_counter() - started)
+    latencies.sort()
+    started = time.perf_counter()
+    rewrite_catalog(manager.books, work_dir / 'rewrite.json')
+    rewrite_s = time.perf_counter() - started
+    started = time.perf_counter()
+    manager.compact()
+    compact_s = time.perf_counter() - started
+    return {'journal_median_ms': round(latencies[len(latencies) // 2] * 1000, 4),
+            'journal_p99_ms': round(latencies[int(len(latencies) * 0.99)] * 1000, 4),
+            'journal_max_ms': round(latencies[-1] * 1000, 4),
+            'full_rewrite_ms': round(rewrite_s * 1000, 2), 'compaction_ms': round(compact_s * 1000, 2)}
+
+# --- Start-up Time and Memory ---
+
+class OriginalBook:
+    """The original Book: a plain class with a per-instance __dict__ and the status as a string."""
+    def __init__(self, title, author, isbn, status='available'):
+        self.title = title
+        self.author = author
+        self.isbn = isbn
+        self.status = status
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data['title'], data['author'], data['isbn'], data['status'])
+
+def original_load(catalog_file):
+    """The original LibraryManager._load_catalog: json.load, then one Book per entry, no indexes."""
+    with Path(catalog_file).open(mode='r', encoding='utf-8') as f:
+        return [OriginalBook.from_dict(item) for item in json.load(f)]
+
+def load_only(catalog_file, loader='current'):
+    """Child process of measure_startup: loads catalog_file and prints the load time and peak RSS as JSON.
+
+    The current loader also times the first title search, which builds the
+    title and author indexes that start-up leaves out, and reports the peak
+    RSS after it as well.
+    """
+    import resource # Unix only, like the start-up measurement itself
+    started = time.perf_counter()
+    if loader == 'original':
+        books = original_load(catalog_file)
+    else:
+        manager = library.LibraryManager(catalog_file)
+        books = manager.books
+    load_s = time.perf_counter() - started
+    result = {'books': len(books), 'load_s': round(load_s, 3),
+              'peak_rss_mb': round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)}
+    if loader != 'original':
+        started = time.perf_counter()
+        manager.search_by_title('the')
+        result['first_search_s'] = round(time.perf_counter() - started, 3)
+        result['peak_rss_after_search_mb'] = round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+    print(json.dumps(result))
+
+def measure_startup(size, work_dir, rng):
+    """Loads a size-book catalog with each of STARTUP_LOADERS, every time in a fresh interpreter.
+
+    The current loaders build their title and author indexes on the first
+    search, whose time and peak RSS are reported next to the load.
+    """
+    catalog = [library.Book.from_dict(item) for item in generate_catalog(size, rng)]
+    print(f"\nStart-up with {size:,} books (fresh process each)")
+    results = {}
+    for loader, suffix in STARTUP_LOADERS:
+        catalog_file = work_dir / f'startup_{size}{suffix}'
+        if not catalog_file.exists():
+            library.write_catalog(catalog, catalog_file)
+        output = subprocess.run([sys.executable, __file__, '--load-only', str(catalog_file), '--loader', loader],
+                                capture_output=True, text=True, check=True).stdout
+        result = results[f'{loader} {suffix}'] = json.loads(output.splitlines()[-1])
+        result['file_mb'] = round(catalog_file.stat().st_size / 2**20, 1)
+        print(f"  {loader + ' ' + suffix:<16} {result['file_mb']:6.1f} MB file  load {result['load_s']:6.2f} s, "
+              f"peak RSS {result['peak_rss_mb']:7.1f} MB", end='')
+        if 'first_search_s' in result:
+            print(f"  | first search {result['first_search_s']:5.2f} s, "
+                  f"peak RSS {result['peak_rss_after_search_mb']:7.1f} MB", end='')
+        print()
+    return {'books': size, 'loaders': results}
+
+# --- Benchmark Runner ---
+
+def _time_each(func, queries):
+    """Mean seconds per call of func over queries, and the results."""
+    started = time.perf_counter()
+    results = [func(query) for query in queries]
+    return (time.perf_counter() - started) / len(queries), results
+
+def run_benchmark(size, work_dir, rng):
+    catalog_file = work_dir / f'catalog_{size}.json'
+    catalog_file.write_text(json.dumps(generate_catalog(size, rng)), encoding='utf-8')
+    started = time.perf_counter()
+    manager = library.LibraryManager(catalog_file)
+    load_s = time.perf_counter() - started
+    started = time.perf_counter()
+    manager._rebuild_indexes()
+    manager._text_indexes() # Otherwise built by the first search
+    index_s = time.perf_counter() - started
+
+    isbns, titles = make_queries(manager.books, rng)
+    scan_isbn_s, expected_isbn = _time_each(lambda isbn: scan_isbn(manager.books, isbn), isbns)
+    index_isbn_s, found_isbn = _time_each(manager.search_by_isbn, isbns)
+    if found_isbn != expected_isbn:
+        raise AssertionError(f"Indexed ISBN lookups differ from the linear scan at {size} books")
+
+    print(f"\nCatalog: {size:,} books (load {load_s:.2f} s, index build {index_s:.2f} s)")
+    print(f"  {'ISBN lookup':<24} scan {scan_isbn_s * 1000:10.3f} ms  index {index_isbn_s * 1000:8.4f} ms  "
+          f"({scan_isbn_s / index_isbn_s:,.0f}x)")
+    run = {'books': size, 'load_s': round(load_s, 4), 'index_build_s': round(index_s, 4),
+           'isbn_lookup_ms': {'scan': round(scan_isbn_s * 1000, 4), 'index': round(index_isbn_s * 1000, 5)},
+           'title_search_ms': {}}
+    for kind, queries in titles.items():
+        scan_title_s, expected_title = _time_each(lambda query: scan_title(manager.books, query), queries)
+        index_title_s, found_title = _time_each(manager.search_by_title, queries)
+        if found_title != expected_title:
+            raise AssertionError(f"Indexed title search ({kind}) differs from the linear scan at {size} books")
+        matches = sum(map(len, found_title)) / len(found_title)
+        print(f"  {'title search, ' + kind:<24} scan {scan_title_s * 1000:10.3f} ms  index {index_title_s * 1000:8.4f} ms  "
+              f"({scan_title_s / index_title_s:,.0f}x, {matches:,.0f} matches on average)")
+        run['title_search_ms'][kind] = {'scan': round(scan_title_s * 1000, 4), 'index': round(index_title_s * 1000, 5),
+                                        'mean_matches': round(matches, 1)}
+
+    writes = run['writes'] = measure_writes(manager, work_dir, rng)
+    print(f"  {'issue/return':<24} rewrite {writes['full_rewrite_ms']:7.1f} ms  journal median "
+          f"{writes['journal_median_ms']:.3f} ms, p99 {writes['journal_p99_ms']:.3f} ms "
+          f"(compaction on close {writes['compaction_ms']:.1f} ms)")
+    return run
+
+def main():
+    parser = argparse.ArgumentParser(description="Linear scans vs. the ISBN dict and title index of LibraryManager")
+    parser.add_argument('--sizes', type=int, nargs='+', default=list(DEFAULT_SIZES), help="catalog sizes")
+    parser.add_argument('--startup', action='store_true',
+                        help="measure load time and peak RSS against the original loader instead of lookups")
+    parser.add_argument('--load-only', help=argparse.SUPPRESS) # Used by the --startup child processes
+    parser.add_argument('--loader', choices=('original', 'current'), default='current', help=argparse.SUPPRESS)
+    parser.add_argument('--output', help="also write the results as JSON to this file")
+    args = parser.parse_args()
+    logging.getLogger().setLevel(logging.WARNING) # Keep the manager's messages out of the table
+    if args.load_only:
+        load_only(args.load_only, args.loader)
+        return
+
+    rng = random.Random(SEED)
+    with tempfile.TemporaryDirectory() as work_dir:
+        if args.startup:
+            results = {'startup': [measure_startup(size, Path(work_dir), rng) for size in args.sizes]}
+        else:
+            results = {'queries': QUERIES, 'runs': [run_benchmark(size, Path(work_dir), rng) for size in args.sizes]}
+            print("\nAll indexed results matched the linear scans.")
+    if args.output:
+        Path(args.output).write_text(json.dumps(results, indent=2))
+        print(f"Results written to {args.output}")
+
+if __name__ == "__main__":
+    main()
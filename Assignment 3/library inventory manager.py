@@ -4,24 +4,74 @@
 # Assignment: Library Inventory Manager (OOP)
 # Date: 2025-12-08
 
+import argparse
+import enum
+import gc
 import json
+import os
+import queue
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from itertools import islice
 from pathlib import Path
 import logging
 
 # --- Configuration ---
 CATALOG_FILE = Path("library_catalog.json")
+JSONL_SUFFIX = '.jsonl' # A catalog file with this suffix holds one book per line and is loaded incrementally
+JSONL_BATCH_LINES = 10_000 # Lines of a .jsonl catalog decoded per json.loads call
+DB_FILE = Path("library_catalog.db") # SQLite backend; created from CATALOG_FILE on first use
+STORAGE_BACKEND = 'json' # 'json' (snapshot + journal, one process) or 'sqlite' (shared by several terminals)
+POOL_SIZE = 4 # SQLite connections shared by the threads of one process
+SQLITE_BUSY_TIMEOUT_S = 30 # How long a writer waits for another terminal's transaction
+GRAM_SIZE = 3 # Length of the n-grams that index the words of titles and authors
+JOURNAL_SUFFIX = '.journal' # Change journal next to the catalog snapshot: library_catalog.json.journal
+JOURNAL_FSYNC_BATCH = 16 # fsync the journal after this many changes...
+JOURNAL_FSYNC_INTERVAL_S = 1.0 # ...or once this much time has passed since the last fsync
+JOURNAL_COMPACT_MIN = 1000 # On opening, compact a journal that holds this many changes
+JOURNAL_COMPACT_RATIO = 0.1 # ...or, for large catalogs, this fraction of the number of books
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
 # --- Task 1: Book Class Design ---
 
+class Status(str, enum.Enum):
+    """A book's status. Members are strings, so they compare equal to 'available' and 'issued'."""
+    AVAILABLE = 'available'
+    ISSUED = 'issued'
+
+# Members hash like their values, so this maps both 'issued' and Status.ISSUED (much cheaper than Status(value))
+_STATUSES = {status.value: status for status in Status}
+
 class Book:
-    """Represents a single book in the library inventory."""
+    """Represents a single book in the library inventory.
+
+    __slots__ keeps a Book free of a per-instance __dict__, and status is one
+    of the two shared Status members rather than a string per book, which
+    matters for catalogs of a million books.
+    """
+    __slots__ = ('title', 'author', 'isbn', '_status')
+
     def __init__(self, title, author, isbn, status='available'):
         self.title = title
         self.author = author
         self.isbn = isbn
         self.status = status # 'available' or 'issued'
 
+    @property
+    def status(self):
+        return self._status
+
+    @status.setter
+    def status(self, value):
+        status = _STATUSES.get(value)
+        if status is None and isinstance(value, str): # e.g. 'Issued' in a hand-edited catalog
+            status = _STATUSES.get(value.strip().lower())
+        if status is None:
+            raise ValueError(f"{value!r} is not a valid book status")
+        self._status = status
+
     def __str__(self):
         """Magic method for user-friendly printing."""
         return f"Title: {self.title:<30} | Author: {self.author:<20} | ISBN: {self.isbn:<13} | Status: {self.status.capitalize()}"
@@ -32,7 +82,7 @@ class Book:
             'title': self.title,
             'author': self.author,
             'isbn': self.isbn,
-            'status': self.status
+            'status': self.status.value
         }
         
     @classmethod
@@ -43,7 +93,7 @@ class Book:
     def issue(self):
         """Changes the book status to 'issued' if available."""
         if self.is_available():
-            self.status = 'issued'
+            self.status = Status.ISSUED
             logging.info(f"Book issued: {self.title}")
             return True
         else:
@@ -52,8 +102,8 @@ class Book:
 
     def return_book(self):
         """Changes the book status back to 'available' if issued."""
-        if self.status == 'issued':
-            self.status = 'available'
+        if self.status is Status.ISSUED:
+            self.status = Status.AVAILABLE
             logging.info(f"Book returned: {self.title}")
             return True
         else:
@@ -62,69 +112,432 @@ class Book:
 
     def is_available(self):
         """Checks if the book is available."""
-        return self.status == 'available'
+        return self.status is Status.AVAILABLE
+
+# --- Search Index ---
+
+class TextIndex:
+    """Inverted index for case-insensitive substring search over one text field.
+
+    Every text is lowercased once and split into words; each word keeps the
+    sorted list of book positions that contain it, and each GRAM_SIZE-gram
+    points to the words containing it. A query word can only occur inside
+    one word of a matching text, so the candidates are the books holding a
+    word that contains the query's longest word. The candidates are then
+    checked with the same 'query in text' test as a full scan, so results
+    (and their catalog order) are identical to scanning every book.
+    """
+    def __init__(self):
+        self.texts = [] # Lowercased text per book position
+        self.postings = {} # word -> positions of the books containing it
+        self.grams = {} # n-gram -> words containing it
+
+    def _add_word(self, word):
+        for i in range(max(1, len(word) - GRAM_SIZE + 1)):
+            self.grams.setdefault(word[i:i + GRAM_SIZE], set()).add(word)
+
+    def add(self, text):
+        """Indexes the text of the next book position."""
+        position = len(self.texts)
+        text = text.lower()
+        self.texts.append(text)
+        for word in set(text.split()):
+            positions = self.postings.get(word)
+            if positions is None:
+                self.postings[word] = [position]
+                self._add_word(word)
+            else:
+                positions.append(position)
+
+    def build(self, texts):
+        """Rebuilds the index from scratch (catalog load): postings first, then the n-grams of each distinct word."""
+        self.texts = [text.lower() for text in texts]
+        self.postings = postings = {}
+        for position, text in enumerate(self.texts):
+            for word in set(text.split()):
+                positions = postings.get(word)
+                if positions is None:
+                    postings[word] = [position]
+                else:
+                    positions.append(position)
+        self.grams = {}
+        for word in postings:
+            self._add_word(word)
+
+    def _words_containing(self, part):
+        if len(part) < GRAM_SIZE: # Too short for the n-gram index: scan the vocabulary
+            return [word for word in self.postings if part in word]
+        grams = [self.grams.get(part[i:i + GRAM_SIZE], set()) for i in range(len(part) - GRAM_SIZE + 1)]
+        return [word for word in set.intersection(*sorted(grams, key=len)) if part in word]
+
+    def search(self, query):
+        """Positions (in catalog order) of the texts that contain query, case-insensitively."""
+        query = query.lower()
+        parts = query.split()
+        if not parts: # Empty or whitespace-only query: nothing to narrow it down with
+            return [i for i, text in enumerate(self.texts) if query in text]
+        # The query word whose matching words hold the fewest books gives the smallest candidate set
+        words = min((self._words_containing(part) for part in set(parts)),
+                    key=lambda words: sum(len(self.postings[word]) for word in words))
+        if len(words) == 1:
+            candidates = self.postings[words[0]]
+        else:
+            candidates = sorted(set().union(*(self.postings[word] for word in words)))
+        return [i for i in candidates if query in self.texts[i]]
+
+# --- Change Journal ---
+
+class Journal:
+    """Append-only JSON Lines log of catalog changes ('add', 'issue', 'return').
+
+    Each record is written and flushed to the OS at once, so a crash of the
+    program loses nothing; fsync (which survives a crash of the machine) is
+    batched: after JOURNAL_FSYNC_BATCH records, or on an append at least
+    JOURNAL_FSYNC_INTERVAL_S seconds after the last fsync. The interval is
+    only checked when something is appended, so the owner calls sync() before
+    going idle (the CLI does at its prompt), and close() syncs too. Appending
+    costs the same however large the catalog is.
+    """
+    def __init__(self, path, fsync_batch=JOURNAL_FSYNC_BATCH, fsync_interval=JOURNAL_FSYNC_INTERVAL_S):
+        self.path = Path(path)
+        self.fsync_batch = fsync_batch
+        self.fsync_interval = fsync_interval
+        self.records = 0 # Records in the journal file
+        self._file = None
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+
+    def replay(self, repair=True):
+        """Returns the journaled records in order.
+
+        A torn last line (a crash in the middle of a write) or a corrupt line
+        ends the replay and, with repair, is cut off, so new records start on
+        a clean line.
+        """
+        if not self.path.exists():
+            return []
+        records = []
+        good_bytes = 0
+        with self.path.open('rb') as f:
+            for line in f:
+                if not line.endswith(b'\n'):
+                    break
+                try:
+                    records.append(json.loads(line))
+                except ValueError:
+                    break
+                good_bytes += len(line)
+        if repair and good_bytes < self.path.stat().st_size:
+            logging.warning(f"Journal {self.path} ends in an incomplete or corrupt record; it was discarded.")
+            with self.path.open('r+b') as f:
+                f.truncate(good_bytes)
+        self.records = len(records)
+        return records
+
+    def append(self, record):
+        if self._file is None:
+            self._file = self.path.open('a', encoding='utf-8')
+        self._file.write(json.dumps(record) + '\n')
+        self._file.flush()
+        self.records += 1
+        self._unsynced += 1
+        if self._unsynced >= self.fsync_batch or time.monotonic() - self._last_sync >= self.fsync_interval:
+            self.sync()
+
+    def sync(self):
+        if self._file is not None and self._unsynced:
+            os.fsync(self._file.fileno())
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+
+    def reset(self):
+        """Empties the journal once its changes are part of a snapshot."""
+        self.close()
+        self.path.unlink(missing_ok=True)
+        self.records = 0
+
+    def close(self):
+        if self._file is not None:
+            self.sync()
+            self._file.close()
+            self._file = None
 
 # --- Task 2: Inventory Manager & Task 3: File Persistence ---
 
+@contextmanager
+def _gc_paused():
+    """Suspends the cyclic garbage collector while a catalog is loaded.
+
+    Loading creates millions of dicts, strings and Books that never form
+    cycles, yet each allocation burst triggers collections that walk all of
+    them again.
+    """
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if enabled:
+            gc.enable()
+
+def journal_path(filepath):
+    """The change journal of a catalog file, named after the whole file name.
+
+    library_catalog.json and library_catalog.jsonl are separate catalogs,
+    so each has its own journal (library_catalog.json.journal and
+    library_catalog.jsonl.journal).
+    """
+    filepath = Path(filepath)
+    return filepath.with_name(filepath.name + JOURNAL_SUFFIX)
+
+def _valid_changes(records):
+    """The well-formed journal records as ('add', Book) or ('issue'/'return', isbn) changes.
+
+    Returns (changes, skipped): a record that is valid JSON but not a change
+    (an unknown op, a missing field, a bad status) is skipped, not applied.
+    """
+    changes = []
+    skipped = 0
+    for record in records:
+        op = record.get('op') if isinstance(record, dict) else None
+        try:
+            if op == 'add':
+                changes.append((op, Book.from_dict(record['book'])))
+                continue
+            if op in ('issue', 'return') and isinstance(record['isbn'], str):
+                changes.append((op, record['isbn']))
+                continue
+        except (KeyError, TypeError, ValueError):
+            pass
+        skipped += 1
+    return changes, skipped
+
+def _snapshot_entries(f, suffix):
+    """The decoded entries of an open catalog file, batch by batch for a .jsonl catalog."""
+    if suffix == JSONL_SUFFIX:
+        while batch := list(islice(f, JSONL_BATCH_LINES)):
+            entries = ','.join(line for line in batch if not line.isspace())
+            yield from json.loads(f"[{entries}]")
+    else:
+        yield from json.load(f)
+
+def read_snapshot(filepath):
+    """Yields the Books of a catalog file (without its journal).
+
+    A .jsonl catalog is decoded in batches of JSONL_BATCH_LINES lines as it
+    is read, so the whole file and a list of every parsed entry are never
+    in memory at once. Entries that are not a valid book (a missing field,
+    an unknown status) are skipped with a warning, like malformed journal
+    records; a file that is not valid JSON raises json.JSONDecodeError.
+    """
+    skipped = 0
+    with Path(filepath).open(mode='r', encoding='utf-8') as f:
+        for item in _snapshot_entries(f, Path(filepath).suffix):
+            try:
+                book = Book.from_dict(item)
+            except (KeyError, TypeError, ValueError):
+                skipped += 1
+                continue
+            yield book
+    if skipped:
+        logging.warning(f"Skipped {skipped} malformed books in {filepath}")
+
+def write_catalog(books, filepath):
+    """Writes books to a catalog file: a JSON list, or one book per line for a .jsonl file.
+
+    The file is written to a temporary file, synced and renamed over the old
+    one, so a crash leaves either the old or the new catalog.
+    """
+    tmp_path = filepath.with_name(filepath.name + '.tmp')
+    with tmp_path.open(mode='w', encoding='utf-8') as f:
+        if filepath.suffix == JSONL_SUFFIX:
+            f.writelines(json.dumps(book.to_dict()) + '\n' for book in books)
+        else:
+            json.dump([book.to_dict() for book in books], f, indent=4)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, filepath)
+
 class LibraryManager:
-    """Manages the collection of Book objects and handles persistence."""
+    """Manages the collection of Book objects and handles persistence.
+
+    Besides the books list, an ISBN -> Book dict and title/author TextIndexes
+    answer lookups without scanning the catalog; add_book keeps them up to
+    date. _load_catalog rebuilds the ISBN dict in bulk, while the TextIndexes
+    are only built by the first title or author search, so opening a large
+    catalog does not pay for them.
+
+    The catalog file is a snapshot: every add, issue and return is appended
+    to a Journal instead of rewriting it, and loading replays the journal
+    over the snapshot. The journal is compacted into a new snapshot, written
+    atomically, on close and when the catalog is opened with a journal past
+    JOURNAL_COMPACT_MIN changes (or JOURNAL_COMPACT_RATIO of the catalog),
+    never in the middle of an add, issue or return. A snapshot that could
+    not be loaded is never overwritten: changes then stay in the journal.
+    """
     def __init__(self, filepath=CATALOG_FILE):
-        self.filepath = filepath
+        self.filepath = Path(filepath)
         self.books = []
-        self._load_catalog()
+        self._by_isbn = {}
+        self._titles = None # TextIndexes, built on the first search (see _text_indexes)
+        self._authors = None
+        self._load_failed = False # The snapshot exists but could not be read
+        self._journal = Journal(journal_path(self.filepath))
+        legacy_journal = self.filepath.with_suffix(JOURNAL_SUFFIX) # Name used before .jsonl catalogs
+        if self.filepath.suffix != JSONL_SUFFIX and legacy_journal.exists() and not self._journal.path.exists():
+            legacy_journal.rename(self._journal.path)
+        with _gc_paused():
+            self._load_catalog()
+        if self._journal.records >= self._compact_threshold():
+            self.compact()
+
+    def _rebuild_indexes(self):
+        self._by_isbn = {}
+        for book in self.books:
+            self._by_isbn.setdefault(book.isbn, book) # Like a scan, a duplicate ISBN finds the first book
+        self._titles = self._authors = None
+
+    def _text_indexes(self):
+        """The title and author TextIndexes, built from the books on first use."""
+        if self._titles is None:
+            self._titles, self._authors = TextIndex(), TextIndex()
+            with _gc_paused():
+                self._titles.build(book.title for book in self.books)
+                self._authors.build(book.author for book in self.books)
+        return self._titles, self._authors
+
+    def _index_book(self, book):
+        self._by_isbn.setdefault(book.isbn, book)
+        if self._titles is not None:
+            self._titles.add(book.title)
+            self._authors.add(book.author)
 
     def _load_catalog(self):
         """Load book catalog from JSON file. Robust File Handling."""
         try:
             if self.filepath.exists():
-                with self.filepath.open(mode='r', encoding='utf-8') as f:
-                    data = json.load(f)
-                    self.books = [Book.from_dict(item) for item in data]
+                self.books = list(read_snapshot(self.filepath))
                 logging.info(f"Successfully loaded {len(self.books)} books from {self.filepath}")
             else:
                 logging.warning(f"Catalog file not found at {self.filepath}. Starting with empty inventory.")
         except json.JSONDecodeError:
             print(f"Error: Catalog file '{self.filepath}' is corrupted. Starting with empty inventory.")
             self.books = []
+            self._load_failed = True
         except Exception as e:
             print(f"An unexpected error occurred during loading: {e}")
             self.books = []
+            self._load_failed = True
+        else:
+            # Outside the handlers above: a problem in the journal must never discard a good snapshot
+            self._replay_journal()
         finally:
             # Ensures books is initialized even if loading fails
+            self._rebuild_indexes()
             logging.debug("Catalog loading process finished.")
 
 
+    def _replay_journal(self):
+        """Applies the journaled changes on top of the loaded snapshot.
+
+        Every record sets an absolute state (a book exists, is issued, is
+        available), so replaying changes that a crash left in the journal
+        after they were already compacted into the snapshot is harmless.
+        Malformed records are skipped with a warning.
+        """
+        records = self._journal.replay()
+        if not records:
+            return
+        changes, skipped = _valid_changes(records)
+        by_isbn = {}
+        for book in self.books:
+            by_isbn.setdefault(book.isbn, book)
+        for op, value in changes:
+            if op == 'add':
+                if value.isbn not in by_isbn:
+                    self.books.append(value)
+                    by_isbn[value.isbn] = value
+            elif value in by_isbn:
+                by_isbn[value].status = Status.ISSUED if op == 'issue' else Status.AVAILABLE
+        if skipped:
+            logging.warning(f"Skipped {skipped} malformed records in {self._journal.path}")
+        logging.info(f"Replayed {len(changes)} journaled changes from {self._journal.path}")
+
+    def _compact_threshold(self):
+        return max(JOURNAL_COMPACT_MIN, JOURNAL_COMPACT_RATIO * len(self.books))
+
     def _save_catalog(self):
-        """Save the current book catalog to the JSON file."""
-        data = [book.to_dict() for book in self.books]
+        """Save the current book catalog to the JSON file (a new snapshot) and empty the journal."""
         try:
-            with self.filepath.open(mode='w', encoding='utf-8') as f:
-                json.dump(data, f, indent=4)
+            write_catalog(self.books, self.filepath)
+            self._journal.reset()
             logging.info(f"Catalog saved with {len(self.books)} books.")
         except IOError as e:
             logging.error(f"Error saving catalog to file: {e}")
             print("Error: Could not save the inventory to file.")
 
+    def compact(self):
+        """Folds the journal into a new catalog snapshot, unless the snapshot failed to load.
+
+        Returns whether a snapshot was written.
+        """
+        self._journal.close()
+        if self._load_failed:
+            # Writing this session's books would replace the unreadable catalog with an almost empty one
+            logging.warning(f"{self.filepath} could not be loaded, so it was not overwritten; "
+                            f"changes are kept in {self._journal.path}.")
+            return False
+        self._save_catalog()
+        return True
+
+    def _record(self, record):
+        """Journals one change; returns False (after reporting it) if it could not be written.
+
+        Compaction is left to close() and the next start-up, so the cost of
+        a change does not depend on the size of the catalog.
+        """
+        try:
+            self._journal.append(record)
+        except IOError as e:
+            logging.error(f"Error writing to the journal: {e}")
+            print("Error: Could not save the change to file.")
+            return False
+        return True
+
+    def sync(self):
+        """fsyncs the journaled changes not yet synced (the CLI calls this before waiting for input)."""
+        self._journal.sync()
+
+    def close(self):
+        """Syncs the journal and writes a current snapshot (on exit)."""
+        if self._journal.records:
+            self.compact()
+        self._journal.close()
+
     def add_book(self, title, author, isbn):
         """Adds a new book to the inventory and saves the catalog."""
-        if any(book.isbn == isbn for book in self.books):
+        if isbn in self._by_isbn:
             print(f"Error: Book with ISBN {isbn} already exists.")
             return
         
         new_book = Book(title.title(), author.title(), isbn)
+        if not self._record({'op': 'add', 'book': new_book.to_dict()}):
+            return
         self.books.append(new_book)
-        self._save_catalog()
+        self._index_book(new_book)
         print(f"Success: Book '{title}' added to inventory.")
 
     def search_by_title(self, query):
         """Searches for books whose title contains the query string (case-insensitive)."""
-        query = query.lower()
-        results = [book for book in self.books if query in book.title.lower()]
-        return results
+        return [self.books[i] for i in self._text_indexes()[0].search(query)]
+
+    def search_by_author(self, query):
+        """Searches for books whose author contains the query string (case-insensitive)."""
+        return [self.books[i] for i in self._text_indexes()[1].search(query)]
 
     def search_by_isbn(self, isbn):
         """Searches for a book by its exact ISBN."""
-        return next((book for book in self.books if book.isbn == isbn), None)
+        return self._by_isbn.get(isbn)
 
     def display_all(self):
         """Displays all books in the inventory."""
@@ -148,21 +561,264 @@ class LibraryManager:
             print(f"Error: No book found with ISBN {isbn}.")
             return False
 
+        previous = book.status
         success = False
         if action == 'issue':
             success = book.issue()
         elif action == 'return':
             success = book.return_book()
         
-        if success:
-            self._save_catalog()
+        if success and not self._record({'op': action, 'isbn': isbn}):
+            book.status = previous # Not saved, so not done
+            success = False
         return success
 
+# --- SQLite Storage Backend ---
+
+class ConnectionPool:
+    """Up to size SQLite connections shared by the threads of one process.
+
+    A thread borrows a connection with 'with pool.connection() as conn:' and
+    waits when all of them are in use. Connections run in WAL mode, so
+    readers never block the writer, and in autocommit mode: transactions
+    are opened explicitly.
+    """
+    def __init__(self, path, size=POOL_SIZE):
+        self.path = Path(path)
+        self.size = size
+        self._idle = queue.LifoQueue()
+        self._created = 0
+        self._lock = threading.Lock()
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=SQLITE_BUSY_TIMEOUT_S, isolation_level=None,
+                               check_same_thread=False)
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL') # WAL stays consistent; fsync happens at checkpoints
+        # Python's lower(), so searches match exactly like the in-memory catalog (SQLite's only folds ASCII)
+        conn.create_function('py_lower', 1, str.lower, deterministic=True)
+        return conn
+
+    @contextmanager
+    def connection(self):
+        try:
+            conn = self._idle.get_nowait()
+        except queue.Empty:
+            with self._lock:
+                create = self._created < self.size
+                self._created += create
+            conn = self._connect() if create else self._idle.get()
+        try:
+            yield conn
+        finally:
+            self._idle.put(conn)
+
+    def close(self):
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                break
+        self._created = 0
+
+class SQLiteLibraryManager:
+    """LibraryManager with the catalog in an SQLite database instead of memory.
+
+    Several terminals (processes) and threads can work on one catalog: ISBN
+    is the primary key, issue/return check and update a book inside one
+    IMMEDIATE transaction, and the threads of a process share a
+    ConnectionPool. Titles and authors are also kept lowercased in an FTS5
+    trigram table, so substring searches of three or more characters use an
+    index (shorter ones, ones containing a GLOB wildcard, and all of them
+    without FTS5, scan the table). Search results match LibraryManager's,
+    in the order the books were added. A new database is filled from the
+    JSON catalog in a single transaction.
+    """
+    def __init__(self, db_path=DB_FILE, import_from=CATALOG_FILE, pool_size=POOL_SIZE):
+        self.db_path = Path(db_path)
+        self._pool = ConnectionPool(self.db_path, pool_size)
+        self.fts = self._create_schema()
+        if (import_from is not None and self.count() == 0
+                and (Path(import_from).exists() or journal_path(import_from).exists())):
+            self.import_json(import_from)
+
+    def _create_schema(self):
+        """Creates the tables if needed; returns whether the FTS5 search table is available."""
+        with self._transaction() as conn:
+            conn.execute("""CREATE TABLE IF NOT EXISTS books (
+                                isbn TEXT PRIMARY KEY, title TEXT NOT NULL, author TEXT NOT NULL,
+                                status TEXT NOT NULL DEFAULT 'available')""")
+            try:
+                conn.execute("""CREATE VIRTUAL TABLE IF NOT EXISTS books_search USING
+                                fts5(title, author, tokenize='trigram case_sensitive 1')""")
+                return True
+            except sqlite3.OperationalError: # SQLite built without FTS5 or older than 3.34
+                logging.warning("SQLite FTS5 trigram search is not available; searches will scan the table.")
+                return False
+
+    @contextmanager
+    def _transaction(self):
+        """A pooled connection inside BEGIN IMMEDIATE ... COMMIT (ROLLBACK on an exception)."""
+        with self._pool.connection() as conn:
+            conn.execute('BEGIN IMMEDIATE')
+            try:
+                yield conn
+            except BaseException:
+                conn.execute('ROLLBACK')
+                raise
+            conn.execute('COMMIT')
+
+    def _index_rows(self, conn, after_rowid):
+        """Adds the books inserted after after_rowid to the search table."""
+        if self.fts:
+            conn.execute('INSERT INTO books_search (rowid, title, author) '
+                         'SELECT rowid, py_lower(title), py_lower(author) FROM books WHERE rowid > ?',
+                         (after_rowid,))
+
+    def import_json(self, filepath=CATALOG_FILE):
+        """Bulk-loads a JSON catalog (snapshot and journal) in one transaction; existing ISBNs are kept.
+
+        The snapshot is streamed into the table and the journaled changes
+        are applied with SQL, the same way LibraryManager replays them; the
+        JSON catalog and its journal are left untouched.
+        """
+        filepath = Path(filepath)
+        changes, skipped = _valid_changes(Journal(journal_path(filepath)).replay(repair=False))
+        if skipped:
+            logging.warning(f"Skipped {skipped} malformed records in {journal_path(filepath)}")
+        insert = 'INSERT OR IGNORE INTO books (isbn, title, author, status) VALUES (?, ?, ?, ?)'
+        try:
+            with self._transaction() as conn:
+                last_rowid = conn.execute('SELECT coalesce(max(rowid), 0) FROM books').fetchone()[0]
+                if filepath.exists():
+                    conn.executemany(insert, ((book.isbn, book.title, book.author, book.status.value)
+                                              for book in read_snapshot(filepath)))
+                for op, value in changes:
+                    if op == 'add':
+                        conn.execute(insert, (value.isbn, value.title, value.author, value.status.value))
+                    else: # Only books imported here; existing ISBNs are kept as they are
+                        status = Status.ISSUED if op == 'issue' else Status.AVAILABLE
+                        conn.execute('UPDATE books SET status = ? WHERE isbn = ? AND rowid > ?',
+                                     (status.value, value, last_rowid))
+                self._index_rows(conn, last_rowid)
+                imported = conn.execute('SELECT count(*) FROM books WHERE rowid > ?', (last_rowid,)).fetchone()[0]
+        except (ValueError, KeyError, TypeError): # Also json.JSONDecodeError
+            print(f"Error: Catalog file '{filepath}' is corrupted. Nothing was imported.")
+            return
+        logging.info(f"Imported {imported} books from {filepath} into {self.db_path}")
+
+    def count(self):
+        with self._pool.connection() as conn:
+            return conn.execute('SELECT count(*) FROM books').fetchone()[0]
+
+    @property
+    def books(self):
+        """All books in catalog order (read from the database on every access)."""
+        with self._pool.connection() as conn:
+            rows = conn.execute('SELECT title, author, isbn, status FROM books ORDER BY rowid').fetchall()
+        return [Book(*row) for row in rows]
+
+    def sync(self):
+        """Checkpoints the WAL, which fsyncs the committed changes (synchronous=NORMAL defers that)."""
+        with self._pool.connection() as conn:
+            conn.execute('PRAGMA wal_checkpoint(PASSIVE)')
+
+    def close(self):
+        self._pool.close()
+
+    def add_book(self, title, author, isbn):
+        """Adds a new book to the inventory (committed at once)."""
+        new_book = Book(title.title(), author.title(), isbn)
+        with self._transaction() as conn:
+            cursor = conn.execute('INSERT OR IGNORE INTO books (isbn, title, author, status) VALUES (?, ?, ?, ?)',
+                                  (new_book.isbn, new_book.title, new_book.author, new_book.status.value))
+            if cursor.rowcount == 0:
+                print(f"Error: Book with ISBN {isbn} already exists.")
+                return
+            self._index_rows(conn, cursor.lastrowid - 1)
+        print(f"Success: Book '{title}' added to inventory.")
+
+    def _search(self, column, query):
+        query = query.lower()
+        # Shorter queries have no trigram to look up, and a GLOB with a bracket-escaped wildcard next to a
+        # non-ASCII character misses matches in the trigram index, so both scan the table instead
+        if self.fts and len(query) >= 3 and not any(c in query for c in '*?['):
+            sql = (f'SELECT b.title, b.author, b.isbn, b.status FROM books_search s JOIN books b ON b.rowid = s.rowid '
+                   f'WHERE s.{column} GLOB ? ORDER BY b.rowid')
+            params = (f'*{query}*',)
+        else:
+            sql = f'SELECT title, author, isbn, status FROM books WHERE instr(py_lower({column}), ?) > 0 ORDER BY rowid'
+            params = (query,)
+        with self._pool.connection() as conn:
+            return [Book(*row) for row in conn.execute(sql, params)]
+
+    def search_by_title(self, query):
+        """Searches for books whose title contains the query string (case-insensitive)."""
+        return self._search('title', query)
+
+    def search_by_author(self, query):
+        """Searches for books whose author contains the query string (case-insensitive)."""
+        return self._search('author', query)
+
+    def search_by_isbn(self, isbn):
+        """Searches for a book by its exact ISBN."""
+        with self._pool.connection() as conn:
+            row = conn.execute('SELECT title, author, isbn, status FROM books WHERE isbn = ?', (isbn,)).fetchone()
+        return Book(*row) if row else None
+
+    display_all = LibraryManager.display_all
+
+    def issue_return_book(self, isbn, action):
+        """Helper for issuing or returning a book; the check and the update are one transaction."""
+        with self._transaction() as conn:
+            row = conn.execute('SELECT title, author, isbn, status FROM books WHERE isbn = ?', (isbn,)).fetchone()
+            if not row:
+                print(f"Error: No book found with ISBN {isbn}.")
+                return False
+
+            book = Book(*row)
+            success = False
+            if action == 'issue':
+                success = book.issue()
+            elif action == 'return':
+                success = book.return_book()
+
+            if success:
+                conn.execute('UPDATE books SET status = ? WHERE isbn = ?', (book.status.value, isbn))
+        return success
+
+BACKENDS = {'json': LibraryManager, 'sqlite': SQLiteLibraryManager}
+
+def open_library(backend=STORAGE_BACKEND, catalog=CATALOG_FILE):
+    """The manager for a storage backend name ('json' or 'sqlite').
+
+    catalog is the JSON (or .jsonl) catalog file; the SQLite backend imports
+    it when its database is new.
+    """
+    if backend == 'sqlite':
+        return SQLiteLibraryManager(import_from=catalog)
+    return BACKENDS[backend](catalog)
+
+def convert_catalog(source, target):
+    """Writes the catalog in source (with its journal) to target, e.g. library_catalog.jsonl.
+
+    The source's journal is compacted into its snapshot first, and any old
+    journal of target is emptied, so neither catalog replays the other's
+    changes.
+    """
+    manager = LibraryManager(Path(source))
+    if not manager.compact():
+        print(f"Error: Catalog file '{source}' could not be loaded. Nothing was converted.")
+        return
+    write_catalog(manager.books, Path(target))
+    Journal(journal_path(target)).reset()
+    logging.info(f"Catalog with {len(manager.books)} books written to {target}")
+
 # --- Task 4: Menu-Driven Command Line Interface ---
 
-def run_cli():
+def run_cli(backend=STORAGE_BACKEND, catalog=CATALOG_FILE):
     """Main menu loop for the Library Inventory Manager."""
-    manager = LibraryManager()
+    manager = open_library(backend, catalog)
 
     while True:
         print("\n" + "="*40)
@@ -176,6 +832,8 @@ def run_cli():
         print("6. Exit")
         print("-" * 40)
         
+        # Nothing may stay un-fsynced while the prompt waits, possibly for hours
+        manager.sync()
         choice = input("Enter choice (1-6): ").strip()
         
         try:
@@ -210,6 +868,7 @@ def run_cli():
                     print(f"No books found matching '{query}'.")
 
             elif choice == '6':
+                manager.close()
                 print("Exiting Library Manager. Catalog data saved.")
                 break
                 
@@ -222,4 +881,15 @@ def run_cli():
             print(f"\nSystem Error: {e}. Please check the log for details.")
 
 if __name__ == "__main__":
-    run_cli()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Library Inventory Manager")
+    parser.add_argument('--backend', choices=sorted(BACKENDS), default=STORAGE_BACKEND,
+                        help="catalog storage: JSON file with a change journal, or an SQLite database")
+    parser.add_argument('--catalog', type=Path, default=CATALOG_FILE,
+                        help="catalog file; a .jsonl catalog (one book per line) loads faster")
+    parser.add_argument('--convert-to', type=Path, metavar='TARGET',
+                        help="write the catalog to TARGET (e.g. library_catalog.jsonl) and exit")
+    args = parser.parse_args()
+    if args.convert_to:
+        convert_catalog(args.catalog, args.convert_to)
+    else:
+        run_cli(args.backend, args.catalog)
\ No newline at end of file
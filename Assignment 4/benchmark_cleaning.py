@@ -0,0 +1,130 @@
+# Name: Bhoomi Raghav
+# Roll number: 2501730254
+# Course Code: ETCCPP102
+# Assignment 4: Weather Data Visualizer (cleaning benchmark)
+# Date: 2026-10-18
+
+import argparse
+import json
+import platform
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+import weather
+
+# --- Configuration ---
+DEFAULT_ROWS = (100_000, 1_000_000, 5_000_000)
+DEFAULT_CORRUPTION = 0.01
+REPEAT = 3
+DATE_SPAN_DAYS = 150 * 365
+SEED = 42
+
+# --- Synthetic Data Generator ---
+
+def generate_weather_csv(file_path, rows, corruption_rate=DEFAULT_CORRUPTION, seed=SEED):
+    """Writes (or reuses) a daily weather CSV with rows rows and injected faults.
+
+    A corruption_rate fraction of the rows is damaged, split between an
+    unparseable date and a missing reading. An extra Station column is included
+    so that column selection on read is exercised too.
+    """
+    if file_path.exists():
+        return
+    rng = np.random.default_rng(seed)
+    # Dates repeat every DATE_SPAN_DAYS so very large files stay inside the Timestamp range
+    calendar = pd.date_range('1800-01-01', periods=min(rows, DATE_SPAN_DAYS), freq='D')
+    dates = np.resize(calendar.strftime(weather.DATE_FORMAT).to_numpy(dtype=object), rows)
+    day = np.arange(rows) % 365
+    max_temp = np.round(25 + 8 * np.sin(2 * np.pi * day / 365) + rng.normal(0, 2, rows), 1)
+    min_temp = np.round(max_temp - rng.uniform(5, 12, rows), 1)
+    rain = np.round(np.where(rng.random(rows) < 0.3, rng.exponential(6, rows), 0.0), 1)
+    humidity = rng.integers(30, 100, rows)
+
+    rain_text = rain.astype(str).astype(object)
+    n_bad = int(round(rows * corruption_rate))
+    if n_bad:
+        bad_rows = rng.choice(rows, size=n_bad, replace=False)
+        dates[bad_rows[::2]] = 'bad-date'
+        rain_text[bad_rows[1::2]] = ''
+
+    lines = (dates + ',' + max_temp.astype(str) + ',' + min_temp.astype(str) + ',' + rain_text + ','
+             + humidity.astype(str) + ',ST01')
+    file_path.parent.mkdir(parents=True, exist_ok=True)
+    with file_path.open('w', encoding='utf-8') as f:
+        f.write('Date,Max Temp (°C),Min Temp (°C),Rainfall (mm),Humidity (%),Station\n')
+        f.write('\n'.join(lines))
+        f.write('\n')
+
+# --- Benchmark Runner ---
+
+def original_path(file_path):
+    return weather.data_cleaning_and_processing(
+        weather.data_acquisition_and_loading(file_path, verbose=False), verbose=False)
+
+def fast_path(file_path):
+    return weather.load_and_clean(file_path)
+
+def _measure(func, file_path, repeat):
+    """Best wall time over repeat runs, then one traced run for the peak memory."""
+    times = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = func(file_path)
+        times.append(time.perf_counter() - started)
+    tracemalloc.start()
+    func(file_path)
+    peak_mb = tracemalloc.get_traced_memory()[1] / 2**20
+    tracemalloc.stop()
+    return result, min(times), peak_mb
+
+def run_benchmark(rows, corruption_rate, work_dir, repeat=REPEAT):
+    file_path = work_dir / f'weather_{rows}_{corruption_rate}.csv'
+    generate_weather_csv(file_path, rows, corruption_rate)
+    print(f"\nRows: {rows:,} ({file_path.stat().st_size / 2**20:.1f} MB, {corruption_rate:.1%} corrupted)")
+
+    old, old_s, old_mb = _measure(original_path, file_path, repeat)
+    new, new_s, new_mb = _measure(fast_path, file_path, repeat)
+    # The original keeps integer columns as int64; the values must match exactly
+    pd.testing.assert_frame_equal(old, new, check_dtype=False)
+
+    print(f"  {'original':<10} {old_s:8.3f} s  {old_mb:9.1f} MB peak")
+    print(f"  {'fast':<10} {new_s:8.3f} s  {new_mb:9.1f} MB peak")
+    print(f"  speed-up {old_s / new_s:.2f}x, peak memory {new_mb / old_mb:.0%} of the original, "
+          f"{len(new):,} rows kept")
+    return {'rows': rows, 'corruption_rate': corruption_rate, 'rows_kept': len(new),
+            'original': {'wall_s': round(old_s, 4), 'peak_mem_mb': round(old_mb, 2)},
+            'fast': {'wall_s': round(new_s, 4), 'peak_mem_mb': round(new_mb, 2)},
+            'speedup': round(old_s / new_s, 2)}
+
+def main():
+    parser = argparse.ArgumentParser(description="Compares the original and the fast weather cleaning path")
+    parser.add_argument('--rows', type=int, nargs='+', default=list(DEFAULT_ROWS),
+                        help="row counts of the synthetic files")
+    parser.add_argument('--corruption', type=float, default=DEFAULT_CORRUPTION,
+                        help="fraction of rows to corrupt")
+    parser.add_argument('--repeat', type=int, default=REPEAT, help="timed runs per path (best is kept)")
+    parser.add_argument('--work-dir', help="keep the generated files here and reuse them in later runs "
+                                           "(default: a temporary directory)")
+    parser.add_argument('--output', help="also write the results as JSON to this file")
+    args = parser.parse_args()
+
+    if args.work_dir:
+        runs = [run_benchmark(rows, args.corruption, Path(args.work_dir), args.repeat) for rows in args.rows]
+    else:
+        with tempfile.TemporaryDirectory() as work_dir:
+            runs = [run_benchmark(rows, args.corruption, Path(work_dir), args.repeat) for rows in args.rows]
+    if args.output:
+        results = {'generated_at': pd.Timestamp.now().isoformat(timespec='seconds'),
+                   'environment': {'python': platform.python_version(), 'numpy': np.__version__,
+                                   'pandas': pd.__version__},
+                   'runs': runs}
+        Path(args.output).write_text(json.dumps(results, indent=2))
+        print(f"\nBenchmark results written to {args.output}")
+
+if __name__ == "__main__":
+    main()
@@ -4,26 +4,70 @@
 # Assignment: Weather Data Visualizer
 # Date: 2025-12-08
 
+import argparse
+import functools
+import glob
+import hashlib
+import json
+import os
+import pickle
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from pathlib import Path
+
 import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
-from pathlib import Path
+import matplotlib
+import matplotlib.dates as mdates
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.collections import PolyCollection
+from matplotlib.figure import Figure
 
 # --- Configuration ---
 # NOTE: Ensure you have a 'sample_weather_data.csv' file in the same directory.
 DATA_FILE = 'sample_weather_data.csv'
 CLEANED_FILE = 'cleaned_weather_data.csv'
+DATE_FORMAT = '%Y-%m-%d' # Dates are parsed with this fixed format while the CSV is read
 OUTPUT_DIR = Path('plots')
+SUMMARY_FILE = 'weather_summary.md'
+PLOT_FILES = ('temp_trend_line.png', 'monthly_rainfall_bar.png', 'combined_scatter_plots.png')
+PLOT_MAX_POINTS = None # Decimate dense daily series to about this many points before plotting (None: plot all)
+PLOT_MAX_MONTH_LABELS = 24 # Longer rainfall charts label every n-th month only
+PNG_COMPRESS_LEVEL = 6 # zlib level of the saved plots; 1 encodes faster, with somewhat larger files
+# Stage cache: results keyed on the input file's content hash and the pipeline configuration.
+# Bump CACHE_VERSION whenever a stage's output changes so older entries are not reused.
+CACHE_DIR = Path('.weather_cache')
+CACHE_MAX_MB = 500
+CACHE_VERSION = 4
+# Climatology: day-of-year baselines across years, rolling means and anomalies (see
+# ClimatologyEngine); the state lets later runs process only newly appended days
+CLIMATOLOGY_FILE = 'climatology_baseline.csv'
+CLIMATE_DAILY_FILE = 'cleaned_weather_climatology.csv'
+CLIMATOLOGY_STATE_FILE = 'climatology_state.pkl'
+ROLLING_WINDOWS = (7, 30) # Days
+ANOMALY_WINDOW_DAYS = 30 # Rolling window of the smoothed anomaly columns
+CLIMATOLOGY_SMOOTH_DAYS = 31 # Centered window that smooths the day-of-year normals
+CLIMATOLOGY_MIN_YEARS = 3 # Fewer years of data are flagged as a provisional baseline
+# Batch mode: one output folder per station plus the combined monthly tables
+BATCH_OUTPUT_DIR = Path('batch_output')
+BATCH_WORKERS = os.cpu_count() or 1
+COMBINED_MONTHLY_FILE = 'combined_monthly_stats.csv'
+CROSS_STATION_FILE = 'cross_station_monthly.csv'
+BATCH_CLIMATE_DAILY = False # Per-station enriched daily CSV (the slowest output to write for long records)
+BATCH_PLOTS = True # Per-station plots/ folder, rendered in the same worker processes
 
-def data_acquisition_and_loading(filepath):
-    """Task 1: Load and inspect data."""
-    print(f"--- Task 1: Loading Data from {filepath} ---")
+def data_acquisition_and_loading(filepath, verbose=True):
+    """Task 1: Load and inspect data (verbose=False skips the inspection printout)."""
+    if verbose:
+        print(f"--- Task 1: Loading Data from {filepath} ---")
     try:
         df = pd.read_csv(filepath)
-        print("Initial DataFrame Head:")
-        print(df.head())
-        print("\nInitial DataFrame Info:")
-        df.info()
+        if verbose:
+            print("Initial DataFrame Head:")
+            print(df.head())
+            print("\nInitial DataFrame Info:")
+            df.info()
         return df
     except FileNotFoundError:
         print(f"Error: Data file not found at {filepath}")
@@ -34,14 +78,16 @@ def data_acquisition_and_loading(filepath):
         return None
 
 
-def data_cleaning_and_processing(df):
+def data_cleaning_and_processing(df, verbose=True):
     """Task 2: Handle missing values and format dates."""
     if df is None: return None
-    print("\n--- Task 2: Cleaning Data ---")
+    if verbose:
+        print("\n--- Task 2: Cleaning Data ---")
     
     # Drop rows with any NaN values for simplicity in this dataset
     df_cleaned = df.dropna()
-    print(f"Dropped {len(df) - len(df_cleaned)} rows with missing values.")
+    if verbose:
+        print(f"Dropped {len(df) - len(df_cleaned)} rows with missing values.")
     
     # Convert Date column to datetime format. 'errors=coerce' turns invalid dates into NaT.
     df_cleaned['Date'] = pd.to_datetime(df_cleaned['Date'], errors='coerce')
@@ -54,20 +100,73 @@ def data_cleaning_and_processing(df):
     # Filter for relevant columns
     df_cleaned = df_cleaned[['Max Temp (°C)', 'Min Temp (°C)', 'Rainfall (mm)', 'Humidity (%)']]
     
-    print("\nCleaned DataFrame Head:")
-    print(df_cleaned.head())
-    df_cleaned.info()
+    if verbose:
+        print("\nCleaned DataFrame Head:")
+        print(df_cleaned.head())
+        df_cleaned.info()
     return df_cleaned
 
-def statistical_analysis(df):
+def load_and_clean(filepath, date_format=DATE_FORMAT, verbose=False):
+    """Tasks 1 and 2 in one pass, without intermediate copies of the frame.
+
+    Only the Date and the four reading columns are read, readings straight
+    into float64 and dates parsed once with the known date_format. A row is
+    kept when its date parsed and all four readings are present (one
+    vectorized mask), and the cleaned frame is built once from the kept rows.
+    Non-numeric readings count as missing. verbose=True prints the same
+    inspection as Tasks 1 and 2. Returns None if the file cannot be read.
+    """
+    if verbose:
+        print(f"--- Tasks 1-2: Loading and Cleaning Data from {filepath} ---")
+    columns = ['Date', *CLIMATE_COLUMNS]
+    # Date stays as plain objects until to_datetime; a str column would be built only to be parsed
+    dtypes = {'Date': object, **dict.fromkeys(CLIMATE_COLUMNS, 'float64')}
+    try:
+        try:
+            raw = pd.read_csv(filepath, usecols=columns, dtype=dtypes)
+        except ValueError: # A non-numeric reading: read the readings untyped and coerce below
+            raw = pd.read_csv(filepath, usecols=columns, dtype={'Date': object})
+    except FileNotFoundError:
+        print(f"Error: Data file not found at {filepath}")
+        print("ACTION REQUIRED: Please ensure 'sample_weather_data.csv' is in the same directory as this script.")
+        return None
+    except Exception as e:
+        print(f"An unexpected error occurred during file reading: {e}")
+        return None
+
+    dates = pd.to_datetime(raw['Date'], format=date_format, errors='coerce')
+    values = {column: raw[column] if raw[column].dtype == np.float64
+              else pd.to_numeric(raw[column], errors='coerce').astype(np.float64) for column in CLIMATE_COLUMNS}
+    keep = np.logical_and.reduce([dates.notna().to_numpy(),
+                                  *(values[column].notna().to_numpy() for column in CLIMATE_COLUMNS)])
+
+    dropped = len(raw) - int(keep.sum())
+    if dropped:
+        index = pd.DatetimeIndex(dates.to_numpy()[keep], name='Date')
+        data = {column: values[column].to_numpy()[keep] for column in CLIMATE_COLUMNS}
+    else: # Nothing to drop: the parsed arrays are used as they are
+        index = pd.DatetimeIndex(dates, name='Date')
+        data = {column: values[column].to_numpy() for column in CLIMATE_COLUMNS}
+    df_cleaned = pd.DataFrame(data, index=index, copy=False)
+
+    if verbose:
+        print(f"Dropped {dropped} rows with missing values or invalid dates.")
+        print("\nCleaned DataFrame Head:")
+        print(df_cleaned.head())
+        df_cleaned.info()
+    return df_cleaned
+
+def statistical_analysis(df, verbose=True):
     """Task 3: Compute daily/monthly statistics using NumPy concepts (via Pandas)."""
     if df is None: return None
-    print("\n--- Task 3: Statistical Analysis (NumPy/Pandas) ---")
+    if verbose:
+        print("\n--- Task 3: Statistical Analysis (NumPy/Pandas) ---")
     
     # Overall Daily Descriptive Statistics
     daily_stats = df.describe().T[['mean', 'min', 'max', 'std']]
-    print("\nOverall Descriptive Statistics:")
-    print(daily_stats)
+    if verbose:
+        print("\nOverall Descriptive Statistics:")
+        print(daily_stats)
     
     # Monthly Statistics using resample and NumPy functions (Aggregation)
     # NOTE: Using 'ME' (Month End) instead of 'M' to remove FutureWarning, and using strings 
@@ -80,79 +179,372 @@ def statistical_analysis(df):
     # Flatten column names for easier access in the report generation
     monthly_stats.columns = ['_'.join(col).strip() for col in monthly_stats.columns.values]
     
-    print("\nMonthly Aggregated Statistics:")
-    print(monthly_stats)
+    if verbose:
+        print("\nMonthly Aggregated Statistics:")
+        print(monthly_stats)
     return daily_stats, monthly_stats
 
-def visualization(df):
-    """Task 4: Create informative plots using Matplotlib."""
+# --- Task 3b: Rolling Climatology and Anomalies ---
+
+CLIMATE_COLUMNS = ('Max Temp (°C)', 'Min Temp (°C)', 'Rainfall (mm)', 'Humidity (%)')
+ANOMALY_COLUMNS = ('Max Temp (°C)', 'Min Temp (°C)', 'Rainfall (mm)')
+DAY_SLOTS = 366
+CLIMATOLOGY_STATE_VERSION = 1
+
+def day_of_year_slot(index):
+    """Calendar-day slot 0-365 of each date: 29 February is slot 59, so 1 March is always slot 60."""
+    doy = index.dayofyear.to_numpy()
+    return doy - 1 + ((~index.is_leap_year) & (doy >= 60))
+
+def _row_checksum(df):
+    """Order-independent checksum of a frame's rows (sum of row hashes mod 2**64), additive across chunks."""
+    return int(pd.util.hash_pandas_object(df, index=True).to_numpy().sum(dtype=np.uint64))
+
+def _circular_window_sum(values, before, after):
+    """For every slot s, the sum of values over slots s-before .. s+after, wrapping around the year."""
+    padded = np.concatenate([values[len(values) - before:], values, values[:after]])
+    cumsum = np.concatenate([np.zeros((1,) + values.shape[1:]), np.cumsum(padded, axis=0)])
+    width = before + after + 1
+    return cumsum[width:] - cumsum[:-width]
+
+class ClimatologyEngine:
+    """Rolling means, day-of-year climatology and anomalies, updated incrementally.
+
+    The state holds, per calendar-day slot and variable, the sum and count of
+    all readings so far (the baseline is derived from these), the rolling means
+    computed so far, and the last days needed to continue the rolling windows.
+    update() only processes days after the last one seen, so appending a month
+    to a decades-long record costs a month of work. Anomalies are a per-slot
+    lookup against the current baseline, so they always match a full recompute.
+    """
+    def __init__(self):
+        self.sums = np.zeros((DAY_SLOTS, len(CLIMATE_COLUMNS)))
+        self.counts = np.zeros((DAY_SLOTS, len(CLIMATE_COLUMNS)), dtype=np.int64)
+        self.years = set()
+        self.rolling = pd.DataFrame()
+        self.tail = pd.DataFrame() # Last max(ROLLING_WINDOWS) days of readings
+        self.first_date = self.last_date = None
+        self.rows = 0
+        self.checksum = 0 # Sum of the row hashes folded in (mod 2**64), to detect rewritten history
+
+    def update(self, df):
+        """Folds the days of the cleaned frame df after last_date into the state; returns how many were new.
+
+        df may be the whole record: rows up to last_date are only checked
+        against the state, and if they changed the state is rebuilt from df.
+        """
+        df = df[list(CLIMATE_COLUMNS)]
+        if not df.index.is_monotonic_increasing:
+            df = df.sort_index()
+        if self.last_date is not None:
+            split = df.index.searchsorted(self.last_date, side='right')
+            if split != self.rows or _row_checksum(df.iloc[:split]) != self.checksum:
+                print("- Climatology: earlier readings changed, rebuilding the baseline.")
+                self.__init__()
+                return self.update(df)
+            df = df.iloc[split:]
+        if df.empty:
+            return 0
+
+        # Day-of-year sums and counts of every variable in one bincount over slot * columns + column
+        values = df.to_numpy(dtype=np.float64)
+        valid = ~np.isnan(values)
+        cells = (day_of_year_slot(df.index)[:, None] * values.shape[1] + np.arange(values.shape[1]))[valid]
+        size = DAY_SLOTS * values.shape[1]
+        self.sums += np.bincount(cells, weights=values[valid], minlength=size).reshape(self.sums.shape)
+        self.counts += np.bincount(cells, minlength=size).reshape(self.counts.shape)
+        self.years.update(np.unique(df.index.year).tolist())
+
+        # Time-based windows continue from the retained tail, so gaps in the record are respected
+        window = pd.concat([self.tail, df]) if not self.tail.empty else df
+        rolling = {}
+        for days in ROLLING_WINDOWS:
+            means = window.rolling(f'{days}D').mean().iloc[len(self.tail):]
+            rolling.update({f'{column}_{days}d': means[column] for column in CLIMATE_COLUMNS})
+        self.rolling = pd.concat([self.rolling, pd.DataFrame(rolling, index=df.index)])
+        self.tail = window[window.index > df.index[-1] - pd.Timedelta(days=max(ROLLING_WINDOWS))]
+        self.first_date = self.first_date if self.first_date is not None else df.index[0]
+        self.last_date = df.index[-1]
+        self.rows += len(df)
+        self.checksum = (self.checksum + _row_checksum(df)) % 2**64
+        return len(df)
+
+    def normals(self):
+        """Day-of-year normals (slots x variables), smoothed over CLIMATOLOGY_SMOOTH_DAYS; NaN without data."""
+        half = CLIMATOLOGY_SMOOTH_DAYS // 2
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return _circular_window_sum(self.sums, half, half) / _circular_window_sum(self.counts, half, half)
+
+    def trailing_normals(self, days=ANOMALY_WINDOW_DAYS):
+        """Mean of the normals over the days-long window ending at each slot (the baseline of a rolling mean)."""
+        normals = self.normals()
+        known = ~np.isnan(normals)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return (_circular_window_sum(np.where(known, normals, 0.0), days - 1, 0)
+                    / _circular_window_sum(known.astype(np.int64), days - 1, 0))
+
+    def baseline_table(self):
+        """The climatology as a table: one row per calendar day with each variable's normal."""
+        labels = pd.date_range('2000-01-01', periods=DAY_SLOTS, freq='D').strftime('%m-%d') # A leap year
+        table = pd.DataFrame(self.normals(), index=pd.Index(labels, name='Month-Day'),
+                             columns=[f'{column}_normal' for column in CLIMATE_COLUMNS])
+        table['Readings'] = self.counts[:, 0]
+        return table
+
+    def enrich(self, df):
+        """df (the frame the state was built from) with rolling means and anomalies against the baseline."""
+        if not df.index.is_monotonic_increasing:
+            df = df.sort_index()
+        if len(df) != len(self.rolling):
+            raise ValueError("enrich() needs the frame the climatology state was built from")
+        slots = day_of_year_slot(df.index)
+        normals, trailing = self.normals(), self.trailing_normals()
+        enriched = pd.concat([df, self.rolling.set_axis(df.index)], axis=1)
+        for j, column in enumerate(CLIMATE_COLUMNS):
+            if column in ANOMALY_COLUMNS:
+                enriched[f'{column}_anomaly'] = df[column].to_numpy() - normals[slots, j]
+                enriched[f'{column}_{ANOMALY_WINDOW_DAYS}d_anomaly'] = (
+                    enriched[f'{column}_{ANOMALY_WINDOW_DAYS}d'].to_numpy() - trailing[slots, j])
+        return enriched
+
+    def summary(self, enriched):
+        """Headline anomaly figures for the report."""
+        max_temp = enriched['Max Temp (°C)_anomaly']
+        rain_spell = enriched[f'Rainfall (mm)_{ANOMALY_WINDOW_DAYS}d_anomaly']
+        # Windows that start before the record does cover only a few days, so they are left out if possible
+        complete = enriched.index >= self.first_date + pd.Timedelta(days=ANOMALY_WINDOW_DAYS - 1)
+        if complete.any():
+            rain_spell = rain_spell[complete]
+        latest = enriched.iloc[-1]
+        return {'years': len(self.years), 'warmest_date': max_temp.idxmax(), 'warmest': max_temp.max(),
+                'coldest_date': max_temp.idxmin(), 'coldest': max_temp.min(),
+                'wettest_date': rain_spell.idxmax(), 'wettest': rain_spell.max(),
+                'driest_date': rain_spell.idxmin(), 'driest': rain_spell.min(),
+                'latest_date': enriched.index[-1],
+                'latest_temp': latest[f'Max Temp (°C)_{ANOMALY_WINDOW_DAYS}d_anomaly'],
+                'latest_rain': latest[f'Rainfall (mm)_{ANOMALY_WINDOW_DAYS}d_anomaly']}
+
+    def save(self, path):
+        tmp_path = path.with_name(path.name + '.tmp')
+        with tmp_path.open('wb') as f:
+            pickle.dump({'version': CLIMATOLOGY_STATE_VERSION, 'rolling_windows': ROLLING_WINDOWS,
+                         'state': self.__dict__}, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        """The saved engine, or a fresh one if there is none (or it was saved with other settings)."""
+        engine = cls()
+        try:
+            with path.open('rb') as f:
+                saved = pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError):
+            return engine
+        if saved.get('version') == CLIMATOLOGY_STATE_VERSION and saved.get('rolling_windows') == ROLLING_WINDOWS:
+            engine.__dict__.update(saved['state'])
+        return engine
+
+def climatology_analysis(df, output_dir=Path('.'), verbose=True, export_daily=True):
+    """Task 3b: folds df's new days into the saved climatology and exports baseline and enriched data.
+
+    export_daily=False skips the enriched daily CSV. Returns the summary
+    figures used by export_and_storytelling.
+    """
+    if df is None or df.empty: return None
+    if verbose:
+        print("\n--- Task 3b: Rolling Climatology and Anomalies ---")
+    state_path = output_dir / CLIMATOLOGY_STATE_FILE
+    engine = ClimatologyEngine.load(state_path)
+    new_days = engine.update(df)
+    engine.save(state_path)
+    enriched = engine.enrich(df)
+    engine.baseline_table().to_csv(output_dir / CLIMATOLOGY_FILE)
+    if export_daily:
+        enriched.to_csv(output_dir / CLIMATE_DAILY_FILE)
+    if verbose:
+        print(f"- {new_days} new day(s) added to a {len(engine.years)}-year baseline "
+              f"({engine.rows} days in total)")
+        print(f"- Baseline saved to {output_dir / CLIMATOLOGY_FILE}; cleaned data with rolling means "
+              f"and anomalies exported to {output_dir / CLIMATE_DAILY_FILE}")
+    return engine.summary(enriched)
+
+def _climate_section(climate):
+    """Report section for the climatology summary (empty when it did not run)."""
+    if climate is None:
+        return ""
+    caveat = (f" Only {climate['years']} year(s) of data are available, so treat these anomalies as provisional."
+              if climate['years'] < CLIMATOLOGY_MIN_YEARS else "")
+    day = lambda t: t.strftime('%d %B %Y')
+    return f"""
+## 5. Climatology and Anomalies
+Normals are day-of-year means across {climate['years']} year(s), smoothed over {CLIMATOLOGY_SMOOTH_DAYS} days.{caveat}
+- **Warmest day vs. normal:** {day(climate['warmest_date'])}, **{climate['warmest']:+.1f} °C** above the usual maximum for that date.
+- **Coolest day vs. normal:** {day(climate['coldest_date'])}, **{climate['coldest']:+.1f} °C** against the usual maximum.
+- **Wettest {ANOMALY_WINDOW_DAYS} days:** ending {day(climate['wettest_date'])}, **{climate['wettest']:+.2f} mm/day** vs. normal; driest ending {day(climate['driest_date'])} ({climate['driest']:+.2f} mm/day).
+- **Latest {ANOMALY_WINDOW_DAYS} days (to {day(climate['latest_date'])}):** Max Temp {climate['latest_temp']:+.1f} °C, Rainfall {climate['latest_rain']:+.2f} mm/day vs. normal.
+"""
+
+def decimate_minmax(n, columns, max_points):
+    """Row positions that keep the shape of dense series when plotted with about max_points points.
+
+    The n rows are split into max_points // 2 equal buckets and the rows
+    holding each bucket's minimum and maximum of every column are kept, so
+    peaks and troughs survive. Returns all positions when n is small enough.
+    """
+    if max_points is None or n <= max_points:
+        return np.arange(n)
+    buckets = max(1, max_points // 2)
+    bucket = np.arange(n) * buckets // n
+    bounds = np.searchsorted(bucket, np.arange(buckets + 1))
+    keep = []
+    for values in columns:
+        order = np.lexsort((values, bucket)) # By bucket, then by value within the bucket
+        keep += [order[bounds[:-1]], order[bounds[1:] - 1]]
+    return np.unique(np.concatenate(keep))
+
+def thin_evenly(n, max_points):
+    """About max_points evenly spaced row positions (all rows when n is small enough)."""
+    if max_points is None or n <= max_points:
+        return np.arange(n)
+    return np.unique(np.linspace(0, n - 1, max_points).astype(np.int64))
+
+class PlotRenderer:
+    """Task 4 plots drawn with matplotlib's object-oriented Agg API, reused across stations.
+
+    The three figures with their axes, titles, labels, legend and line and
+    scatter artists are built once, and render() only swaps in a station's
+    data, so no pyplot global state is involved and a worker rendering many
+    stations does the figure setup a single time. One renderer per process
+    (it is not thread-safe).
+    """
+    def __init__(self):
+        # 1. Line chart for daily temperature trends
+        self.trend = Figure(figsize=(10, 6))
+        FigureCanvasAgg(self.trend)
+        ax = self.trend.add_subplot()
+        self._max_line, = ax.plot([], [], label='Max Temp', color='#FF5733', linewidth=2, alpha=0.8)
+        self._min_line, = ax.plot([], [], label='Min Temp', color='#3375FF', linewidth=2, linestyle='--')
+        ax.xaxis_date()
+        ax.set_title('Daily Temperature Trend (Max and Min)', fontsize=14, fontweight='bold')
+        ax.set_xlabel('Date', fontsize=12)
+        ax.set_ylabel('Temperature (°C)', fontsize=12)
+        ax.grid(axis='y', linestyle=':', alpha=0.6)
+        ax.legend(frameon=True, shadow=True)
+        ax.tick_params(axis='x', labelrotation=45)
+        self._trend_ax = ax
+
+        # 2. Bar chart for monthly rainfall totals: all bars are one collection (one artist, not one per month)
+        self.rainfall = Figure(figsize=(8, 5))
+        FigureCanvasAgg(self.rainfall)
+        ax = self.rainfall.add_subplot()
+        self._bars = ax.add_collection(PolyCollection([], facecolors='#00A8E8', edgecolors='black', alpha=0.9))
+        ax.set_title('Monthly Rainfall Totals', fontsize=14, fontweight='bold')
+        ax.set_xlabel('Month', fontsize=12)
+        ax.set_ylabel('Total Rainfall (mm)', fontsize=12)
+        ax.tick_params(axis='x', labelrotation=45)
+        self._rain_ax = ax
+
+        # 3. Combined scatter plot: Max and Min Temp vs Humidity
+        self.scatter = Figure(figsize=(15, 6))
+        FigureCanvasAgg(self.scatter)
+        self._scatter_axes = self.scatter.subplots(1, 2)
+        self._points = []
+        for ax, label, color in zip(self._scatter_axes, ('Max', 'Min'), ('#8D4585', '#FFA500')):
+            self._points.append(ax.scatter([], [], color=color, alpha=0.7, edgecolors='gray', linewidths=0.5))
+            ax.set_title(f'Humidity vs. {label} Temperature')
+            ax.set_xlabel(f'{label} Temperature (°C)')
+            ax.set_ylabel('Humidity (%)')
+            ax.grid(True, linestyle='--')
+        self.scatter.suptitle('Combined Weather Visualizations (Temperature-Humidity Relationship)',
+                              fontsize=16, fontweight='bold')
+
+    def _draw_trend(self, df, max_points):
+        rows = decimate_minmax(len(df), [df[c].to_numpy() for c in ANOMALY_COLUMNS[:2]], max_points)
+        x = mdates.date2num(df.index[rows])
+        self._max_line.set_data(x, df['Max Temp (°C)'].to_numpy()[rows])
+        self._min_line.set_data(x, df['Min Temp (°C)'].to_numpy()[rows])
+        self._trend_ax.relim()
+        self._trend_ax.autoscale_view()
+        self.trend.tight_layout()
+        return self.trend
+
+    def _draw_rainfall(self, df, max_points):
+        # FIX: We must calculate monthly rainfall using resample(..) here, as the 'df' passed is the daily data.
+        monthly_rainfall = df['Rainfall (mm)'].resample('ME').sum()
+        labels = monthly_rainfall.index.strftime('%Y-%m') # Format month for readability
+        totals = monthly_rainfall.to_numpy()
+        positions = np.arange(len(totals))
+        # Bars of width 0.8 centred on each month, as plt.bar draws them
+        left, right = positions - 0.4, positions + 0.4
+        bottom = np.zeros_like(totals)
+        self._bars.set_verts(np.stack([np.column_stack(corner) for corner in
+                                       ((left, bottom), (left, totals), (right, totals), (right, bottom))], axis=1))
+        step = -(-len(positions) // PLOT_MAX_MONTH_LABELS) # Ceiling division
+        self._rain_ax.set_xticks(positions[::step], labels[::step])
+        span = len(positions) - 0.2 # From the first bar's left edge to the last one's right edge
+        self._rain_ax.set_xlim(-0.4 - 0.05 * span, len(positions) - 0.6 + 0.05 * span)
+        self._rain_ax.set_ylim(0, 1.05 * totals.max() if len(totals) and totals.max() > 0 else 1)
+        self.rainfall.tight_layout()
+        return self.rainfall
+
+    def _draw_scatter(self, df, max_points):
+        rows = thin_evenly(len(df), max_points)
+        humidity = df['Humidity (%)'].to_numpy()[rows]
+        for ax, points, column in zip(self._scatter_axes, self._points, ANOMALY_COLUMNS[:2]):
+            offsets = np.column_stack([df[column].to_numpy()[rows], humidity])
+            points.set_offsets(offsets)
+            ax.ignore_existing_data_limits = True # Scatter points are not covered by relim()
+            ax.update_datalim(offsets)
+            ax.autoscale_view()
+        self.scatter.tight_layout(rect=[0, 0.03, 1, 0.95]) # Adjust layout to make room for suptitle
+        return self.scatter
+
+    def render(self, df, output_dir=OUTPUT_DIR, max_points=PLOT_MAX_POINTS):
+        """Saves the three plots of df to output_dir; returns {file name: render seconds}.
+
+        With max_points the daily temperature lines are min/max decimated and
+        the scatter plots evenly thinned to about that many points.
+        """
+        output_dir = Path(output_dir)
+        output_dir.mkdir(parents=True, exist_ok=True)
+        timings = {}
+        for name, draw in zip(PLOT_FILES, (self._draw_trend, self._draw_rainfall, self._draw_scatter)):
+            started = time.perf_counter()
+            draw(df, max_points).savefig(output_dir / name, pil_kwargs={'compress_level': PNG_COMPRESS_LEVEL})
+            timings[name] = time.perf_counter() - started
+        return timings
+
+_RENDERER = None
+
+def plot_renderer():
+    """This process's PlotRenderer, built on first use (batch workers keep theirs between stations)."""
+    global _RENDERER
+    if _RENDERER is None:
+        _RENDERER = PlotRenderer()
+    return _RENDERER
+
+def visualization(df, output_dir=OUTPUT_DIR, max_points=PLOT_MAX_POINTS, verbose=True):
+    """Task 4: Create informative plots using Matplotlib. Returns {file name: render seconds}."""
     if df is None: return
-    print("\n--- Task 4: Generating Visualizations (Plots saved to 'plots' directory) ---")
+    if verbose:
+        print(f"\n--- Task 4: Generating Visualizations (Plots saved to '{output_dir}' directory) ---")
+    timings = plot_renderer().render(df, output_dir, max_points)
+    if verbose:
+        for name, seconds in timings.items():
+            note = " (Contains two plots in one figure)" if name == PLOT_FILES[2] else ""
+            print(f"- Saved: {name}{note} in {seconds:.2f} s")
+    return timings
 
-    OUTPUT_DIR.mkdir(exist_ok=True)
-    
-    # 1. Line chart for daily temperature trends
-    plt.figure(figsize=(10, 6))
-    plt.plot(df.index, df['Max Temp (°C)'], label='Max Temp', color='#FF5733', linewidth=2, alpha=0.8)
-    plt.plot(df.index, df['Min Temp (°C)'], label='Min Temp', color='#3375FF', linewidth=2, linestyle='--')
-    plt.title('Daily Temperature Trend (Max and Min)', fontsize=14, fontweight='bold')
-    plt.xlabel('Date', fontsize=12)
-    plt.ylabel('Temperature (°C)', fontsize=12)
-    plt.grid(axis='y', linestyle=':', alpha=0.6)
-    plt.legend(frameon=True, shadow=True)
-    plt.xticks(rotation=45)
-    plt.tight_layout()
-    plt.savefig(OUTPUT_DIR / 'temp_trend_line.png')
-    plt.close()
-    print("- Saved: temp_trend_line.png")
-
-    # 2. Bar chart for monthly rainfall totals (Task 5: Grouping/Aggregation)
-    # FIX: We must calculate monthly rainfall using resample(..) here, as the 'df' passed is the daily data.
-    monthly_rainfall = df['Rainfall (mm)'].resample('ME').sum()
-    monthly_rainfall.index = monthly_rainfall.index.strftime('%Y-%m') # Format month for readability
-    plt.figure(figsize=(8, 5))
-    plt.bar(monthly_rainfall.index, monthly_rainfall.values, color='#00A8E8', edgecolor='black', alpha=0.9)
-    plt.title('Monthly Rainfall Totals', fontsize=14, fontweight='bold')
-    plt.xlabel('Month', fontsize=12)
-    plt.ylabel('Total Rainfall (mm)', fontsize=12)
-    plt.xticks(rotation=45)
-    plt.tight_layout()
-    plt.savefig(OUTPUT_DIR / 'monthly_rainfall_bar.png')
-    plt.close()
-    print("- Saved: monthly_rainfall_bar.png")
-
-    # 3. Combined Scatter Plot (Bonus/Task 4 Advanced Plotting)
-    fig, axes = plt.subplots(1, 2, figsize=(15, 6))
-    
-    # Scatter Plot 1: Max Temp vs Humidity
-    axes[0].scatter(df['Max Temp (°C)'], df['Humidity (%)'], color='#8D4585', alpha=0.7, edgecolors='gray', linewidths=0.5)
-    axes[0].set_title('Humidity vs. Max Temperature')
-    axes[0].set_xlabel('Max Temperature (°C)')
-    axes[0].set_ylabel('Humidity (%)')
-    axes[0].grid(True, linestyle='--')
-    
-    # Scatter Plot 2: Min Temp vs Humidity
-    axes[1].scatter(df['Min Temp (°C)'], df['Humidity (%)'], color='#FFA500', alpha=0.7, edgecolors='gray', linewidths=0.5)
-    axes[1].set_title('Humidity vs. Min Temperature')
-    axes[1].set_xlabel('Min Temperature (°C)')
-    axes[1].set_ylabel('Humidity (%)')
-    axes[1].grid(True, linestyle='--')
-
-    plt.suptitle('Combined Weather Visualizations (Temperature-Humidity Relationship)', fontsize=16, fontweight='bold')
-    plt.tight_layout(rect=[0, 0.03, 1, 0.95]) # Adjust layout to make room for suptitle
-    plt.savefig(OUTPUT_DIR / 'combined_scatter_plots.png')
-    plt.close()
-    print("- Saved: combined_scatter_plots.png (Contains two plots in one figure)")
-
-
-def export_and_storytelling(df, daily_stats, monthly_stats):
-    """Task 6: Export cleaned data and create a summary."""
+def export_and_storytelling(df, daily_stats, monthly_stats, output_dir=Path('.'), verbose=True, climate=None):
+    """Task 6: Export cleaned data and create a summary (with climatology figures when given)."""
     if df is None: return
-    print("\n--- Task 6: Exporting Data and Generating Summary Report ---")
+    if verbose:
+        print("\n--- Task 6: Exporting Data and Generating Summary Report ---")
     
     # Export cleaned data
-    df.to_csv(CLEANED_FILE)
-    print(f"- Cleaned data exported to {CLEANED_FILE}")
+    df.to_csv(output_dir / CLEANED_FILE)
+    if verbose:
+        print(f"- Cleaned data exported to {output_dir / CLEANED_FILE}")
     
     # Find peak rainfall month for the summary (using the flattened column names)
     peak_rainfall_sum = monthly_stats['Rainfall (mm)_sum'].max()
@@ -162,7 +554,7 @@ def export_and_storytelling(df, daily_stats, monthly_stats):
     max_temp_overall = daily_stats.loc['Max Temp (°C)', 'max']
     
     # Generate Summary Report (Markdown/Text)
-    report_path = Path('weather_summary.md')
+    report_path = output_dir / SUMMARY_FILE
     
     summary_text = f"""# Weather Data Analysis Report
 
@@ -183,7 +575,7 @@ This report analyzes local weather data from {df.index.min().strftime('%B %Y')}
 
 ## 4. Aggregation Highlight
 - **Peak Rainfall Month:** {peak_rainfall_month} showed the highest total rainfall of **{peak_rainfall_sum:.2f} mm**.
-"""
+{_climate_section(climate)}"""
     
     try:
         with report_path.open('w', encoding='utf-8') as f:
@@ -192,33 +584,405 @@ This report analyzes local weather data from {df.index.min().strftime('%B %Y')}
         print(f"Error writing summary report: {e}")
         return
 
-    print(f"- Summary report saved to {report_path}")
+    if verbose:
+        print(f"- Summary report saved to {report_path}")
 
 
-def main():
-    """Main execution function to run all analysis tasks."""
-    df_raw = data_acquisition_and_loading(DATA_FILE)
-    
-    if df_raw is None:
-        print("\nProject terminated due to failure in data acquisition.")
+# --- Content-Addressed Stage Cache ---
+
+CACHE_STAGES = ('cleaning', 'statistics', 'climatology', 'plots', 'report', 'station')
+_MISS = object()
+
+def file_digest(filepath):
+    """SHA-256 of a file's bytes (read in 1 MB blocks)."""
+    digest = hashlib.sha256()
+    with open(filepath, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+def pipeline_config():
+    """Everything besides the input that a cached stage result depends on.
+
+    Every setting that changes what a stage produces belongs here (a new
+    one is added along with the stage that reads it); code changes bump
+    CACHE_VERSION instead.
+    """
+    return {'cache_version': CACHE_VERSION,
+            # Cleaning
+            'date_format': DATE_FORMAT,
+            # Climatology
+            'rolling_windows': ROLLING_WINDOWS, 'anomaly_window_days': ANOMALY_WINDOW_DAYS,
+            'climatology_smooth_days': CLIMATOLOGY_SMOOTH_DAYS, 'climatology_min_years': CLIMATOLOGY_MIN_YEARS,
+            'climate_columns': CLIMATE_COLUMNS, 'anomaly_columns': ANOMALY_COLUMNS,
+            'climatology_file': CLIMATOLOGY_FILE, 'climate_daily_file': CLIMATE_DAILY_FILE,
+            # Plots (max_points is part of the plot stages' input key)
+            'plot_files': PLOT_FILES, 'plot_max_month_labels': PLOT_MAX_MONTH_LABELS,
+            'png_compress_level': PNG_COMPRESS_LEVEL,
+            # Report
+            'cleaned_file': CLEANED_FILE, 'summary_file': SUMMARY_FILE,
+            'pandas': pd.__version__, 'numpy': np.__version__, 'matplotlib': matplotlib.__version__}
+
+class StageCache:
+    """Size-bounded on-disk cache of stage results, addressed by content.
+
+    An entry's key is the SHA-256 of the stage name, the input file's content
+    hash and pipeline_config(), so a changed input or setting never reuses an
+    old result. Entries are pickles written atomically (batch workers share the
+    folder). A hit refreshes the entry's mtime, and once the folder grows past
+    max_mb the least recently used entries are evicted. Every lookup is
+    recorded in self.events as (stage, 'HIT' or 'MISS').
+    """
+    def __init__(self, cache_dir=CACHE_DIR, max_mb=CACHE_MAX_MB):
+        self.cache_dir = Path(cache_dir)
+        self.max_bytes = max_mb * 2**20
+        self.events = []
+        self._size = None # Bytes in the folder, scanned on the first write
+        self._config = json.dumps(pipeline_config(), sort_keys=True)
+
+    def key(self, stage, input_hash):
+        return hashlib.sha256(f"{stage}|{input_hash}|{self._config}".encode('utf-8')).hexdigest()
+
+    def _path(self, stage, key):
+        return self.cache_dir / f'{stage}-{key}.pkl'
+
+    def get(self, stage, key):
+        path = self._path(stage, key)
+        try:
+            with path.open('rb') as f:
+                value = pickle.load(f)
+            os.utime(path) # Most recently used
+        except (OSError, pickle.UnpicklingError, EOFError): # Missing, evicted meanwhile or truncated
+            self.events.append((stage, 'MISS'))
+            return _MISS
+        self.events.append((stage, 'HIT'))
+        return value
+
+    def put(self, stage, key, value):
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        path = self._path(stage, key)
+        tmp_path = path.with_name(f'{path.name}.{os.getpid()}.tmp')
+        with tmp_path.open('wb') as f:
+            pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+        try:
+            replaced_size = path.stat().st_size # Overwriting an entry (e.g. after a racing worker) frees its bytes
+        except FileNotFoundError:
+            replaced_size = 0
+        os.replace(tmp_path, path)
+        if self._size is None:
+            self._size = sum(entry.stat().st_size for entry in self.cache_dir.glob('*.pkl'))
+        else:
+            self._size += path.stat().st_size - replaced_size
+        if self._size > self.max_bytes:
+            self.evict()
+
+    def evict(self):
+        """Removes least recently used entries until the folder is below 90% of max_mb."""
+        entries = []
+        for entry in self.cache_dir.glob('*.pkl'):
+            try:
+                stat = entry.stat()
+            except FileNotFoundError: # Evicted by another worker
+                continue
+            entries.append((stat.st_mtime, stat.st_size, entry))
+        self._size = sum(size for _, size, _ in entries)
+        for _, size, entry in sorted(entries, key=lambda e: e[0]):
+            if self._size <= 0.9 * self.max_bytes:
+                break
+            entry.unlink(missing_ok=True)
+            self._size -= size
+
+    def clear(self):
+        for entry in self.cache_dir.glob('*.pkl'):
+            entry.unlink(missing_ok=True)
+        self._size = 0
+
+    def report(self, events=None):
+        """One line per run, e.g. 'cleaning=- statistics=HIT plots=MISS'; counts when a stage ran several times."""
+        events = self.events if events is None else events
+        parts = []
+        for stage in CACHE_STAGES:
+            results = [result for name, result in events if name == stage]
+            if not results:
+                continue
+            if len(results) == 1:
+                parts.append(f"{stage}={results[0]}")
+            else:
+                parts.append(f"{stage}={results.count('HIT')} hits/{results.count('MISS')} misses")
+        return f"Stage cache ({self.cache_dir}): " + (' '.join(parts) if parts else 'no lookups')
+
+def run_stage(cache, stage, input_hash, compute):
+    """compute() through the cache; runs it directly when caching is off. None results are not stored."""
+    if cache is None or input_hash is None:
+        return compute()
+    key = cache.key(stage, input_hash)
+    value = cache.get(stage, key)
+    if value is _MISS:
+        value = compute()
+        if value is not None:
+            cache.put(stage, key, value)
+    return value
+
+def read_outputs(folder, names):
+    """{file name: bytes} of stage output files, as stored in the cache."""
+    return {name: (folder / name).read_bytes() for name in names}
+
+def restore_outputs(folder, files):
+    folder.mkdir(parents=True, exist_ok=True)
+    for name, data in files.items():
+        (folder / name).write_bytes(data)
+
+def main(data_file=DATA_FILE, cache=None, max_points=PLOT_MAX_POINTS):
+    """Main execution function to run all analysis tasks.
+
+    With a StageCache, every stage whose input file and configuration are
+    unchanged is served from the cache; the CSV is only read and cleaned when
+    a later stage needs the cleaned frame. max_points decimates the plotted
+    daily series (see PlotRenderer.render).
+    """
+    input_hash = None
+    if cache is not None:
+        try:
+            input_hash = file_digest(data_file)
+        except OSError:
+            cache = None # Let data acquisition report the missing file
+
+    def acquire_and_clean():
+        df_cleaned = load_and_clean(data_file, verbose=True)
+        if df_cleaned is None:
+            print("\nProject terminated due to failure in data acquisition.")
+            return None
+        if df_cleaned.empty:
+            print("\nProject terminated due to data cleaning errors.")
+            return None
+        return df_cleaned
+
+    @functools.cache
+    def cleaned():
+        return run_stage(cache, 'cleaning', input_hash, acquire_and_clean)
+
+    def stage_outputs(folder, names, produce):
+        """Runs produce(df) and returns its output files, or None when there is no cleaned data."""
+        df_cleaned = cleaned()
+        if df_cleaned is None:
+            return None
+        produce(df_cleaned)
+        return read_outputs(folder, names)
+
+    # Calculate statistics
+    # daily_stats and monthly_stats are created here
+    stats = run_stage(cache, 'statistics', input_hash, lambda: statistical_analysis(cleaned()))
+    if stats is None:
         return
+    daily_stats, monthly_stats = stats
 
-    df_cleaned = data_cleaning_and_processing(df_raw)
-    
-    if df_cleaned is not None:
-        # Calculate statistics
-        # daily_stats and monthly_stats are created here
-        daily_stats, monthly_stats = statistical_analysis(df_cleaned)
-        
-        # Generate visualizations (now correctly calculates monthly rainfall inside)
-        visualization(df_cleaned)
-        
-        # Export data and generate the report
-        export_and_storytelling(df_cleaned, daily_stats, monthly_stats)
+    # Rolling means, day-of-year normals and anomalies (incremental over the saved state)
+    def climatology():
+        summary = climatology_analysis(cleaned())
+        return {'summary': summary, 'files': read_outputs(Path('.'), (CLIMATOLOGY_FILE, CLIMATE_DAILY_FILE))}
+    climate = run_stage(cache, 'climatology', input_hash, climatology)
+
+    # Generate visualizations (now correctly calculates monthly rainfall inside)
+    plots = run_stage(cache, 'plots', input_hash and f"{input_hash}|max_points={max_points}", lambda: stage_outputs(
+        OUTPUT_DIR, PLOT_FILES, lambda df: visualization(df, OUTPUT_DIR, max_points)))
+
+    # Export data and generate the report
+    report = run_stage(cache, 'report', input_hash, lambda: stage_outputs(
+        Path('.'), (CLEANED_FILE, SUMMARY_FILE),
+        lambda df: export_and_storytelling(df, daily_stats, monthly_stats, climate=climate['summary'])))
+    if plots is None or report is None:
+        return
+    if cache is not None:
+        # Hits only exist in the cache, so their files are written back to the usual places
+        restore_outputs(OUTPUT_DIR, plots)
+        restore_outputs(Path('.'), climate['files'])
+        restore_outputs(Path('.'), report)
+        print("\n" + cache.report())
         
-        print("\nWeather Data Visualization project completed successfully.")
+    print("\nWeather Data Visualization project completed successfully.")
+
+# --- Batch Mode: Many Stations in a Process Pool ---
+
+def discover_station_files(source):
+    """Station CSVs from a directory (every *.csv in it) or a glob pattern, sorted by name."""
+    path = Path(source)
+    if path.is_dir():
+        return sorted(path.glob('*.csv'))
+    return sorted(Path(p) for p in glob.glob(str(source), recursive=True))
+
+def station_years(df):
+    """Length of a station's cleaned record in years (first to last day, inclusive)."""
+    return ((df.index.max() - df.index.min()).days + 1) / 365.25
+
+STATION_FILES = ('daily_stats.csv', 'monthly_stats.csv', CLEANED_FILE, SUMMARY_FILE, CLIMATOLOGY_FILE)
+
+def _station_outputs(filepath, station_dir, climate_daily=BATCH_CLIMATE_DAILY, plots=BATCH_PLOTS,
+                     max_points=PLOT_MAX_POINTS, render_times=None):
+    """Cleaning, statistics and the per-station files; returns what the parent and the cache keep.
+
+    Plot render times are added to the render_times dict, which stays empty
+    when the station is served from the cache.
+    """
+    df = load_and_clean(filepath)
+    if df is None or df.empty:
+        return None
+    daily_stats, monthly_stats = statistical_analysis(df, verbose=False)
+    station_dir.mkdir(parents=True, exist_ok=True)
+    daily_stats.to_csv(station_dir / 'daily_stats.csv')
+    monthly_stats.to_csv(station_dir / 'monthly_stats.csv')
+    climate = climatology_analysis(df, station_dir, verbose=False, export_daily=climate_daily)
+    export_and_storytelling(df, daily_stats, monthly_stats, station_dir, verbose=False, climate=climate)
+    if plots:
+        timings = visualization(df, station_dir / OUTPUT_DIR, max_points, verbose=False)
+        if render_times is not None:
+            render_times.update(timings)
+    # Months without readings are dropped so they do not count as 0 mm of rain in the combined tables
+    return {'rows': len(df), 'station_years': station_years(df),
+            'monthly_stats': monthly_stats.dropna(subset=['Max Temp (°C)_mean']),
+            'files': read_outputs(station_dir, STATION_FILES + ((CLIMATE_DAILY_FILE,) if climate_daily else ())),
+            'plots': read_outputs(station_dir / OUTPUT_DIR, PLOT_FILES) if plots else {}}
+
+def process_station(filepath, output_dir=BATCH_OUTPUT_DIR, cache_dir=None, cache_max_mb=CACHE_MAX_MB,
+                    climate_daily=BATCH_CLIMATE_DAILY, plots=BATCH_PLOTS, max_points=PLOT_MAX_POINTS):
+    """Worker: cleaning, statistics and per-station outputs for one station file.
+
+    Writes daily_stats.csv, monthly_stats.csv, the cleaned CSV, the climatology
+    baseline (plus the enriched daily CSV with climate_daily), the summary
+    report and, with plots, the three plots (in plots/, drawn by this process's
+    PlotRenderer) to output_dir/<station>/ and returns only small results (the
+    monthly table, counts and plot render times) to the parent process. With a
+    cache_dir an unchanged station file is served from a single 'station'
+    cache entry holding all of these (its files and monthly table), so nothing
+    is read, recomputed or rendered.
+    """
+    station = Path(filepath).stem
+    result = {'station': station, 'rows': 0, 'station_years': 0.0, 'monthly_stats': None, 'error': None,
+              'cache_events': [], 'render_s': {}}
+    cache = StageCache(cache_dir, cache_max_mb) if cache_dir is not None else None
+    station_dir = output_dir / station
+    try:
+        # The optional outputs change the entry's contents, so they are part of the key
+        input_hash = (f"{file_digest(filepath)}|climate_daily={climate_daily}|plots={plots}|max_points={max_points}"
+                      if cache is not None else None)
+        outputs = run_stage(cache, 'station', input_hash, lambda: _station_outputs(
+            filepath, station_dir, climate_daily, plots, max_points, result['render_s']))
+        if outputs is None:
+            result['error'] = 'no valid rows'
+        elif cache is not None:
+            restore_outputs(station_dir, outputs['files'])
+            if outputs['plots']:
+                restore_outputs(station_dir / OUTPUT_DIR, outputs['plots'])
+    except Exception as e: # One bad station must not stop the batch
+        result['error'] = str(e)
+    if cache is not None:
+        result['cache_events'] = cache.events
+    if result['error'] is None:
+        result.update({k: outputs[k] for k in ('rows', 'station_years', 'monthly_stats')})
+    return result
+
+def cross_station_monthly(combined):
+    """Per-month figures across all stations from the combined Station x Month table."""
+    return combined.groupby(level='Month').agg(
+        Stations=('Max Temp (°C)_mean', 'size'),
+        **{'Max Temp (°C)_mean': ('Max Temp (°C)_mean', 'mean'),
+           'Max Temp (°C)_min': ('Max Temp (°C)_min', 'min'),
+           'Max Temp (°C)_max': ('Max Temp (°C)_max', 'max'),
+           'Rainfall (mm)_station_mean': ('Rainfall (mm)_sum', 'mean'),
+           'Rainfall (mm)_station_max': ('Rainfall (mm)_sum', 'max'),
+           'Humidity (%)_mean': ('Humidity (%)_mean', 'mean')})
+
+def render_report(results):
+    """Lines with the total, mean and maximum render time of each plot over the freshly rendered stations."""
+    rendered = [r['render_s'] for r in results if r['render_s']]
+    if not rendered:
+        return []
+    times = {name: np.array([r[name] for r in rendered]) for name in PLOT_FILES}
+    overall = sum(t.sum() for t in times.values())
+    slowest = max(times, key=lambda name: times[name].sum())
+    lines = [f"- Plot render time over {len(rendered)} stations ({overall:.2f} s in the workers):"]
+    for name, t in times.items():
+        lines.append(f"  {name:<28} {t.sum():7.2f} s total, {t.mean():.3f} s mean, {t.max():.3f} s max "
+                     f"({t.sum() / overall:.0%}){'  <- slowest' if name == slowest else ''}")
+    return lines
+
+def run_batch(source, output_dir=BATCH_OUTPUT_DIR, workers=BATCH_WORKERS, cache_dir=None,
+              cache_max_mb=CACHE_MAX_MB, climate_daily=BATCH_CLIMATE_DAILY, plots=BATCH_PLOTS,
+              max_points=PLOT_MAX_POINTS):
+    """Batch mode: cleans, analyses and plots every station file in a process pool.
+
+    Besides the per-station folders, writes the combined Station x Month table
+    and the cross-station monthly table, and reports throughput in
+    station-years per second and the render time of each plot. Each worker
+    process keeps one PlotRenderer for all the stations it handles.
+    """
+    files = discover_station_files(source)
+    if not files:
+        print(f"Error: No station CSV files found for '{source}'.")
+        return None
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    workers = max(1, min(workers, len(files)))
+    print(f"--- Batch Mode: {len(files)} station files, {workers} worker process(es) ---")
+
+    started = time.perf_counter()
+    job = partial(process_station, output_dir=output_dir, cache_dir=cache_dir, cache_max_mb=cache_max_mb,
+                  climate_daily=climate_daily, plots=plots, max_points=max_points)
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            # Several stations per task keep the inter-process overhead small for short files
+            results = list(pool.map(job, files, chunksize=max(1, len(files) // (workers * 4))))
+    else:
+        results = [job(f) for f in files]
+
+    done = [r for r in results if r['error'] is None]
+    for r in results:
+        if r['error'] is not None:
+            print(f"- Skipped {r['station']}: {r['error']}")
+    if done:
+        combined = pd.concat({r['station']: r['monthly_stats'] for r in done}, names=['Station', 'Month'])
+        combined.to_csv(output_dir / COMBINED_MONTHLY_FILE)
+        cross_station_monthly(combined).to_csv(output_dir / CROSS_STATION_FILE)
+        print(f"- Combined monthly tables saved to {output_dir / COMBINED_MONTHLY_FILE} and {CROSS_STATION_FILE}")
     else:
-        print("\nProject terminated due to data cleaning errors.")
+        combined = None
+    elapsed = time.perf_counter() - started
+
+    years = sum(r['station_years'] for r in done)
+    rows = sum(r['rows'] for r in done)
+    print(f"- {len(done)} stations, {rows:,} daily rows, {years:,.1f} station-years in {elapsed:.2f} s "
+          f"({years / elapsed:,.1f} station-years/s)")
+    for line in render_report(results):
+        print(line)
+    if cache_dir is not None:
+        print("- " + StageCache(cache_dir).report([e for r in results for e in r['cache_events']]))
+    return combined
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Weather Data Visualizer")
+    parser.add_argument('--data-file', default=DATA_FILE, help="station CSV for the single-file report")
+    parser.add_argument('--batch', metavar='DIR_OR_GLOB',
+                        help="process every station CSV in a folder (or matching a glob) instead")
+    parser.add_argument('--output-dir', default=str(BATCH_OUTPUT_DIR), help="batch mode output folder")
+    parser.add_argument('--workers', type=int, default=BATCH_WORKERS, help="batch mode worker processes")
+    parser.add_argument('--climate-daily', action='store_true',
+                        help="batch mode: also write each station's daily CSV with rolling means and anomalies")
+    parser.add_argument('--no-plots', action='store_true', help="batch mode: skip the per-station plots")
+    parser.add_argument('--max-points', type=int, default=PLOT_MAX_POINTS,
+                        help="decimate the plotted daily series to about this many points")
+    parser.add_argument('--no-cache', action='store_true', help="recompute every stage, bypassing the stage cache")
+    parser.add_argument('--clear-cache', action='store_true', help="empty the stage cache before running")
+    parser.add_argument('--cache-dir', default=str(CACHE_DIR))
+    parser.add_argument('--cache-max-mb', type=float, default=CACHE_MAX_MB,
+                        help="evict least recently used cache entries beyond this size")
+    return parser
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    args = build_parser().parse_args()
+    cache = None if args.no_cache else StageCache(args.cache_dir, args.cache_max_mb)
+    if args.clear_cache:
+        StageCache(args.cache_dir).clear()
+    if args.batch:
+        run_batch(args.batch, args.output_dir, args.workers, None if args.no_cache else args.cache_dir,
+                  args.cache_max_mb, args.climate_daily, not args.no_plots, args.max_points)
+    else:
+        main(args.data_file, cache, args.max_points)
\ No newline at end of file
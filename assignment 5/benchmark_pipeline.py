@@ -0,0 +1,310 @@
+# Name: Bhoomi Raghav
+# Roll number: 2501730254
+# Course Code: ETCCPP102
+# Capstone Assignment: Campus Energy-Use Dashboard (synthetic benchmark suite)
+# Date: 2026-10-18
+
+import argparse
+import json
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+import energyusedashboardpipeline as pipeline
+
+# --- Configuration ---
+DEFAULT_SCALES = (10, 100, 1000) # Building counts
+DEFAULT_DAYS = 365
+DEFAULT_FREQ = 'h'
+DEFAULT_CORRUPTION = 0.001
+# The synthetic meters contain no anomalies, so every flagged hour is a false positive;
+# Gaussian noise alone exceeds ANOMALY_THRESHOLD = 3.5 in about 0.05% of the hours
+ANOMALY_CLEAN_MAX_RATE = 0.002
+# Cold-start timing: commands run in fresh interpreters against a small campus
+COLD_START_COMMANDS = (('import',), ('query',), ('summarize', '--no-csv'), ('ingest',), ('plot',))
+COLD_START_REPEAT = 5
+SEED = 42
+
+# --- Synthetic Data Generator ---
+
+def generate_building_csv(file_path, start, periods, freq, corruption_rate, rng):
+    """Writes one meter CSV with a daily/weekly load shape, noise and injected corruption.
+
+    A corruption_rate fraction of the rows is damaged, spread evenly over four
+    kinds of faults: an extra field (malformed line), an unparseable timestamp,
+    a non-numeric reading and a missing reading.
+    """
+    timestamps = pd.date_range(start, periods=periods, freq=freq)
+    hour = timestamps.hour.to_numpy()
+    weekday = timestamps.dayofweek.to_numpy()
+    base = rng.uniform(5, 50)
+    daily_shape = 1 + 0.6 * np.clip(np.sin((hour - 6) / 24 * 2 * np.pi), 0, None)
+    weekly_shape = np.where(weekday < 5, 1.0, 0.55)
+    usage = base * daily_shape * weekly_shape * rng.normal(1, 0.08, periods)
+    usage = np.round(np.clip(usage, 0, None), 3)
+
+    ts_text = timestamps.strftime(pipeline.TIMESTAMP_FORMAT).to_numpy(dtype=object)
+    usage_text = usage.astype(str).astype(object)
+    n_bad = int(round(periods * corruption_rate))
+    if n_bad:
+        bad_rows = rng.choice(periods, size=n_bad, replace=False)
+        kinds = np.arange(n_bad) % 4
+        usage_text[bad_rows[kinds == 0]] += ',extra'
+        ts_text[bad_rows[kinds == 1]] = 'not-a-date'
+        usage_text[bad_rows[kinds == 2]] = 'n/a'
+        usage_text[bad_rows[kinds == 3]] = ''
+
+    lines = ts_text + ',' + usage_text
+    with file_path.open('w', encoding='utf-8') as f:
+        f.write('Timestamp,Usage_kwh\n')
+        f.write('\n'.join(lines))
+        f.write('\n')
+
+def generate_dataset(data_dir, buildings, days=DEFAULT_DAYS, freq=DEFAULT_FREQ,
+                     corruption_rate=DEFAULT_CORRUPTION, seed=SEED, start='2024-01-01'):
+    """Generates (or reuses) a deterministic campus dataset and returns the number of rows written.
+
+    The same parameters always produce byte-identical files; a params.json next
+    to the CSVs lets an existing dataset be reused across benchmark runs.
+    """
+    params = {'buildings': buildings, 'days': days, 'freq': freq,
+              'corruption_rate': corruption_rate, 'seed': seed, 'start': start}
+    periods = int(pd.Timedelta(days=days) / pd.Timedelta(pd.tseries.frequencies.to_offset(freq)))
+    params_path = data_dir / 'params.json'
+    if params_path.exists() and json.loads(params_path.read_text()) == params:
+        return buildings * periods
+    if data_dir.exists():
+        shutil.rmtree(data_dir)
+    data_dir.mkdir(parents=True)
+    for i in range(buildings):
+        rng = np.random.default_rng([seed, i])
+        generate_building_csv(data_dir / f'Building_{i:04d}.csv', start, periods, freq, corruption_rate, rng)
+    params_path.write_text(json.dumps(params))
+    return buildings * periods
+
+# --- Benchmark Runner ---
+
+def _measure(stages, name, func, rows, profile_memory):
+    """Runs func once, records wall/CPU time, rows/sec and peak traced memory, returns its result."""
+    if profile_memory:
+        tracemalloc.start()
+    wall, cpu = time.perf_counter(), time.process_time()
+    result = func()
+    wall, cpu = time.perf_counter() - wall, time.process_time() - cpu
+    peak_mb = None
+    if profile_memory:
+        peak_mb = tracemalloc.get_traced_memory()[1] / 2**20
+        tracemalloc.stop()
+    stages[name] = {'wall_s': round(wall, 4), 'cpu_s': round(cpu, 4), 'rows': rows,
+                    'rows_per_s': round(rows / wall) if wall > 0 else None,
+                    'peak_mem_mb': round(peak_mb, 2) if peak_mb is not None else None}
+    print(f"  {name:<34} {wall:8.3f} s  {peak_mb if peak_mb is not None else float('nan'):9.1f} MB")
+    return result
+
+def run_benchmark(buildings, days, freq, corruption_rate, work_dir, include_plots=True,
+                  profile_memory=True, workers=1):
+    """Times and memory-profiles every pipeline stage on one synthetic dataset."""
+    data_dir = work_dir / f'data_{buildings}b_{days}d_{freq}'
+    print(f"\nScale: {buildings} buildings x {days} days @ {freq}")
+    rows = generate_dataset(data_dir, buildings, days, freq, corruption_rate)
+    pipeline.init_runtime(work_dir / 'output')
+
+    stages = {}
+    df = _measure(stages, 'ingest_data', lambda: pipeline.ingest_data(data_dir, workers=workers),
+                  rows, profile_memory)
+    rows = len(df)
+    _measure(stages, 'BuildingManager.add_building', lambda: pipeline.model_buildings(df), rows, profile_memory)
+    _measure(stages, 'calculate_daily_totals', lambda: pipeline.calculate_daily_totals(df), rows, profile_memory)
+    _measure(stages, 'calculate_weekly_aggregates', lambda: pipeline.calculate_weekly_aggregates(df), rows, profile_memory)
+    _measure(stages, 'building_wise_summary', lambda: pipeline.building_wise_summary(df), rows, profile_memory)
+    cube = _measure(stages, 'AggregationCube', lambda: pipeline.AggregationCube(df), rows, profile_memory)
+    _measure(stages, 'DemandProfile', lambda: pipeline.DemandProfile(cube).demand_summary(), rows, profile_memory)
+    anomalies, state = _measure(stages, 'detect_anomalies', lambda: pipeline.detect_anomalies(cube),
+                                rows, profile_memory)
+    anomaly_rate = len(anomalies) / state['scored_hours'] if state and state['scored_hours'] else 0.0
+    print(f"  {'false-positive anomaly rate':<34} {anomaly_rate:8.3%}  ({len(anomalies)} hours flagged)")
+    if anomaly_rate > ANOMALY_CLEAN_MAX_RATE:
+        raise AssertionError(f"{anomaly_rate:.3%} of the clean hours were flagged as anomalies "
+                             f"(at most {ANOMALY_CLEAN_MAX_RATE:.1%} expected)")
+    if include_plots:
+        _measure(stages, 'generate_dashboard_plots', lambda: pipeline.generate_dashboard_plots(df, cube),
+                 rows, profile_memory)
+        # Unchanged data: the scalable renderer reuses every cached panel
+        _measure(stages, 'generate_dashboard_plots (rerun)', lambda: pipeline.generate_dashboard_plots(df, cube),
+                 rows, profile_memory)
+
+    return {'buildings': buildings, 'days': days, 'freq': freq, 'corruption_rate': corruption_rate,
+            'rows': rows, 'frame_mb': round(df.memory_usage(deep=True).sum() / 2**20, 2),
+            'anomaly_false_positive_rate': round(anomaly_rate, 6), 'stages': stages}
+
+def measure_cold_start(work_dir, repeat=COLD_START_REPEAT):
+    """Median wall time of each CLI command started in a fresh Python process.
+
+    'import' only imports the pipeline module. The other commands run against a
+    10-building, 28-day dataset that is ingested once beforehand, so the numbers
+    are dominated by interpreter and import start-up.
+    """
+    root = (work_dir / 'cold_start').resolve()
+    generate_dataset(root / 'data', 10, days=28)
+    script = Path(pipeline.__file__).resolve()
+    subprocess.run([sys.executable, str(script), '--no-metrics', 'ingest'], cwd=root,
+                   capture_output=True, check=True)
+    print("\nCold start (fresh interpreter per run)")
+    timings = {}
+    for command in COLD_START_COMMANDS:
+        if command == ('import',):
+            argv = ['-c', f'import sys; sys.path.insert(0, {str(script.parent)!r}); import {script.stem}']
+        else:
+            argv = [str(script), '--no-metrics', *command]
+        samples = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            subprocess.run([sys.executable, *argv], cwd=root, capture_output=True, check=True)
+            samples.append(time.perf_counter() - started)
+        name = ' '.join(command)
+        timings[name] = round(statistics.median(samples), 4)
+        print(f"  {name:<34} {timings[name]:8.3f} s")
+    return timings
+
+# --- Regression Checks ---
+
+def _run_cli(root, *argv):
+    """Runs the pipeline's command line in a fresh interpreter with root as the working directory."""
+    script = Path(pipeline.__file__).resolve()
+    subprocess.run([sys.executable, str(script), '--no-metrics', *argv], cwd=root,
+                   capture_output=True, check=True)
+
+def _split_csvs(data_dir):
+    """Cuts every CSV in data_dir after its middle line and returns {path: removed tail bytes}."""
+    tails = {}
+    for path in sorted(data_dir.glob('*.csv')):
+        lines = path.read_bytes().splitlines(keepends=True)
+        middle = len(lines) // 2
+        path.write_bytes(b''.join(lines[:middle]))
+        tails[path] = b''.join(lines[middle:])
+    return tails
+
+def check_float32_round_trip(work_dir):
+    """An 'ingest --float32' followed by a float64 ingest must save exactly what two float64 ingests save.
+
+    Each campus is ingested in two halves so the second run reloads the store
+    written by the first. Compares the store readings, the hourly rollup sums
+    and the building summary bit for bit.
+    """
+    saved = {}
+    for label, first_flags in (('float64', ()), ('float32', ('--float32',))):
+        root = (work_dir / 'float32_check' / label).resolve()
+        if root.exists():
+            shutil.rmtree(root)
+        generate_dataset(root / 'data', 3, days=28)
+        tails = _split_csvs(root / 'data')
+        _run_cli(root, *first_flags, 'ingest')
+        for path, tail in tails.items():
+            with path.open('ab') as f:
+                f.write(tail)
+        _run_cli(root, 'ingest')
+        output_dir = root / 'output' # The command line's default output folder
+        store = pipeline.load_columnar_store(output_dir / pipeline.CLEANED_STORE_DIR, usage_dtype='float64')
+        saved[label] = (store,
+                        np.load(output_dir / pipeline.ROLLUP_DIR / 'hour' / 'sum.npy'),
+                        pipeline.RunningAggregates.load(output_dir / pipeline.AGGREGATES_FILE).building_summary())
+    (store, rollup, summary), (store32, rollup32, summary32) = saved['float64'], saved['float32']
+    pd.testing.assert_frame_equal(store32, store, check_exact=True)
+    if not np.array_equal(rollup32, rollup):
+        raise AssertionError("a --float32 ingest changed the saved hourly rollups")
+    pd.testing.assert_frame_equal(summary32, summary, check_exact=True)
+    print(f"  {'float32 run, then float64':<34} saved data identical ({len(store)} readings)")
+
+def check_partial_line_append(work_dir):
+    """Half a row appended by a writer is left alone until the line is finished.
+
+    Ingests a meter file, appends '12.' without a line break, ingests again
+    (nothing new may be stored), completes the row with '75' and a newline
+    and ingests once more: the store must hold 12.75 and match a full rebuild.
+    """
+    root = (work_dir / 'partial_line_check').resolve()
+    if root.exists():
+        shutil.rmtree(root)
+    generate_dataset(root / 'data', 1, days=2, corruption_rate=0)
+    path = next((root / 'data').glob('*.csv'))
+    output_dir, rebuild_dir = root / 'output', root / 'rebuild'
+    pipeline.ingest_incremental(root / 'data', output_dir, workers=1)
+    rows = len(pipeline.load_columnar_store(output_dir / pipeline.CLEANED_STORE_DIR, usage_dtype='float64'))
+    with path.open('ab') as f:
+        f.write(b'2024-01-03 00:00:00,12.')
+    pipeline.ingest_incremental(root / 'data', output_dir, workers=1)
+    store = pipeline.load_columnar_store(output_dir / pipeline.CLEANED_STORE_DIR, usage_dtype='float64')
+    if len(store) != rows:
+        raise AssertionError(f"a half-written row was ingested: {store['Usage_kwh'].iloc[-1]}")
+    with path.open('ab') as f:
+        f.write(b'75\n')
+    pipeline.ingest_incremental(root / 'data', output_dir, workers=1)
+    store = pipeline.load_columnar_store(output_dir / pipeline.CLEANED_STORE_DIR, usage_dtype='float64')
+    if len(store) != rows + 1 or store['Usage_kwh'].iloc[-1] != 12.75:
+        raise AssertionError(f"the completed row was not ingested as 12.75 ({len(store) - rows} new rows)")
+    pipeline.ingest_incremental(root / 'data', rebuild_dir, full_rebuild=True, workers=1)
+    rebuilt = pipeline.load_columnar_store(rebuild_dir / pipeline.CLEANED_STORE_DIR, usage_dtype='float64')
+    pd.testing.assert_frame_equal(store, rebuilt, check_exact=True)
+    print(f"  {'half-written row':<34} held back, then ingested as 12.75")
+
+def run_all(args, work_dir):
+    """Runs the checks and benchmarks selected by the command-line args in work_dir."""
+    pipeline.init_runtime(work_dir / 'output')
+    if not args.skip_checks:
+        print("\nRegression checks")
+        check_float32_round_trip(work_dir)
+        check_partial_line_append(work_dir)
+    runs = [run_benchmark(n, args.days, args.freq, args.corruption, work_dir,
+                          include_plots=not args.skip_plots, profile_memory=not args.no_memory,
+                          workers=args.workers)
+            for n in args.scales]
+    results = {
+        'generated_at': pd.Timestamp.now().isoformat(timespec='seconds'),
+        'environment': {'python': platform.python_version(), 'platform': platform.platform(),
+                        'numpy': np.__version__, 'pandas': pd.__version__},
+        'runs': runs,
+    }
+    if args.cold_start:
+        results['cold_start_s'] = measure_cold_start(work_dir)
+    if args.output:
+        Path(args.output).write_text(json.dumps(results, indent=2))
+        print(f"\nBenchmark results written to {args.output}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Synthetic campus-scale benchmark for the energy pipeline")
+    parser.add_argument('--scales', type=int, nargs='+', default=list(DEFAULT_SCALES),
+                        help="building counts to benchmark")
+    parser.add_argument('--days', type=int, default=DEFAULT_DAYS)
+    parser.add_argument('--freq', default=DEFAULT_FREQ, help="sampling interval, e.g. h or 15min")
+    parser.add_argument('--corruption', type=float, default=DEFAULT_CORRUPTION,
+                        help="fraction of rows to corrupt")
+    parser.add_argument('--workers', type=int, default=1, help="ingest_data worker processes")
+    parser.add_argument('--work-dir', help="keep the generated campuses here and reuse them in later runs "
+                                           "(default: a temporary directory)")
+    parser.add_argument('--output', help="also write the results as JSON to this file")
+    parser.add_argument('--skip-plots', action='store_true')
+    parser.add_argument('--no-memory', action='store_true',
+                        help="disable tracemalloc (faster, no peak memory figures)")
+    parser.add_argument('--cold-start', action='store_true',
+                        help="also time each CLI command's start-up in fresh interpreters")
+    parser.add_argument('--skip-checks', action='store_true',
+                        help="skip the regression checks on small campuses")
+    args = parser.parse_args()
+
+    if args.work_dir:
+        run_all(args, Path(args.work_dir))
+    else:
+        with tempfile.TemporaryDirectory() as work_dir:
+            run_all(args, Path(work_dir))
+
+if __name__ == "__main__":
+    main()
@@ -4,22 +4,275 @@
 # Capstone Assignment: Campus Energy-Use Dashboard
 # Date: 2025-12-08
 
-import pandas as pd
-import numpy as np
-import matplotlib.pyplot as plt
 import os
 from pathlib import Path
 import logging
+import warnings
+import argparse
+import hashlib
+import importlib
+import io
+import json
+import shutil
+import threading
+import time
+import tracemalloc
+import urllib.parse
+from collections import Counter, OrderedDict, deque
+
+try:
+    import resource # Peak RSS for the stage metrics (not available on Windows)
+except ImportError:
+    resource = None
+
+class _LazyModule:
+    """Placeholder for a heavy module that is imported on first attribute access.
+
+    pandas and NumPy take hundreds of milliseconds to import, so they are only
+    loaded once a function actually uses them; importing MeterReading or
+    Building from this file stays cheap. matplotlib and pyarrow are imported
+    inside the plotting and Parquet functions for the same reason.
+    """
+    def __init__(self, name, alias):
+        self._name, self._alias = name, alias
+
+    def __getattr__(self, attr):
+        module = importlib.import_module(self._name)
+        globals()[self._alias] = module # Later lookups go straight to the module
+        return getattr(module, attr)
+
+def _import_now(*aliases):
+    """Imports the lazy modules behind these aliases at once, e.g. before code that is timed."""
+    for alias in aliases:
+        placeholder = globals()[alias]
+        if isinstance(placeholder, _LazyModule):
+            getattr(placeholder, '__name__') # Any attribute access imports the module
+
+pd = _LazyModule('pandas', 'pd')
+np = _LazyModule('numpy', 'np')
+asyncio = _LazyModule('asyncio', 'asyncio') # Only watch mode needs the event loop
 
 # --- Configuration ---
 # FIX: Set the DATA_DIR to the 'data' subdirectory as required by the Capstone structure.
 DATA_DIR = Path('data') 
 OUTPUT_DIR = Path('output')
 LOG_FILE = 'energy_dashboard.log'
-# Ensure log file and output directory can be created
-OUTPUT_DIR.mkdir(exist_ok=True)
-logging.basicConfig(filename=OUTPUT_DIR / LOG_FILE, level=logging.INFO, 
-                    format='%(asctime)s - %(levelname)s - %(message)s')
+# Ingestion: expected timestamp layout in the meter CSVs (None falls back to per-row inference)
+TIMESTAMP_FORMAT = '%Y-%m-%d %H:%M:%S'
+# Number of worker processes used to parse meter files (1 = parse in this process; None = one per
+# CPU once a run has INGEST_PARALLEL_MIN_FILES files, below which starting the pool costs more than it saves)
+INGEST_WORKERS = None
+INGEST_PARALLEL_MIN_FILES = 8
+# Incremental ingestion state, kept in OUTPUT_DIR between runs
+MANIFEST_FILE = 'ingest_manifest.json'
+CLEANED_STORE_DIR = 'cleaned_store' # Binary columnar store, partitioned by building and month
+STORE_BACKEND = 'auto' # 'parquet', 'npy' or 'auto' (Parquet when pyarrow is installed)
+AGGREGATES_FILE = 'running_aggregates.json'
+FINGERPRINT_BYTES = 4096 # Leading bytes hashed to detect rewritten (not appended) files
+# An unterminated last line is left for the next run while its writer may still be adding to it,
+# i.e. until the file has not been modified for this many seconds
+PARTIAL_LINE_SETTLE_SECONDS = 5.0
+ROLLUP_DIR = 'rollups' # Pre-aggregated hourly/daily/weekly/monthly buckets for range queries
+# Anomaly detection: robust z-score of each hourly mean reading against the same hour of the
+# week in the preceding ANOMALY_WINDOW_WEEKS weeks (median/MAD baseline)
+ANOMALY_WINDOW_WEEKS = 4
+ANOMALY_MIN_WEEKS = 3 # Baseline weeks with a reading needed before an hour is scored
+ANOMALY_THRESHOLD = 3.5
+ANOMALY_MIN_SCALE = 0.05 # Spread floor as a fraction of the baseline, so flat meters are not over-flagged
+ANOMALY_BLOCK_BUILDINGS = 256 # Buildings scored per vectorized block (bounds the window buffers)
+ANOMALIES_FILE = 'anomalies.csv'
+ANOMALY_STATE_FILE = 'anomaly_state.npz'
+ANOMALY_SUMMARY_ROWS = 5 # Largest anomalies listed in the executive summary
+# Demand analytics: peak hours listed per building, and the exported tables
+PEAK_TOP_N = 10
+LOAD_PROFILES_FILE = 'load_profiles.csv'
+PEAK_INTERVALS_FILE = 'peak_intervals.csv'
+DEMAND_SUMMARY_FILE = 'demand_summary.csv'
+# Dashboard rendering: 'classic' single figure, 'scalable' (downsampled panels rendered in a
+# process pool and cached), or 'auto' (scalable above SCALABLE_PLOT_BUILDINGS buildings or
+# PLOT_MAX_POINTS days)
+RENDER_MODE = 'auto'
+SCALABLE_PLOT_BUILDINGS = 12
+PLOT_MAX_POINTS = 1000 # Points kept per series after downsampling
+PLOT_DOWNSAMPLE = 'lttb' # 'lttb' or 'minmax'
+PLOT_WORKERS = os.cpu_count() or 1
+PANELS_DIR = 'dashboard_panels'
+# Scalable mode can also draw one small-multiple chart per building; off by default, because
+# every one of them changes (and is redrawn) whenever a day of new readings arrives
+PLOT_SMALL_MULTIPLES = False
+PANEL_CACHE_DIR = 'panel_cache'
+# Watch mode: polling interval, quiet period before the summary files are rewritten (and the
+# longest they may lag behind), and the minimum time between dashboard re-renders
+WATCH_POLL_SECONDS = 1.0
+WATCH_DEBOUNCE_SECONDS = 2.0
+WATCH_MAX_DELAY_SECONDS = 10.0
+WATCH_PLOT_INTERVAL_SECONDS = 30.0
+# Query service: listen address, cached responses (least recently used are evicted first)
+# and the number of recent request latencies kept for the percentiles
+SERVE_HOST = '127.0.0.1'
+SERVE_PORT = 8050
+QUERY_CACHE_SIZE = 256
+SERVE_LATENCY_WINDOW = 10_000
+# Streaming mode: rows read per chunk, which bounds peak memory
+STREAM_CHUNK_ROWS = 100_000
+# Stage instrumentation (see configure_instrumentation): on/off, optional JSON Lines
+# metrics file, and tracemalloc-based peak memory instead of process peak RSS
+INSTRUMENTATION = True
+METRICS_FILE = None
+TRACE_MEMORY = False
+# Memory: Usage_kwh dtype of the in-memory combined frame ('float32' halves the column and keeps
+# about 7 significant digits; the columnar store, rollups and cube always use float64) and an
+# optional budget in MB that the frame size and stage peaks are reported against
+USAGE_DTYPE = 'float64'
+MEMORY_BUDGET_MB = None
+
+def init_runtime(output_dir=None):
+    """Explicit start-up step: creates the output folder and sends logging to its log file.
+
+    Importing this module has no file-system side effects; the command-line
+    entry point (and any tool that wants the same log) calls this first.
+    """
+    global OUTPUT_DIR
+    if output_dir is not None:
+        OUTPUT_DIR = Path(output_dir)
+    OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
+    logging.basicConfig(filename=OUTPUT_DIR / LOG_FILE, level=logging.INFO,
+                        format='%(asctime)s - %(levelname)s - %(message)s')
+
+# --- Instrumentation: Per-Stage Timing and Memory ---
+
+def configure_instrumentation(enabled=True, metrics_file=None, trace_memory=False):
+    """Turns stage metrics on or off and chooses where they go.
+
+    When disabled, instrument() hands back a shared no-op object, so the
+    pipeline does no timing or memory work at all.
+    """
+    global INSTRUMENTATION, METRICS_FILE, TRACE_MEMORY
+    INSTRUMENTATION = enabled
+    METRICS_FILE = Path(metrics_file) if metrics_file else None
+    TRACE_MEMORY = enabled and trace_memory
+    if TRACE_MEMORY and not tracemalloc.is_tracing():
+        tracemalloc.start()
+
+def configure_memory(budget_mb=None, usage_dtype='float64'):
+    """Sets the memory budget (MB, None for no budget) and the Usage_kwh dtype of the combined frame."""
+    global MEMORY_BUDGET_MB, USAGE_DTYPE
+    MEMORY_BUDGET_MB = budget_mb
+    USAGE_DTYPE = usage_dtype
+
+def configure_rendering(small_multiples=False):
+    """Chooses whether scalable rendering also draws the per-building small multiples."""
+    global PLOT_SMALL_MULTIPLES
+    PLOT_SMALL_MULTIPLES = small_multiples
+
+def _peak_rss_mb():
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in kilobytes on Linux and in bytes on macOS
+    return peak / 2**20 if os.uname().sysname == 'Darwin' else peak / 2**10
+
+def record_stage_metrics(stage, wall_s, cpu_s, rows=None, peak_mem_mb=None, memory_source=None):
+    """Writes one stage's metrics to the log and, if configured, to METRICS_FILE."""
+    rows_per_s = rows / wall_s if rows is not None and wall_s > 0 else None
+    parts = [f"wall={wall_s:.3f}s", f"cpu={cpu_s:.3f}s"]
+    if rows is not None:
+        parts.append(f"rows={rows}")
+    if rows_per_s is not None:
+        parts.append(f"rows/s={rows_per_s:,.0f}")
+    if peak_mem_mb is not None:
+        parts.append(f"peak_mem={peak_mem_mb:.1f}MB ({memory_source})")
+    over_budget = MEMORY_BUDGET_MB is not None and peak_mem_mb is not None and peak_mem_mb > MEMORY_BUDGET_MB
+    if over_budget:
+        parts.append(f"OVER the {MEMORY_BUDGET_MB:g}MB budget")
+    (logging.warning if over_budget else logging.info)(f"[metrics] {stage}: " + ' '.join(parts))
+    if METRICS_FILE is not None:
+        record = {'time': pd.Timestamp.now().isoformat(timespec='seconds'), 'stage': stage,
+                  'wall_s': round(wall_s, 6), 'cpu_s': round(cpu_s, 6), 'rows': rows,
+                  'rows_per_s': round(rows_per_s, 1) if rows_per_s is not None else None,
+                  'peak_mem_mb': round(peak_mem_mb, 3) if peak_mem_mb is not None else None,
+                  'memory_source': memory_source, 'memory_budget_mb': MEMORY_BUDGET_MB}
+        with METRICS_FILE.open('a', encoding='utf-8') as f:
+            f.write(json.dumps(record) + '\n')
+
+def report_memory(df, label='combined frame'):
+    """Reports the frame's footprint per column and the process peak against MEMORY_BUDGET_MB.
+
+    Returns the frame size in MB.
+    """
+    columns = df.memory_usage(deep=True)
+    frame_mb = columns.sum() / 2**20
+    message = (f"[memory] {label}: {frame_mb:.1f} MB for {len(df):,} rows ("
+               + ', '.join(f"{name}={size / 2**20:.1f}MB" for name, size in columns.items()) + ")")
+    peak_mb = _peak_rss_mb()
+    if peak_mb is not None:
+        message += f", process peak RSS {peak_mb:.1f} MB"
+    over_budget = MEMORY_BUDGET_MB is not None and max(frame_mb, peak_mb or 0) > MEMORY_BUDGET_MB
+    if MEMORY_BUDGET_MB is not None:
+        message += f"; {'OVER' if over_budget else 'within'} the {MEMORY_BUDGET_MB:g} MB budget"
+    print(message)
+    if over_budget:
+        logging.warning(message + " (try --float32, or summarize --streaming)")
+    else:
+        logging.info(message)
+    return frame_mb
+
+class StageTimer:
+    """Context manager measuring wall time, CPU time and peak memory of one stage.
+
+    Set .rows inside the block to get rows and rows/sec in the metrics. With
+    TRACE_MEMORY the peak is the tracemalloc peak of this stage (nested stages
+    included); otherwise it is the process peak RSS at the end of the stage.
+    """
+    _active = []
+
+    def __init__(self, stage, rows=None):
+        self.stage = stage
+        self.rows = rows
+        self._peak = 0
+
+    def __enter__(self):
+        if TRACE_MEMORY:
+            if StageTimer._active:
+                parent = StageTimer._active[-1]
+                parent._peak = max(parent._peak, tracemalloc.get_traced_memory()[1])
+            tracemalloc.reset_peak()
+        StageTimer._active.append(self)
+        self._wall, self._cpu = time.perf_counter(), time.process_time()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        wall_s, cpu_s = time.perf_counter() - self._wall, time.process_time() - self._cpu
+        StageTimer._active.pop()
+        if TRACE_MEMORY:
+            peak = max(self._peak, tracemalloc.get_traced_memory()[1])
+            if StageTimer._active:
+                parent = StageTimer._active[-1]
+                parent._peak = max(parent._peak, peak)
+            peak_mb, source = peak / 2**20, 'tracemalloc'
+        else:
+            peak_mb, source = _peak_rss_mb(), 'rss'
+        record_stage_metrics(self.stage, wall_s, cpu_s, self.rows, peak_mb, source)
+        return False
+
+class _NoStageTimer:
+    """Shared stand-in for StageTimer when instrumentation is off."""
+    rows = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+    def __setattr__(self, name, value):
+        pass
+
+_NO_STAGE_TIMER = _NoStageTimer()
+
+def instrument(stage, rows=None):
+    """Returns a StageTimer for stage, or a no-op when instrumentation is off."""
+    return StageTimer(stage, rows) if INSTRUMENTATION else _NO_STAGE_TIMER
 
 # --- Task 3: Object-Oriented Modeling ---
 
@@ -32,31 +285,95 @@ class MeterReading:
     def __repr__(self):
         return f"MeterReading({self.timestamp.strftime('%Y-%m-%d %H:%M')}, {self.kwh:.2f} kWh)"
 
+class MeterReadingView:
+    """Read-only sequence over a Building's arrays that builds MeterReading objects on access."""
+    def __init__(self, building):
+        self._building = building
+
+    def __len__(self):
+        return len(self._building.usage_kwh)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        return MeterReading(self._building.timestamps[index], self._building.usage_kwh[index])
+
+    def __iter__(self):
+        for ts, kwh in zip(self._building.timestamps, self._building.usage_kwh):
+            yield MeterReading(ts, kwh)
+
+    def __bool__(self):
+        return len(self) > 0
+
 class Building:
-    """Represents a single building with energy consumption data."""
+    """Represents a single building with energy consumption data.
+
+    Readings are stored column-wise in two aligned NumPy arrays
+    (datetime64[ns] timestamps and float64 kWh) rather than as one
+    MeterReading object per row. Readings added one at a time are buffered
+    in a list and appended to the arrays in one go when they are next read.
+    """
     def __init__(self, name):
         self.name = name
-        self.meter_readings = [] # List of MeterReading objects
+        self._timestamps = np.empty(0, dtype='datetime64[ns]')
+        self._usage_kwh = np.empty(0, dtype=np.float64)
+        self._pending = [] # (timestamp, kWh) from add_reading, not yet in the arrays
+
+    def _flush_pending(self):
+        if self._pending:
+            timestamps, usage_kwh = zip(*self._pending)
+            self._pending = []
+            self._timestamps = np.concatenate([self._timestamps, np.array(timestamps, dtype='datetime64[ns]')])
+            self._usage_kwh = np.concatenate([self._usage_kwh, np.array(usage_kwh, dtype=np.float64)])
+
+    @property
+    def timestamps(self):
+        self._flush_pending()
+        return self._timestamps
+
+    @property
+    def usage_kwh(self):
+        self._flush_pending()
+        return self._usage_kwh
+
+    @property
+    def meter_readings(self):
+        """Lazy MeterReading view over the stored arrays."""
+        return MeterReadingView(self)
 
     def add_reading(self, timestamp, kwh):
         """Adds a new MeterReading to the building."""
         try:
             reading = MeterReading(timestamp, kwh)
-            self.meter_readings.append(reading)
+            # FIX: np.append copied both arrays on every call (quadratic for a series of readings)
+            self._pending.append((np.datetime64(reading.timestamp.to_datetime64(), 'ns'), reading.kwh))
         except ValueError as e:
             logging.warning(f"Skipping invalid reading for {self.name}: {e}")
 
+    def load_readings(self, timestamps, usage_kwh):
+        """Bulk-loads readings from array-likes, dropping rows with a missing timestamp or kWh value."""
+        timestamps = np.asarray(timestamps, dtype='datetime64[ns]')
+        usage_kwh = np.asarray(usage_kwh, dtype=np.float64)
+        valid = ~(np.isnat(timestamps) | np.isnan(usage_kwh))
+        if not valid.all():
+            logging.warning(f"Skipping {int((~valid).sum())} invalid readings for {self.name}.")
+            timestamps, usage_kwh = timestamps[valid], usage_kwh[valid]
+        if len(self.usage_kwh):
+            timestamps = np.concatenate([self.timestamps, timestamps])
+            usage_kwh = np.concatenate([self.usage_kwh, usage_kwh])
+        self._timestamps = timestamps
+        self._usage_kwh = usage_kwh
+
     def get_dataframe(self):
-        """Converts readings into a Pandas DataFrame for analysis."""
-        if not self.meter_readings:
+        """Wraps the reading arrays in a Pandas DataFrame for analysis (no copy)."""
+        if not len(self.usage_kwh):
             return pd.DataFrame()
-        data = [{'Timestamp': r.timestamp, 'Usage_kwh': r.kwh} for r in self.meter_readings]
-        df = pd.DataFrame(data).set_index('Timestamp')
-        return df
+        index = pd.DatetimeIndex(self.timestamps, name='Timestamp', copy=False)
+        return pd.DataFrame({'Usage_kwh': self.usage_kwh}, index=index, copy=False)
         
     def calculate_total_consumption(self):
         """Calculates the total consumption from all readings."""
-        return sum(r.kwh for r in self.meter_readings)
+        return float(self.usage_kwh.sum())
 
 class BuildingManager:
     """Manages all Building objects and performs campus-wide analysis."""
@@ -67,62 +384,709 @@ class BuildingManager:
         """Creates a Building object and populates it with DataFrame data."""
         building = Building(name)
         # Assuming df_readings index is already Timestamp
-        for index, row in df_readings.iterrows():
-            building.add_reading(index, row['Usage_kwh'])
+        building.load_readings(df_readings.index.to_numpy(), df_readings['Usage_kwh'].to_numpy())
         self.buildings[name] = building
-        logging.info(f"Building '{name}' added with {len(building.meter_readings)} readings.")
+        logging.info(f"Building '{name}' added with {len(building.usage_kwh)} readings.")
         return building
 
+    def append_readings(self, name, df_readings):
+        """Appends newly ingested readings to a building, creating it on first sight."""
+        if name not in self.buildings:
+            return self.add_building(name, df_readings)
+        building = self.buildings[name]
+        building.load_readings(df_readings.index.to_numpy(), df_readings['Usage_kwh'].to_numpy())
+        return building
+
+    def remove_building(self, name):
+        """Forgets a building (e.g. before its rewritten file is re-read in full)."""
+        self.buildings.pop(name, None)
+
+def model_buildings(df_combined):
+    """Builds a BuildingManager with one Building per building in the combined frame.
+
+    Each building's rows are a contiguous slice located by building_offsets, so
+    the frame is not masked once per building.
+    """
+    manager = BuildingManager()
+    for name, rows in building_offsets(df_combined).items():
+        # Pass only the necessary data to the Building object
+        manager.add_building(name, df_combined.iloc[rows].drop(columns=['Building']))
+    return manager
+
 # --- Task 1: Data Ingestion and Validation ---
 
-def ingest_data(data_dir):
-    """Loops through the directory, reads multiple CSVs, and merges them."""
+def _clean_readings(df, building_name, timestamp_format=TIMESTAMP_FORMAT):
+    """Adds the Building column, coerces Timestamp/Usage_kwh and drops invalid rows.
+
+    Returns the cleaned frame and the number of rows dropped.
+    """
+    # Task 1: Add metadata (one categorical code per row instead of a repeated string)
+    df['Building'] = pd.Categorical.from_codes(np.zeros(len(df), dtype=np.int8), categories=[building_name])
+    df['Timestamp'] = pd.to_datetime(df['Timestamp'], format=timestamp_format, errors='coerce') # Errors='coerce' for handling bad dates
+    # Ensure Usage_kwh is numeric
+    df['Usage_kwh'] = pd.to_numeric(df['Usage_kwh'], errors='coerce').astype(np.float64)
+
+    rows_read = len(df)
+    df = df.dropna(subset=['Timestamp', 'Usage_kwh'])
+    return df, rows_read - len(df)
+
+def _read_building_file(file_path, timestamp_format=TIMESTAMP_FORMAT, start=None, columns=None):
+    """Parses and validates one meter CSV.
+
+    Runs in worker processes, so it does not log; the caller logs the returned
+    status. Returns a dict with the building name, the cleaned frame sorted by
+    Timestamp (or None if the file was rejected), the number of malformed lines
+    skipped by the parser, the number of rows dropped by validation and the
+    log message for rejected files.
+
+    With a byte offset in start, only the bytes from that offset on are
+    parsed (using the header names in columns when start > 0), and the result
+    also records the CSV columns and the byte offset consumed ('end_offset').
+    An unterminated last line of a recently modified file is not consumed.
+    """
+    # FIX: Use the filename (replacing underscores with spaces) as the building name
+    building_name = file_path.stem.replace('_', ' ').title()
+    result = {'building': building_name, 'file': file_path.name, 'frame': None,
+              'bad_lines': 0, 'dropped_rows': 0, 'error': None,
+              'columns': columns, 'end_offset': start}
+    try:
+        # Task 1: Handle corrupt data by skipping bad lines; the parser warnings are counted
+        with warnings.catch_warnings(record=True) as caught:
+            warnings.simplefilter('always', pd.errors.ParserWarning)
+            if start is None:
+                df = pd.read_csv(file_path, on_bad_lines='warn', dtype={'Timestamp': str})
+            else:
+                with file_path.open('rb') as f:
+                    f.seek(start)
+                    data = f.read()
+                    settled = time.time() - os.fstat(f.fileno()).st_mtime >= PARTIAL_LINE_SETTLE_SECONDS
+                if not data.endswith(b'\n') and not settled:
+                    # A writer may be half-way through the last line: stop after the last complete one
+                    data = data[:data.rfind(b'\n') + 1]
+                result['end_offset'] = start + len(data)
+                if start and not data:
+                    df = pd.DataFrame({name: pd.Series(dtype=object) for name in columns})
+                elif start:
+                    df = pd.read_csv(io.BytesIO(data), header=None, names=columns,
+                                     on_bad_lines='warn', dtype={'Timestamp': str})
+                else:
+                    df = pd.read_csv(io.BytesIO(data), on_bad_lines='warn', dtype={'Timestamp': str})
+                result['columns'] = list(df.columns)
+        result['bad_lines'] = sum(str(w.message).count('Skipping line') for w in caught
+                                  if issubclass(w.category, pd.errors.ParserWarning))
+
+        # Basic validation: Check for the required energy usage columns
+        if 'Timestamp' not in df.columns or 'Usage_kwh' not in df.columns:
+            result['error'] = f"Skipping {file_path.name}: Missing required 'Timestamp' or 'Usage_kwh' columns."
+            return result
+
+        df, result['dropped_rows'] = _clean_readings(df, building_name, timestamp_format)
+        # Each file is sorted here so combine_frames only has to order the files by building
+        result['frame'] = df.set_index('Timestamp').sort_index(kind='stable')
+    except FileNotFoundError:
+        result['error'] = f"File not found: {file_path.name}"
+    except Exception as e:
+        result['error'] = f"Error processing {file_path.name}: {e}"
+    return result
+
+def _building_time_order(codes, timestamps):
+    """Row order for the building-then-time layout, or None if the rows are already in it."""
+    def in_order(c, t):
+        return bool(((c[1:] > c[:-1]) | ((c[1:] == c[:-1]) & (t[1:] >= t[:-1]))).all())
+    if in_order(codes, timestamps):
+        return None
+    # Per-file runs are already sorted by time, so a stable (radix) sort on the
+    # small building codes is usually enough
+    order = np.argsort(codes, kind='stable')
+    if not in_order(codes[order], timestamps[order]):
+        order = np.lexsort((timestamps, codes)) # Some building's runs overlap in time
+    return order
+
+def combine_frames(frames, usage_dtype=None):
+    """Concatenates per-file frames into the compact building-then-time layout.
+
+    Building becomes one categorical column (sorted names, int8/int16 codes)
+    instead of a string on every row, Usage_kwh is stored as usage_dtype
+    (USAGE_DTYPE by default) and rows are ordered by building, then Timestamp.
+    Each building is therefore one contiguous block; see building_offsets.
+    """
+    frames = [f for f in frames if not f.empty]
+    if not frames:
+        return pd.DataFrame()
+    buildings = pd.api.types.union_categoricals(
+        [f['Building'] if isinstance(f['Building'].dtype, pd.CategoricalDtype) else f['Building'].astype('category')
+         for f in frames], sort_categories=True)
+    timestamps = np.concatenate([f.index.to_numpy() for f in frames])
+    usage = np.concatenate([f['Usage_kwh'].to_numpy(dtype=usage_dtype or USAGE_DTYPE) for f in frames])
+    codes = buildings.codes
+    order = _building_time_order(codes, timestamps)
+    if order is not None:
+        timestamps, usage, codes = timestamps[order], usage[order], codes[order]
+    return pd.DataFrame({'Usage_kwh': usage,
+                         'Building': pd.Categorical.from_codes(codes, dtype=buildings.dtype)},
+                        index=pd.DatetimeIndex(timestamps, name='Timestamp'))
+
+def compact_usage(df):
+    """df with Usage_kwh downcast to USAGE_DTYPE, for in-memory use only.
+
+    Anything persisted (columnar store, rollups, anomaly state) is built from
+    the float64 frame first, so a --float32 run never rounds the saved data.
+    """
+    if df.empty or df['Usage_kwh'].dtype == USAGE_DTYPE:
+        return df
+    return df.assign(Usage_kwh=df['Usage_kwh'].to_numpy(dtype=USAGE_DTYPE))
+
+def building_offsets(df):
+    """{building: slice} of each building's rows in a frame laid out by combine_frames."""
+    if df.empty:
+        return {}
+    building = df['Building']
+    categories = building.cat.categories
+    bounds = np.searchsorted(building.cat.codes.to_numpy(), np.arange(len(categories) + 1))
+    return {name: slice(lo, hi) for name, lo, hi in zip(categories, bounds[:-1], bounds[1:]) if hi > lo}
+
+def _read_building_file_timed(*args):
+    """_read_building_file plus the wall and CPU time it took (for worker processes)."""
+    wall, cpu = time.perf_counter(), time.process_time()
+    result = _read_building_file(*args)
+    result['wall_s'], result['cpu_s'] = time.perf_counter() - wall, time.process_time() - cpu
+    return result
+
+def _file_rows(result):
+    return len(result['frame']) if result['frame'] is not None else 0
+
+def ingest_worker_count(workers, n_files):
+    """Worker processes for parsing n_files meter files; workers=None picks them automatically."""
+    if workers is None:
+        return (os.cpu_count() or 1) if n_files >= INGEST_PARALLEL_MIN_FILES else 1
+    return workers
+
+def _parse_files(csv_files, workers, timestamp_format, starts=None, columns=None):
+    """Runs _read_building_file over the files, in a process pool when workers > 1.
+
+    Each file is reported as its own 'ingest_file' stage when instrumentation
+    is on (worker-side timings, without memory, in the parallel case).
+    """
+    workers = ingest_worker_count(workers, len(csv_files))
+    starts = starts or [None] * len(csv_files)
+    columns = columns or [None] * len(csv_files)
+    formats = [timestamp_format] * len(csv_files)
+    if workers and workers > 1 and len(csv_files) > 1:
+        from concurrent.futures import ProcessPoolExecutor
+        reader = _read_building_file_timed if INSTRUMENTATION else _read_building_file
+        with ProcessPoolExecutor(max_workers=min(workers, len(csv_files))) as pool:
+            chunksize = max(1, len(csv_files) // (workers * 4))
+            results = list(pool.map(reader, csv_files, formats, starts, columns, chunksize=chunksize))
+        if INSTRUMENTATION:
+            for result in results:
+                record_stage_metrics(f"ingest_file[{result['file']}]", result['wall_s'],
+                                     result['cpu_s'], _file_rows(result))
+        return results
+    results = []
+    for args in zip(csv_files, formats, starts, columns):
+        with instrument(f"ingest_file[{args[0].name}]") as stage:
+            result = _read_building_file(*args)
+            stage.rows = _file_rows(result)
+        results.append(result)
+    return results
+
+def _log_file_result(result):
+    """Logs the outcome of _read_building_file and returns its frame (None if rejected)."""
+    print(f"Processing data for: {result['building']}")
+    if result['bad_lines']:
+        logging.warning(f"Skipped {result['bad_lines']} malformed lines in {result['file']}.")
+    if result['error']:
+        logging.error(result['error'])
+        return None
+    if result['dropped_rows']:
+        logging.warning(f"Dropped {result['dropped_rows']} rows with invalid Timestamp or Usage_kwh in {result['file']}.")
+    logging.info(f"Successfully ingested data for {result['building']}.")
+    return result['frame']
+
+def ingest_data(data_dir, workers=INGEST_WORKERS, timestamp_format=TIMESTAMP_FORMAT):
+    """Loops through the directory, reads multiple CSVs, and merges them.
+
+    With workers > 1 (by default, with many files and CPUs) the files are
+    parsed and validated in a process pool.
+    """
     all_data = []
     
     # FIX: Use a general glob pattern to find all CSV files inside the data_dir
-    csv_files = [f for f in data_dir.glob('*.csv')]
+    csv_files = sorted(data_dir.glob('*.csv'))
     
     if not csv_files:
         # FIX: Corrected error message to reflect the expected path
         print(f"Error: No CSV files found in the '{data_dir}' folder. Exiting.")
         return pd.DataFrame()
 
+    for result in _parse_files(csv_files, workers, timestamp_format):
+        frame = _log_file_result(result)
+        if frame is not None:
+            all_data.append(frame)
+
+    if not all_data:
+        return pd.DataFrame()
+        
+    df_combined = combine_frames(all_data)
+    print(f"Total records in combined DataFrame: {len(df_combined)}")
+    return df_combined
+
+# --- Incremental Ingestion (manifest + running aggregates) ---
+
+class RunningAggregates:
+    """Mergeable per-building accumulators, updated batch by batch.
+
+    For every building it keeps count, sum, min, max, the first and last
+    timestamp, daily buckets ([sum, count, max] per 'YYYY-MM-DD') and
+    hour-of-day buckets ([sum, count] per hour). That is enough to rebuild the
+    building summary, daily and weekly totals, the peak hour and the analysis
+    period without holding the readings in memory.
+    """
+    def __init__(self):
+        self.buildings = {}
+
+    @staticmethod
+    def _empty_stats():
+        return {'count': 0, 'sum': 0.0, 'min': np.inf, 'max': -np.inf, 'first': None, 'last': None,
+                'daily': {}, 'hourly': [[0.0, 0] for _ in range(24)]}
+
+    def update(self, df):
+        """Folds newly read rows (Timestamp index, Building and Usage_kwh columns) into the totals."""
+        if df.empty:
+            return
+        buildings = df['Building'].to_numpy()
+        timestamps = df.index.to_numpy()
+        usage = df['Usage_kwh']
+        days = timestamps.astype('datetime64[D]')
+        by_day = usage.groupby([buildings, days]).agg(['count', 'sum', 'min', 'max'])
+        by_hour = usage.groupby([buildings, df.index.hour]).agg(['sum', 'count'])
+        span = pd.Series(timestamps).groupby(buildings).agg(['min', 'max'])
+
+        for (name, day), row in zip(by_day.index, by_day.itertuples(index=False)):
+            stats = self.buildings.setdefault(name, self._empty_stats())
+            stats['count'] += int(row.count)
+            stats['sum'] += float(row.sum)
+            stats['min'] = min(stats['min'], float(row.min))
+            stats['max'] = max(stats['max'], float(row.max))
+            bucket = stats['daily'].setdefault(str(np.datetime64(day, 'D')), [0.0, 0, -np.inf])
+            bucket[0] += float(row.sum)
+            bucket[1] += int(row.count)
+            bucket[2] = max(bucket[2], float(row.max))
+        for (name, hour), row in zip(by_hour.index, by_hour.itertuples(index=False)):
+            bucket = self.buildings[name]['hourly'][hour]
+            bucket[0] += float(row.sum)
+            bucket[1] += int(row.count)
+        for name, row in zip(span.index, span.itertuples(index=False)):
+            self._extend_span(self.buildings[name], pd.Timestamp(row.min), pd.Timestamp(row.max))
+
+    @staticmethod
+    def _extend_span(stats, first, last):
+        if stats['first'] is None or first < pd.Timestamp(stats['first']):
+            stats['first'] = first.isoformat()
+        if stats['last'] is None or last > pd.Timestamp(stats['last']):
+            stats['last'] = last.isoformat()
+
+    def merge(self, other):
+        """Adds the accumulators of another RunningAggregates into this one."""
+        for name, theirs in other.buildings.items():
+            stats = self.buildings.setdefault(name, self._empty_stats())
+            stats['count'] += theirs['count']
+            stats['sum'] += theirs['sum']
+            stats['min'] = min(stats['min'], theirs['min'])
+            stats['max'] = max(stats['max'], theirs['max'])
+            if theirs['first'] is not None:
+                self._extend_span(stats, pd.Timestamp(theirs['first']), pd.Timestamp(theirs['last']))
+            for day, (day_sum, day_count, day_max) in theirs['daily'].items():
+                bucket = stats['daily'].setdefault(day, [0.0, 0, -np.inf])
+                bucket[0] += day_sum
+                bucket[1] += day_count
+                bucket[2] = max(bucket[2], day_max)
+            for bucket, (hour_sum, hour_count) in zip(stats['hourly'], theirs['hourly']):
+                bucket[0] += hour_sum
+                bucket[1] += hour_count
+
+    def drop_building(self, name):
+        """Forgets a building so it can be rebuilt from a full re-read of its file."""
+        self.buildings.pop(name, None)
+
+    def building_summary(self):
+        """Same table as building_wise_summary, built from the running totals."""
+        if not self.buildings:
+            return pd.DataFrame()
+        summary = pd.DataFrame.from_dict(
+            {name: {'mean': s['sum'] / s['count'], 'min': s['min'], 'max': s['max'], 'Total_kwh': s['sum']}
+             for name, s in self.buildings.items()}, orient='index')
+        summary.index.name = 'Building'
+        return summary.sort_values(by='Total_kwh', ascending=False)
+
+    def _campus_daily(self):
+        """Campus-wide daily buckets as a DataFrame with sum, count and max columns."""
+        frames = [pd.DataFrame.from_dict(s['daily'], orient='index', columns=['sum', 'count', 'max'])
+                  for s in self.buildings.values() if s['daily']]
+        if not frames:
+            return pd.DataFrame()
+        daily = pd.concat(frames).groupby(level=0).agg({'sum': 'sum', 'count': 'sum', 'max': 'max'})
+        daily.index = pd.to_datetime(daily.index).rename('Timestamp')
+        return daily
+
+    def daily_totals(self):
+        """Same series as calculate_daily_totals, built from the daily buckets."""
+        daily = self._campus_daily()
+        if daily.empty:
+            return pd.DataFrame()
+        return daily['sum'].resample('D').sum().rename('Daily_Total_kwh')
+
+    def weekly_aggregates(self):
+        """Same table as calculate_weekly_aggregates, built from the daily buckets."""
+        daily = self._campus_daily()
+        if daily.empty:
+            return pd.DataFrame()
+        weekly = daily.resample('W').agg({'sum': 'sum', 'count': 'sum', 'max': 'max'})
+        weekly['mean'] = weekly['sum'] / weekly['count'].where(weekly['count'] > 0)
+        return weekly[['sum', 'mean', 'max']]
+
+    def peak_hour(self):
+        """Hour of day with the highest campus-wide mean reading (None without data)."""
+        if not self.buildings:
+            return None
+        hourly = np.array([s['hourly'] for s in self.buildings.values()]).sum(axis=0)
+        sums, counts = hourly[:, 0], hourly[:, 1]
+        if not counts.any():
+            return None
+        means = np.full(24, -np.inf)
+        np.divide(sums, counts, out=means, where=counts > 0)
+        return int(np.argmax(means))
+
+    def period(self):
+        """First and last reading timestamps across all buildings."""
+        spans = [(s['first'], s['last']) for s in self.buildings.values() if s['first'] is not None]
+        if not spans:
+            return None, None
+        return min(pd.Timestamp(f) for f, _ in spans), max(pd.Timestamp(l) for _, l in spans)
+
+    def save(self, path):
+        _write_atomic(path, json.dumps(self.buildings).encode('utf-8'))
+
+    @classmethod
+    def load(cls, path):
+        aggregates = cls()
+        aggregates.buildings = json.loads(path.read_text(encoding='utf-8'))
+        return aggregates
+
+def _write_atomic(path, data):
+    """Writes bytes to a temporary file and renames it over path."""
+    tmp_path = path.with_name(path.name + '.tmp')
+    tmp_path.write_bytes(data)
+    os.replace(tmp_path, path)
+
+def _file_fingerprint(file_path, length):
+    """Hash of the first bytes of a file, used to tell appends from rewrites."""
+    with file_path.open('rb') as f:
+        return hashlib.sha1(f.read(min(length, FINGERPRINT_BYTES))).hexdigest()
+
+def _is_append(file_path, entry, size):
+    """True if the file only grew past the manifest offset (same leading bytes, clean line break)."""
+    if size < entry['offset'] or _file_fingerprint(file_path, entry['offset']) != entry['fingerprint']:
+        return False
+    if entry['offset'] == 0 or size == entry['offset']:
+        return True
+    with file_path.open('rb') as f:
+        f.seek(entry['offset'] - 1)
+        boundary = f.read(2)
+    # Text glued onto an unterminated last line would parse differently from a full read
+    return boundary[:1] == b'\n' or boundary[1:2] in (b'\n', b'\r')
+
+def _plan_changed_files(csv_files, manifest):
+    """Works out which CSVs changed since the manifest and where to resume reading each one.
+
+    Returns a dict with the files to parse and their start offsets and known
+    columns, their stat results, the manifest entries of the unchanged files and
+    the buildings whose files were rewritten or removed (to be rebuilt).
+    """
+    plan = {'files': [], 'starts': [], 'columns': [], 'stats': {}, 'manifest': {}, 'stale': set()}
+    for file_path in csv_files:
+        stat = file_path.stat()
+        entry = manifest.get(file_path.name)
+        if entry and stat.st_size == entry['size'] and stat.st_mtime_ns == entry['mtime_ns']:
+            plan['manifest'][file_path.name] = entry
+            continue
+        if entry and _is_append(file_path, entry, stat.st_size):
+            plan['starts'].append(entry['offset'])
+            plan['columns'].append(entry['columns'])
+        else:
+            if entry:
+                logging.info(f"{file_path.name} changed before the last consumed offset: re-reading it in full.")
+                plan['stale'].add(entry['building'])
+            plan['starts'].append(0)
+            plan['columns'].append(None)
+        plan['files'].append(file_path)
+        plan['stats'][file_path.name] = stat
+    # Buildings whose files disappeared are dropped as well
+    plan['stale'].update(entry['building'] for name, entry in manifest.items()
+                         if name not in {f.name for f in csv_files})
+    return plan
+
+def _manifest_entry(data_dir, result, stat):
+    """Manifest record for a file parsed up to result['end_offset']."""
+    return {
+        'building': result['building'],
+        # A held-back partial last line keeps the size short of the file, so the next run looks again
+        'size': min(stat.st_size, result['end_offset']),
+        'mtime_ns': stat.st_mtime_ns,
+        'offset': result['end_offset'],
+        'columns': result['columns'],
+        'fingerprint': _file_fingerprint(data_dir / result['file'], result['end_offset']),
+    }
+
+def _touched_partitions(frames):
+    """(building, 'YYYY-MM') store partitions that the given per-file frames add rows to."""
+    touched = set()
+    for frame in frames:
+        if frame.empty:
+            continue
+        months = np.unique(frame.index.to_numpy().astype('datetime64[M]')).astype(str)
+        touched.update((frame['Building'].iloc[0], month) for month in months)
+    return touched
+
+def _save_ingest_state(output_dir, df_combined, aggregates, manifest, touched=None, stale_buildings=()):
+    """Persists the columnar store, running aggregates and manifest (touched=None rewrites the whole store)."""
+    store_dir = output_dir / CLEANED_STORE_DIR
+    if touched is None:
+        write_columnar_store(df_combined, store_dir)
+    else:
+        write_columnar_store(df_combined, store_dir, partitions=touched, drop_buildings=stale_buildings)
+    aggregates.save(output_dir / AGGREGATES_FILE)
+    _write_atomic(output_dir / MANIFEST_FILE, json.dumps(manifest, indent=2).encode('utf-8'))
+
+def ingest_incremental(data_dir, output_dir=None, full_rebuild=False,
+                       workers=INGEST_WORKERS, timestamp_format=TIMESTAMP_FORMAT):
+    """Ingests only the rows appended to each CSV since the last run.
+
+    A manifest in output_dir records each file's size, mtime and the byte offset
+    consumed so far. Appended tails are parsed and merged into the persisted
+    cleaned dataset (the binary columnar store in output_dir), and the RunningAggregates are updated with the new rows only.
+    Files that shrank or were rewritten are re-read in full. full_rebuild ignores
+    all saved state. Returns (df_combined, aggregates); df_combined keeps
+    Usage_kwh as float64 because it is what gets persisted (see compact_usage).
+    output_dir defaults to the current OUTPUT_DIR.
+    """
+    output_dir = OUTPUT_DIR if output_dir is None else Path(output_dir)
+    manifest_path = output_dir / MANIFEST_FILE
+    store_dir = output_dir / CLEANED_STORE_DIR
+    aggregates_path = output_dir / AGGREGATES_FILE
+
+    manifest, df_stored, aggregates = {}, None, RunningAggregates()
+    if full_rebuild:
+        logging.info("Full rebuild requested: ignoring the ingest manifest.")
+    elif manifest_path.exists() and (store_dir / STORE_INDEX_FILE).exists() and aggregates_path.exists():
+        manifest = json.loads(manifest_path.read_text(encoding='utf-8'))
+        df_stored = load_columnar_store(store_dir, usage_dtype='float64')
+        aggregates = RunningAggregates.load(aggregates_path)
+    else:
+        logging.info("No ingest manifest found: ingesting all files.")
+
+    csv_files = sorted(data_dir.glob('*.csv'))
+    if not csv_files:
+        print(f"Error: No CSV files found in the '{data_dir}' folder. Exiting.")
+        return pd.DataFrame(), aggregates
+
+    plan = _plan_changed_files(csv_files, manifest)
+    new_manifest, stale_buildings, stats = plan['manifest'], plan['stale'], plan['stats']
+    to_parse = plan['files']
+
+    new_frames = []
+    for result in _parse_files(to_parse, workers, timestamp_format, plan['starts'], plan['columns']):
+        frame = _log_file_result(result)
+        if frame is None:
+            # Keep the previous offset so the tail is retried on the next run
+            entry = manifest.get(result['file'])
+            if entry and entry['building'] not in stale_buildings:
+                new_manifest[result['file']] = entry
+            continue
+        new_frames.append(frame)
+        new_manifest[result['file']] = _manifest_entry(data_dir, result, stats[result['file']])
+
+    if df_stored is not None and stale_buildings:
+        df_stored = df_stored[~df_stored['Building'].isin(stale_buildings)]
+    for name in stale_buildings:
+        aggregates.drop_building(name)
+
+    new_frames = [f for f in new_frames if not f.empty]
+    if new_frames:
+        aggregates.update(pd.concat(new_frames))
+    frames = ([df_stored] if df_stored is not None and not df_stored.empty else []) + new_frames
+    df_combined = combine_frames(frames, usage_dtype='float64')
+
+    output_dir.mkdir(exist_ok=True)
+    # Only the building/month partitions that received rows are rewritten
+    touched = None if df_stored is None else _touched_partitions(new_frames)
+    _save_ingest_state(output_dir, df_combined, aggregates, new_manifest, touched, stale_buildings)
+
+    new_rows = sum(len(f) for f in new_frames)
+    print(f"Ingested {new_rows} new records from {len(to_parse)} changed file(s); "
+          f"{len(csv_files) - len(to_parse)} file(s) unchanged.")
+    print(f"Total records in combined DataFrame: {len(df_combined)}")
+    return df_combined, aggregates
+
+# --- Out-of-Core Streaming Aggregation ---
+
+def stream_aggregate(data_dir, chunk_rows=STREAM_CHUNK_ROWS, timestamp_format=TIMESTAMP_FORMAT):
+    """Aggregates every meter file chunk by chunk without building the combined DataFrame.
+
+    Each file is read in chunks of at most chunk_rows rows, cleaned like
+    ingest_data and folded into RunningAggregates, so peak memory depends on
+    chunk_rows and not on the size of the archive. Files are validated and logged
+    the same way as in ingest_data; a rejected file contributes nothing.
+    """
+    aggregates = RunningAggregates()
+    csv_files = sorted(data_dir.glob('*.csv'))
+    if not csv_files:
+        print(f"Error: No CSV files found in the '{data_dir}' folder. Exiting.")
+        return aggregates
+
     for file_path in csv_files:
-        # FIX: Use the filename (replacing underscores with spaces) as the building name
         building_name = file_path.stem.replace('_', ' ').title()
-        print(f"Processing data for: {building_name}")
+        result = {'building': building_name, 'file': file_path.name, 'frame': None,
+                  'bad_lines': 0, 'dropped_rows': 0, 'error': None}
+        file_aggregates = RunningAggregates()
         try:
-            # Task 1: Handle corrupt data with on_bad_lines='skip'
-            df = pd.read_csv(file_path, on_bad_lines='skip')
-            
-            # Basic validation: Check for the required energy usage columns
-            if 'Timestamp' not in df.columns or 'Usage_kwh' not in df.columns:
-                logging.error(f"Skipping {file_path.name}: Missing required 'Timestamp' or 'Usage_kwh' columns.")
-                continue
-
-            # Task 1: Add metadata
-            df['Building'] = building_name
-            df['Timestamp'] = pd.to_datetime(df['Timestamp'], errors='coerce') # Errors='coerce' for handling bad dates
-            # Ensure Usage_kwh is numeric
-            df['Usage_kwh'] = pd.to_numeric(df['Usage_kwh'], errors='coerce') 
-            
-            df = df.dropna(subset=['Timestamp', 'Usage_kwh'])
-
-            all_data.append(df)
-            logging.info(f"Successfully ingested data for {building_name}.")
-            
+            with warnings.catch_warnings(record=True) as caught:
+                warnings.simplefilter('always', pd.errors.ParserWarning)
+                reader = pd.read_csv(file_path, on_bad_lines='warn', dtype={'Timestamp': str},
+                                     chunksize=chunk_rows)
+                for chunk in reader:
+                    result['bad_lines'] += sum(str(w.message).count('Skipping line') for w in caught
+                                               if issubclass(w.category, pd.errors.ParserWarning))
+                    caught.clear()
+                    if 'Timestamp' not in chunk.columns or 'Usage_kwh' not in chunk.columns:
+                        result['error'] = f"Skipping {file_path.name}: Missing required 'Timestamp' or 'Usage_kwh' columns."
+                        break
+                    chunk, dropped = _clean_readings(chunk, building_name, timestamp_format)
+                    result['dropped_rows'] += dropped
+                    file_aggregates.update(chunk.set_index('Timestamp'))
         except FileNotFoundError:
-            logging.error(f"File not found: {file_path.name}")
+            result['error'] = f"File not found: {file_path.name}"
         except Exception as e:
-            logging.error(f"Error processing {file_path.name}: {e}")
+            result['error'] = f"Error processing {file_path.name}: {e}"
+        _log_file_result(result)
+        if not result['error']:
+            aggregates.merge(file_aggregates)
 
-    if not all_data:
+    print(f"Total records aggregated: {sum(s['count'] for s in aggregates.buildings.values())}")
+    return aggregates
+
+# --- Persistence: Binary Columnar Store ---
+
+STORE_INDEX_FILE = '_index.json'
+
+def _pyarrow():
+    """(pyarrow, pyarrow.parquet), or (None, None) when pyarrow is not installed."""
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError: # Parquet is optional; the .npy store backend only needs NumPy
+        return None, None
+    return pa, pq
+
+def _store_backend(backend=STORE_BACKEND):
+    if backend == 'auto':
+        return 'parquet' if _pyarrow()[1] is not None else 'npy'
+    if backend == 'parquet' and _pyarrow()[1] is None:
+        raise ImportError("The 'parquet' store backend requires pyarrow.")
+    return backend
+
+def _partition_frames(df, partitions=None):
+    """Yields (building, 'YYYY-MM', frame) for every building/month partition of df."""
+    if partitions is not None:
+        df = df[df['Building'].isin({name for name, _ in partitions})]
+    months = df.index.to_numpy().astype('datetime64[M]').astype(str)
+    for (name, month), part in df.groupby(['Building', months], sort=False):
+        if partitions is None or (name, month) in partitions:
+            yield name, month, part
+
+def write_columnar_store(df, store_dir, partitions=None, drop_buildings=(), backend=STORE_BACKEND):
+    """Writes the cleaned data as one binary file set per building and month.
+
+    Only the Timestamp index and Usage_kwh column are stored; the building comes
+    from the partition. With partitions (a set of (building, 'YYYY-MM') pairs)
+    only those partitions are rewritten, and drop_buildings are removed. Without
+    it the whole store is replaced.
+    """
+    backend = _store_backend(backend)
+    index_path = store_dir / STORE_INDEX_FILE
+    if partitions is None and store_dir.exists():
+        shutil.rmtree(store_dir)
+    store_dir.mkdir(parents=True, exist_ok=True)
+    index = json.loads(index_path.read_text(encoding='utf-8')) if index_path.exists() else {}
+
+    for name in drop_buildings:
+        index = {key: meta for key, meta in index.items() if meta['building'] != name}
+        shutil.rmtree(store_dir / name.replace(' ', '_'), ignore_errors=True)
+
+    for name, month, part in _partition_frames(df, partitions):
+        relative = Path(name.replace(' ', '_')) / month
+        timestamps = part.index.to_numpy().astype('datetime64[ns]')
+        usage = part['Usage_kwh'].to_numpy(dtype=np.float64)
+        if backend == 'parquet':
+            relative = relative.with_suffix('.parquet')
+            (store_dir / relative).parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = store_dir / relative.with_suffix('.parquet.tmp')
+            pa, pq = _pyarrow()
+            pq.write_table(pa.table({'Timestamp': timestamps, 'Usage_kwh': usage}), tmp_path)
+            os.replace(tmp_path, store_dir / relative)
+        else:
+            (store_dir / relative).mkdir(parents=True, exist_ok=True)
+            for column, values in (('Timestamp', timestamps), ('Usage_kwh', usage)):
+                buffer = io.BytesIO()
+                np.save(buffer, values)
+                _write_atomic(store_dir / relative / f'{column}.npy', buffer.getvalue())
+        index[f'{name}/{month}'] = {'building': name, 'month': month, 'rows': len(part),
+                                    'backend': backend, 'path': relative.as_posix()}
+
+    _write_atomic(index_path, json.dumps(index, indent=2, sort_keys=True).encode('utf-8'))
+    logging.info(f"Columnar store updated in {store_dir} ({backend}, {len(index)} partitions).")
+
+def load_columnar_store(store_dir, buildings=None, start=None, end=None, usage_dtype=None):
+    """Loads the cleaned data back from the columnar store.
+
+    Only the partitions overlapping the requested buildings and [start, end]
+    time range are opened; .npy partitions are memory-mapped. Returns the same
+    layout as ingest_data (see combine_frames), with Usage_kwh as usage_dtype
+    (USAGE_DTYPE by default).
+    """
+    index_path = store_dir / STORE_INDEX_FILE
+    if not index_path.exists():
         return pd.DataFrame()
-        
-    df_combined = pd.concat(all_data, ignore_index=True)
-    df_combined = df_combined.set_index('Timestamp').sort_index()
-    print(f"Total records in combined DataFrame: {len(df_combined)}")
-    return df_combined
+    index = json.loads(index_path.read_text(encoding='utf-8'))
+    start = pd.Timestamp(start) if start is not None else None
+    end = pd.Timestamp(end) if end is not None else None
+
+    frames = []
+    # Building-then-month order already matches the combine_frames layout
+    for meta in sorted(index.values(), key=lambda m: (m['building'], m['month'])):
+        if buildings is not None and meta['building'] not in buildings:
+            continue
+        if start is not None and meta['month'] < start.strftime('%Y-%m'):
+            continue
+        if end is not None and meta['month'] > end.strftime('%Y-%m'):
+            continue
+        path = store_dir / meta['path']
+        if meta['backend'] == 'parquet':
+            table = _pyarrow()[1].read_table(path, memory_map=True)
+            timestamps = table.column('Timestamp').to_numpy()
+            usage = table.column('Usage_kwh').to_numpy()
+        else:
+            timestamps = np.load(path / 'Timestamp.npy', mmap_mode='r')
+            usage = np.load(path / 'Usage_kwh.npy', mmap_mode='r')
+        # Partitions are sorted, so the time range is trimmed with a binary search
+        lo = np.searchsorted(timestamps, start.to_datetime64()) if start is not None else 0
+        hi = np.searchsorted(timestamps, end.to_datetime64(), side='right') if end is not None else len(timestamps)
+        if hi <= lo:
+            continue
+        frame = pd.DataFrame({'Usage_kwh': usage[lo:hi], 'Building': meta['building']},
+                             index=pd.DatetimeIndex(timestamps[lo:hi], name='Timestamp'))
+        frames.append(frame)
+    return combine_frames(frames, usage_dtype)
 
 # --- Task 2: Core Aggregation Logic ---
 
@@ -138,28 +1102,649 @@ def calculate_weekly_aggregates(df):
     # Use .resample('W') for weekly aggregates
     return df['Usage_kwh'].resample('W').agg(['sum', 'mean', 'max'])
 
-def building_wise_summary(df):
-    """Creates a summary table per building (mean, min, max, total)."""
+def building_wise_summary(df, cube=None):
+    """Creates a summary table per building (mean, min, max, total).
+
+    When an AggregationCube of df is passed, the table is derived from it.
+    """
     if df.empty: return pd.DataFrame()
+    if cube is not None:
+        return cube.building_summary()
     summary = df.groupby('Building')['Usage_kwh'].agg(['mean', 'min', 'max', 'sum']).rename(
         columns={'sum': 'Total_kwh'}
     ).sort_values(by='Total_kwh', ascending=False)
     return summary
 
+# --- Task 2b: Shared Aggregation Cube ---
+
+def _run_codes(values):
+    """Codes for the runs of equal values in a sorted array, plus the distinct values."""
+    if len(values) == 0:
+        return np.empty(0, dtype=np.intp), values
+    starts = np.empty(len(values), dtype=bool)
+    starts[0] = True
+    np.not_equal(values[1:], values[:-1], out=starts[1:])
+    return np.cumsum(starts) - 1, values[starts]
+
+class AggregationCube:
+    """Building x hour-bucket sums, counts, minima and maxima built in one pass.
+
+    The dashboard charts, the building summary and the peak hour are all derived
+    from this cube, so the combined frame is scanned (and never copied) once.
+    """
+    def __init__(self, df):
+        timestamps = df.index.to_numpy().astype('datetime64[h]')
+        usage = df['Usage_kwh'].to_numpy(dtype=np.float64)
+        building_codes, self.buildings = pd.factorize(df['Building'], sort=True)
+        self.buildings = pd.Index(np.asarray(self.buildings), name='Building')
+        # Hour codes from a presence table over the hour span: O(rows) in any row order
+        hour_numbers = timestamps.astype(np.int64)
+        first_hour = hour_numbers.min() if len(hour_numbers) else 0
+        present = np.bincount(hour_numbers - first_hour) > 0
+        hour_codes = (np.cumsum(present) - 1)[hour_numbers - first_hour]
+        self.hours = (first_hour + np.flatnonzero(present)).astype('datetime64[h]')
+
+        shape = (len(self.buildings), len(self.hours))
+        cells = building_codes * shape[1] + hour_codes
+        size = shape[0] * shape[1]
+        self.sum = np.bincount(cells, weights=usage, minlength=size).reshape(shape)
+        self.count = np.bincount(cells, minlength=size).reshape(shape)
+        self.min = np.full(size, np.inf)
+        self.max = np.full(size, -np.inf)
+        np.minimum.at(self.min, cells, usage)
+        np.maximum.at(self.max, cells, usage)
+        self.min, self.max = self.min.reshape(shape), self.max.reshape(shape)
+
+    def _collapse(self, bucket_codes, n_buckets):
+        """Sums and counts per building after mapping every hour bucket to a coarser bucket."""
+        sums = np.zeros((len(self.buildings), n_buckets))
+        counts = np.zeros((len(self.buildings), n_buckets), dtype=np.int64)
+        np.add.at(sums.T, bucket_codes, self.sum.T)
+        np.add.at(counts.T, bucket_codes, self.count.T)
+        return sums, counts
+
+    def building_summary(self):
+        """Same table as building_wise_summary."""
+        totals = self.sum.sum(axis=1)
+        summary = pd.DataFrame({'mean': totals / self.count.sum(axis=1),
+                                'min': self.min.min(axis=1),
+                                'max': self.max.max(axis=1),
+                                'Total_kwh': totals}, index=self.buildings)
+        return summary.sort_values(by='Total_kwh', ascending=False)
+
+    def daily_by_building(self):
+        """Daily kWh per building (columns), zero-filled over the whole period."""
+        days = self.hours.astype('datetime64[D]')
+        all_days = np.arange(days.min(), days.max() + 1)
+        sums, _ = self._collapse((days - all_days[0]).astype(np.intp), len(all_days))
+        return pd.DataFrame(sums.T, index=pd.DatetimeIndex(all_days, name='Timestamp'),
+                            columns=self.buildings)
+
+    def daily_totals(self):
+        """Same series as calculate_daily_totals."""
+        return self.daily_by_building().sum(axis=1).rename('Daily_Total_kwh')
+
+    def average_weekly_by_building(self):
+        """Mean weekly (W-SUN) total per building over the weeks with readings."""
+        days = self.hours.astype('datetime64[D]')
+        weekday = (days.astype(np.int64) + 3) % 7 # 1970-01-01 was a Thursday; Monday = 0
+        week_codes, _ = _run_codes(days + (6 - weekday))
+        sums, counts = self._collapse(week_codes, week_codes.max() + 1)
+        weekly = np.where(counts > 0, sums, np.nan)
+        return pd.Series(np.nanmean(weekly, axis=1), index=self.buildings, name='Usage_kwh')
+
+    def hourly_mean_by_building(self):
+        """Mean reading per building and hour of day, as rows of Building, Hour, Usage_kwh."""
+        hour_of_day = (self.hours.astype(np.int64) % 24).astype(np.intp)
+        sums, counts = self._collapse(hour_of_day, 24)
+        building, hour = np.nonzero(counts)
+        return pd.DataFrame({'Building': self.buildings[building], 'Hour': hour,
+                             'Usage_kwh': sums[building, hour] / counts[building, hour]})
+
+    def peak_hour(self):
+        """Hour of day with the highest campus-wide mean reading."""
+        hour_of_day = (self.hours.astype(np.int64) % 24).astype(np.intp)
+        sums = np.bincount(hour_of_day, weights=self.sum.sum(axis=0), minlength=24)
+        counts = np.bincount(hour_of_day, weights=self.count.sum(axis=0), minlength=24)
+        means = np.full(24, -np.inf)
+        np.divide(sums, counts, out=means, where=counts > 0)
+        return int(np.argmax(means))
+
+# --- Rollup Store and Time-Range Queries ---
+
+ROLLUP_LEVELS = ('month', 'week', 'day', 'hour') # Coarsest first
+ROLLUP_COLUMNS = ('start', 'sum', 'count', 'min', 'max')
+
+def _bucket_floor(t, level):
+    """Start of the hour/day/week (Monday)/month bucket containing t (datetime64[h])."""
+    if level == 'hour':
+        return t.astype('datetime64[h]')
+    if level == 'month':
+        return t.astype('datetime64[M]').astype('datetime64[h]')
+    days = t.astype('datetime64[D]')
+    if level == 'week':
+        days = days - (days.astype(np.int64) + 3) % 7 # 1970-01-01 was a Thursday; Monday = 0
+    return days.astype('datetime64[h]')
+
+def _bucket_next(t, level):
+    """Start of the bucket after the one starting at t."""
+    if level == 'month':
+        return (t.astype('datetime64[M]') + 1).astype('datetime64[h]')
+    step = {'hour': 1, 'day': 24, 'week': 24 * 7}[level]
+    return t + np.timedelta64(step, 'h')
+
+def _bucket_ceil(t, level):
+    floor = _bucket_floor(t, level)
+    return floor if floor == t else _bucket_next(floor, level)
+
+def _decompose_range(start, end, levels=ROLLUP_LEVELS):
+    """Splits [start, end) into (level, a, b) pieces using the coarsest aligned buckets."""
+    if start >= end:
+        return []
+    level, finer = levels[0], levels[1:]
+    if not finer:
+        return [(level, start, end)]
+    a, b = _bucket_ceil(start, level), _bucket_floor(end, level)
+    if a >= b:
+        return _decompose_range(start, end, finer)
+    return _decompose_range(start, a, finer) + [(level, a, b)] + _decompose_range(b, end, finer)
+
+def build_rollup_store(cube, rollup_dir):
+    """Writes hourly, daily, weekly and monthly sum/count/min/max buckets per building.
+
+    The hourly level comes straight from the AggregationCube; coarser levels are
+    reduced from it with np.add.reduceat / np.minimum.reduceat. Each level is a
+    directory of .npy columns holding the buckets of all buildings back to back
+    (sorted by start within a building), with per-building offsets.
+    """
+    rollup_dir.mkdir(parents=True, exist_ok=True)
+    per_level = {level: {column: [] for column in ROLLUP_COLUMNS} for level in ROLLUP_LEVELS}
+    offsets = {level: [0] for level in ROLLUP_LEVELS}
+    for b in range(len(cube.buildings)):
+        observed = cube.count[b] > 0
+        hourly = {'start': cube.hours[observed], 'sum': cube.sum[b, observed],
+                  'count': cube.count[b, observed], 'min': cube.min[b, observed],
+                  'max': cube.max[b, observed]}
+        for level in ROLLUP_LEVELS:
+            if level == 'hour':
+                buckets = hourly
+            else:
+                _, bucket_starts = _run_codes(_bucket_floor(hourly['start'], level))
+                run_starts = np.searchsorted(_bucket_floor(hourly['start'], level), bucket_starts)
+                buckets = {'start': bucket_starts,
+                           'sum': np.add.reduceat(hourly['sum'], run_starts),
+                           'count': np.add.reduceat(hourly['count'], run_starts),
+                           'min': np.minimum.reduceat(hourly['min'], run_starts),
+                           'max': np.maximum.reduceat(hourly['max'], run_starts)}
+            for column in ROLLUP_COLUMNS:
+                per_level[level][column].append(buckets[column])
+            offsets[level].append(offsets[level][-1] + len(buckets['start']))
+
+    for level in ROLLUP_LEVELS:
+        level_dir = rollup_dir / level
+        level_dir.mkdir(exist_ok=True)
+        columns = {column: np.concatenate(parts) for column, parts in per_level[level].items()}
+        columns['start'] = columns['start'].astype('datetime64[h]')
+        # Prefix sums let a run of buckets be summed in O(1)
+        columns['cumsum'] = np.concatenate([[0.0], np.cumsum(columns['sum'])])
+        columns['cumcount'] = np.concatenate([[0], np.cumsum(columns['count'])])
+        columns['offsets'] = np.asarray(offsets[level], dtype=np.int64)
+        for column, values in columns.items():
+            buffer = io.BytesIO()
+            np.save(buffer, values)
+            _write_atomic(level_dir / f'{column}.npy', buffer.getvalue())
+    _write_atomic(rollup_dir / 'buildings.json', json.dumps(list(cube.buildings)).encode('utf-8'))
+    logging.info(f"Rollup store written to {rollup_dir} for {len(cube.buildings)} buildings.")
+
+class RollupStore:
+    """Answers building/time-range questions from the persisted rollups.
+
+    Every requested range is split into the coarsest aligned buckets available
+    (months, then weeks, days and hours); each piece is located with a binary
+    search on the sorted bucket starts and summed from prefix sums, so no raw
+    readings are touched. Range bounds are rounded to whole hours.
+    """
+    def __init__(self, rollup_dir):
+        self.rollup_dir = rollup_dir
+        self.buildings = json.loads((rollup_dir / 'buildings.json').read_text(encoding='utf-8'))
+        self.levels = {}
+        for level in ROLLUP_LEVELS:
+            self.levels[level] = {column: np.load(rollup_dir / level / f'{column}.npy', mmap_mode='r')
+                                  for column in ROLLUP_COLUMNS + ('cumsum', 'cumcount', 'offsets')}
+
+    def _segment(self, level, b, a, z):
+        """Global index range [lo, hi) of building b's buckets at level starting in [a, z)."""
+        data = self.levels[level]
+        first, last = data['offsets'][b], data['offsets'][b + 1]
+        starts = data['start'][first:last]
+        return first + np.searchsorted(starts, a), first + np.searchsorted(starts, z)
+
+    def _aggregate(self, b, start, end):
+        """(sum, count, min, max) for building b over [start, end)."""
+        total, count, low, high = 0.0, 0, np.inf, -np.inf
+        for level, a, z in _decompose_range(start, end):
+            data = self.levels[level]
+            lo, hi = self._segment(level, b, a, z)
+            if hi > lo:
+                total += data['cumsum'][hi] - data['cumsum'][lo]
+                count += int(data['cumcount'][hi] - data['cumcount'][lo])
+                low = min(low, data['min'][lo:hi].min())
+                high = max(high, data['max'][lo:hi].max())
+        return total, count, low, high
+
+    def _building_rows(self, b, start, end, freq):
+        """Rows (bucket start, sum, count, min, max) for building b in freq buckets."""
+        if freq is None:
+            return [(start,) + self._aggregate(b, start, end)]
+        rows = []
+        inner_start, inner_end = _bucket_ceil(start, freq), _bucket_floor(end, freq)
+        if inner_start >= inner_end:
+            return [(_bucket_floor(start, freq),) + self._aggregate(b, start, end)]
+        if start < inner_start:
+            rows.append((_bucket_floor(start, freq),) + self._aggregate(b, start, inner_start))
+        # Whole buckets are read straight from the freq level
+        data = self.levels[freq]
+        lo, hi = self._segment(freq, b, inner_start, inner_end)
+        rows.extend(zip(data['start'][lo:hi], data['sum'][lo:hi], data['count'][lo:hi],
+                        data['min'][lo:hi], data['max'][lo:hi]))
+        if inner_end < end:
+            rows.append((inner_end,) + self._aggregate(b, inner_end, end))
+        return rows
+
+    def query(self, building=None, start=None, end=None, freq=None):
+        """Total_kwh, count, mean, min and max for one building (or the campus).
+
+        freq is None for a single total over the range, or one of 'hour', 'day',
+        'week', 'month' for one row per bucket with readings (indexed by bucket
+        start). start/end default to the whole stored period; end is exclusive.
+        """
+        if freq is not None and freq not in ROLLUP_LEVELS:
+            raise ValueError(f"freq must be one of {ROLLUP_LEVELS} or None, not {freq!r}")
+        hours = self.levels['hour']['start']
+        if len(hours) == 0:
+            return pd.DataFrame()
+        start = np.datetime64(pd.Timestamp(start), 'h') if start is not None else hours.min()
+        end = _bucket_ceil(np.datetime64(pd.Timestamp(end), 'h'), 'hour') if end is not None \
+            else hours.max() + np.timedelta64(1, 'h')
+
+        if building is None:
+            indices = range(len(self.buildings))
+        elif building in self.buildings:
+            indices = [self.buildings.index(building)]
+        else:
+            raise KeyError(f"Unknown building: {building!r}")
+        rows = [row for b in indices for row in self._building_rows(b, start, end, freq)]
+        result = pd.DataFrame(rows, columns=['Timestamp', 'Total_kwh', 'count', 'min', 'max'])
+        result = result[result['count'] > 0]
+        result['Timestamp'] = pd.to_datetime(result['Timestamp'].to_numpy().astype('datetime64[h]'))
+        result = result.groupby('Timestamp').agg({'Total_kwh': 'sum', 'count': 'sum', 'min': 'min', 'max': 'max'})
+        result['mean'] = result['Total_kwh'] / result['count']
+        return result[['Total_kwh', 'count', 'mean', 'min', 'max']]
+
+def query_energy(building=None, start=None, end=None, freq=None, rollup_dir=None):
+    """Convenience wrapper: RollupStore(rollup_dir).query(...); rollup_dir defaults to the current OUTPUT_DIR's."""
+    if rollup_dir is None:
+        rollup_dir = OUTPUT_DIR / ROLLUP_DIR # Resolved per call: init_runtime may have moved OUTPUT_DIR
+    return RollupStore(Path(rollup_dir)).query(building, start, end, freq)
+
+# --- Anomaly and Spike Detection ---
+
+HOURS_PER_WEEK = 168
+MAD_SCALE = 1.4826 # Scales the MAD to a standard deviation for normally distributed readings...
+# ...but only for many values: the MAD of n < 10 values is biased low and is multiplied by these
+# small-sample factors (Croux & Rousseeuw, 1992; index n, n/(n - 0.8) from 10 on)
+MAD_SMALL_SAMPLE = (float('nan'), float('nan'), 1.196, 1.495, 1.363, 1.206, 1.200, 1.140, 1.129, 1.107)
+
+def _hour_of_week(hour):
+    """Hour of the week (Monday 00:00 = 0) for an hour number since the epoch."""
+    return (hour + 72) % HOURS_PER_WEEK # 1970-01-01 was a Thursday
+
+def _hourly_grid(cube, buildings, start_hour, end_hour):
+    """Hourly mean reading per building on a dense hour grid from start_hour to end_hour.
+
+    The grid is padded to whole weeks so it can be reshaped to (buildings, weeks,
+    168); hours without readings are NaN. Rows follow the buildings index.
+    """
+    n_weeks = -(-(end_hour - start_hour + 1) // HOURS_PER_WEEK)
+    grid = np.full((len(buildings), n_weeks * HOURS_PER_WEEK), np.nan)
+    hours = cube.hours.astype(np.int64)
+    first = np.searchsorted(hours, start_hour)
+    b, h = np.nonzero(cube.count[:, first:])
+    grid[buildings.get_indexer(cube.buildings)[b], hours[first:][h] - start_hour] = (
+        cube.sum[:, first:][b, h] / cube.count[:, first:][b, h])
+    return grid
+
+def _nan_median(values):
+    """Median over the last axis ignoring NaN, plus the number of valid values.
+
+    One sort of the whole block replaces np.nanmedian, which is slow on short axes.
+    """
+    valid = np.count_nonzero(~np.isnan(values), axis=-1)
+    ordered = np.sort(values, axis=-1) # NaN sorts last
+    lo = (np.maximum(valid - 1, 0) // 2)[..., None]
+    hi = (valid // 2)[..., None]
+    median = (np.take_along_axis(ordered, lo, -1) + np.take_along_axis(ordered, hi, -1))[..., 0] / 2
+    return median, valid
+
+def robust_zscores(weeks, window_weeks=ANOMALY_WINDOW_WEEKS, min_weeks=ANOMALY_MIN_WEEKS):
+    """Robust z-score of every hour against the same hour of the week in the preceding weeks.
+
+    weeks has shape (buildings, weeks, 168). The baseline of week w is the median
+    and MAD of weeks w - window_weeks .. w - 1, computed for all buildings and
+    hours at once on a sliding-window view. Hours with fewer than min_weeks
+    baseline readings get NaN. Returns (z, baseline median).
+
+    A handful of weeks is too few to estimate one hour's spread on its own:
+    divided by it, clean readings exceed a 3.5 threshold about 3% of the
+    time instead of 0.05%. So each hour's MAD is corrected for its sample
+    size, taken relative to its median and averaged over the 168 hours of
+    the building's week, which assumes the noise grows with the load. The
+    spread is then widened for the uncertainty of the baseline median
+    itself (variance about pi/2n of the spread's for n weeks).
+    """
+    padding = np.full((weeks.shape[0], window_weeks, HOURS_PER_WEEK), np.nan)
+    padded = np.concatenate([padding, weeks], axis=1)
+    windows = np.lib.stride_tricks.sliding_window_view(padded, window_weeks, axis=1)[:, :weeks.shape[1]]
+    median, valid = _nan_median(windows)
+    mad, _ = _nan_median(np.abs(windows - median[..., None]))
+    n = np.maximum(valid, 1)
+    small_sample = np.asarray(MAD_SMALL_SAMPLE)[np.minimum(valid, len(MAD_SMALL_SAMPLE) - 1)]
+    spread = MAD_SCALE * np.where(valid < len(MAD_SMALL_SAMPLE), small_sample, n / (n - 0.8)) * mad
+    with np.errstate(divide='ignore', invalid='ignore'):
+        relative = spread / np.abs(median)
+    usable = (valid >= min_weeks) & np.isfinite(relative)
+    pooled = (np.where(usable, relative, 0).sum(axis=-1, keepdims=True)
+              / np.maximum(usable.sum(axis=-1, keepdims=True), 1))
+    # A zero median (a meter that is off at that hour) has no relative spread: its own MAD is used
+    spread = np.where(median != 0, pooled * np.abs(median), spread) * np.sqrt(1 + np.pi / (2 * n))
+    scale = np.maximum(spread, ANOMALY_MIN_SCALE * np.abs(median))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        z = (weeks - median) / np.maximum(scale, 1e-9)
+    z[valid < min_weeks] = np.nan
+    return z, median
+
+def detect_anomalies(cube, threshold=ANOMALY_THRESHOLD, window_weeks=ANOMALY_WINDOW_WEEKS,
+                     min_weeks=ANOMALY_MIN_WEEKS, state=None):
+    """Flags hours whose mean reading is far from the usual level for that hour of the week.
+
+    Each building's hourly series is laid out as weeks x 168 hours and scored
+    with robust_zscores, a block of buildings at a time. Hours with
+    |z| > threshold are returned as a DataFrame (Timestamp, Building,
+    Usage_kwh, Expected_kwh, Robust_z, Type) together with the rolling state
+    for the next run: the trailing window_weeks of hourly values and the hour
+    to resume from. With a state only the hours from its resume point on are
+    scored, against the saved trailing weeks. If the cube disagrees with the
+    saved weeks (a meter file was rewritten) everything is rescored. The
+    state also counts the hours scored so far (scored_hours); it stays 0
+    while no hour has min_weeks of history.
+    """
+    columns = ['Timestamp', 'Building', 'Usage_kwh', 'Expected_kwh', 'Robust_z', 'Type']
+    if len(cube.hours) == 0:
+        return pd.DataFrame(columns=columns), state
+    first_hour, last_hour = (int(h) for h in cube.hours[[0, -1]].astype(np.int64))
+    buildings = cube.buildings
+    if state is None:
+        start_hour = resume_hour = first_hour - _hour_of_week(first_hour)
+    else:
+        buildings = buildings.union(pd.Index(state['buildings'], name='Building'))
+        start_hour, resume_hour = state['first_hour'], state['resume_hour']
+    grid = _hourly_grid(cube, buildings, start_hour, max(last_hour, resume_hour - 1))
+
+    if state is not None:
+        n_saved = resume_hour - start_hour
+        saved = np.full((len(buildings), n_saved), np.nan)
+        saved[buildings.get_indexer(state['buildings'])] = state['values']
+        current = grid[:, :n_saved]
+        if (~np.isnan(current) & ~np.isclose(current, saved)).any():
+            logging.info("Readings before the anomaly resume point changed: rescoring all hours.")
+            return detect_anomalies(cube, threshold, window_weeks, min_weeks)
+        grid[:, :n_saved] = saved
+
+    weeks = grid.reshape(len(buildings), -1, HOURS_PER_WEEK)
+    first_week = (resume_hour - start_hour) // HOURS_PER_WEEK
+    context = max(first_week - window_weeks, 0)
+    # The last hour may still be filling up, so the next run scores it again
+    new_resume = max(last_hour, resume_hour)
+    frames = []
+    scored = 0
+    for lo in range(0, len(buildings), ANOMALY_BLOCK_BUILDINGS):
+        block = weeks[lo:lo + ANOMALY_BLOCK_BUILDINGS, context:]
+        z, expected = robust_zscores(block, window_weeks, min_weeks)
+        z, expected = z[:, first_week - context:], expected[:, first_week - context:]
+        values = block[:, first_week - context:]
+        grid_hours = (start_hour + (first_week + np.arange(z.shape[1]))[:, None] * HOURS_PER_WEEK
+                      + np.arange(HOURS_PER_WEEK))
+        scored += np.count_nonzero(~np.isnan(z) & (grid_hours >= resume_hour) & (grid_hours < new_resume))
+        b, w, h = np.nonzero(np.abs(z) > threshold)
+        hour = start_hour + (first_week + w) * HOURS_PER_WEEK + h
+        keep = hour >= resume_hour
+        b, w, h, hour = b[keep], w[keep], h[keep], hour[keep]
+        frames.append(pd.DataFrame({
+            'Timestamp': hour.astype('datetime64[h]').astype('datetime64[s]'),
+            'Building': buildings[lo + b],
+            'Usage_kwh': values[b, w, h],
+            'Expected_kwh': expected[b, w, h],
+            'Robust_z': z[b, w, h].round(2),
+            'Type': np.where(z[b, w, h] > 0, 'spike', 'drop'),
+        }))
+    anomalies = pd.concat(frames, ignore_index=True).sort_values(['Timestamp', 'Building'], ignore_index=True)
+
+    new_first = max(new_resume - _hour_of_week(new_resume) - window_weeks * HOURS_PER_WEEK, start_hour)
+    new_state = {
+        'buildings': np.asarray(buildings, dtype=str),
+        'first_hour': new_first,
+        'resume_hour': new_resume,
+        'values': grid[:, new_first - start_hour:new_resume - start_hour],
+        'scored_from': resume_hour,
+        'scored_hours': scored + (state['scored_hours'] if state is not None else 0),
+        'params': np.array([window_weeks, min_weeks, threshold], dtype=np.float64),
+    }
+    return anomalies, new_state
+
+def _save_anomaly_state(state, path):
+    buffer = io.BytesIO()
+    np.savez(buffer, **state)
+    _write_atomic(path, buffer.getvalue())
+
+def _load_anomaly_state(path):
+    with np.load(path) as data:
+        state = {key: data[key] for key in data.files}
+    for key in ('first_hour', 'resume_hour', 'scored_from', 'scored_hours'):
+        if key in state:
+            state[key] = int(state[key])
+    return state
+
+def load_anomalies(output_dir):
+    """anomalies.csv from the last run (None if detection has not run yet).
+
+    attrs['scored_hours'] tells "nothing was flagged" from "nothing could be
+    scored yet"; it is missing if the state file is.
+    """
+    path = output_dir / ANOMALIES_FILE
+    if not path.exists():
+        return None
+    anomalies = pd.read_csv(path, parse_dates=['Timestamp'])
+    state_path = output_dir / ANOMALY_STATE_FILE
+    if state_path.exists():
+        state = _load_anomaly_state(state_path)
+        if 'scored_hours' in state:
+            anomalies.attrs['scored_hours'] = state['scored_hours']
+    return anomalies
+
+def run_anomaly_detection(cube, output_dir=None, full_rebuild=False):
+    """Anomaly stage of the pipeline: writes anomalies.csv and keeps the rolling state between runs.
+
+    Flags from earlier runs are kept for the hours that were already scored;
+    only newer hours are scored again. full_rebuild (or changed thresholds)
+    discards the saved state. output_dir defaults to the current OUTPUT_DIR.
+    """
+    output_dir = OUTPUT_DIR if output_dir is None else Path(output_dir)
+    state_path = output_dir / ANOMALY_STATE_FILE
+    anomalies_path = output_dir / ANOMALIES_FILE
+    params = np.array([ANOMALY_WINDOW_WEEKS, ANOMALY_MIN_WEEKS, ANOMALY_THRESHOLD], dtype=np.float64)
+    state = None
+    if not full_rebuild and state_path.exists() and anomalies_path.exists():
+        state = _load_anomaly_state(state_path)
+        if not np.array_equal(state['params'], params) or 'scored_hours' not in state:
+            logging.info("Anomaly settings changed: rescoring all hours.")
+            state = None
+
+    anomalies, new_state = detect_anomalies(cube, state=state)
+    if state is not None:
+        previous = pd.read_csv(anomalies_path, parse_dates=['Timestamp'])
+        previous = previous[previous['Timestamp'] < np.datetime64(new_state['scored_from'], 'h')]
+        if not previous.empty:
+            anomalies = pd.concat([previous, anomalies], ignore_index=True)
+    output_dir.mkdir(exist_ok=True)
+    anomalies.to_csv(anomalies_path, index=False)
+    if new_state is not None:
+        _save_anomaly_state(new_state, state_path)
+    anomalies.attrs['scored_hours'] = new_state['scored_hours'] if new_state is not None else 0
+    logging.info(f"Anomaly detection: {len(anomalies)} flagged hours written to {anomalies_path}.")
+    print(f"- {len(anomalies)} anomalous hours flagged and exported to {anomalies_path}")
+    return anomalies
+
+# --- Demand Analytics: Hour-of-Week Profiles and Peaks ---
+
+WEEKDAY_NAMES = ('Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat', 'Sun')
+
+class DemandProfile:
+    """Hour-of-week load profiles, peak intervals, coincident peak and load factor per building.
+
+    Load is the kWh of one building in one clock hour (the cube's hourly sums),
+    i.e. its average demand over that hour. Everything is derived from the
+    building x hour matrices of an AggregationCube: profiles with one
+    np.bincount over building * 168 + hour-of-week codes, peaks with
+    np.argpartition along the hour axis, so the readings are not scanned again.
+    """
+    def __init__(self, cube, top_n=PEAK_TOP_N):
+        self.buildings = cube.buildings
+        self.hours = cube.hours
+        self.top_n = top_n
+        self.observed = cube.count > 0
+        self.load = np.where(self.observed, cube.sum, -np.inf)
+
+        b, h = np.nonzero(self.observed)
+        cells = b * HOURS_PER_WEEK + _hour_of_week(cube.hours.astype(np.int64))[h]
+        size = len(self.buildings) * HOURS_PER_WEEK
+        shape = (len(self.buildings), HOURS_PER_WEEK)
+        self.profile_sum = np.bincount(cells, weights=cube.sum[b, h], minlength=size).reshape(shape)
+        self.profile_hours = np.bincount(cells, minlength=size).reshape(shape)
+        self.profile_max = np.full(size, -np.inf)
+        np.maximum.at(self.profile_max, cells, cube.sum[b, h])
+        self.profile_max = self.profile_max.reshape(shape)
+
+        self.campus_load = cube.sum.sum(axis=0)
+        self.campus_peak_index = int(np.argmax(self.campus_load)) if len(self.hours) else None
+
+    def load_profiles(self):
+        """Mean and max hourly kWh per building and hour of the week (Monday 00:00 = 0), long format."""
+        building, slot = np.nonzero(self.profile_hours)
+        hours = self.profile_hours[building, slot]
+        return pd.DataFrame({'Building': self.buildings[building],
+                             'Hour_of_week': slot,
+                             'Day': np.asarray(WEEKDAY_NAMES)[slot // 24],
+                             'Hour': slot % 24,
+                             'Mean_kwh': self.profile_sum[building, slot] / hours,
+                             'Max_kwh': self.profile_max[building, slot],
+                             'Hours': hours})
+
+    def peak_intervals(self):
+        """The top_n highest-load hours of every building and of the whole campus, ranked."""
+        loads = np.vstack([self.load, self.campus_load[None, :]])
+        names = np.append(np.asarray(self.buildings, dtype=object), 'Campus')
+        n = min(self.top_n, loads.shape[1])
+        if n == 0:
+            return pd.DataFrame(columns=['Building', 'Rank', 'Timestamp', 'Load_kwh'])
+        top = np.argpartition(loads, loads.shape[1] - n, axis=1)[:, -n:]
+        top_load = np.take_along_axis(loads, top, axis=1)
+        order = np.argsort(-top_load, axis=1, kind='stable')
+        top, top_load = np.take_along_axis(top, order, axis=1), np.take_along_axis(top_load, order, axis=1)
+        valid = np.isfinite(top_load) # Buildings with fewer than n observed hours
+        rows, rank = np.nonzero(valid)
+        return pd.DataFrame({'Building': names[rows], 'Rank': rank + 1,
+                             'Timestamp': self.hours[top[rows, rank]].astype('datetime64[s]'),
+                             'Load_kwh': top_load[rows, rank]})
+
+    def demand_summary(self):
+        """Peak, average load, load factor and coincident-peak figures per building plus a Campus row.
+
+        Load_factor is average / peak load. Load_at_campus_peak is the load in
+        the hour of the campus-wide peak and Coincidence_factor its ratio to the
+        building's own peak; for the Campus row it is the campus peak divided by
+        the sum of the individual building peaks.
+        """
+        if self.campus_peak_index is None:
+            return pd.DataFrame()
+        peak_index = np.argmax(self.load, axis=1)
+        peak = self.load[np.arange(len(self.buildings)), peak_index]
+        average = np.where(self.observed, self.load, 0).sum(axis=1) / self.observed.sum(axis=1)
+        at_campus_peak = np.where(self.observed[:, self.campus_peak_index],
+                                  self.load[:, self.campus_peak_index], 0.0)
+        summary = pd.DataFrame({'Peak_kwh': peak,
+                                'Peak_time': self.hours[peak_index].astype('datetime64[s]'),
+                                'Average_kwh': average,
+                                'Load_factor': average / peak,
+                                'Load_at_campus_peak': at_campus_peak,
+                                'Coincidence_factor': at_campus_peak / peak},
+                               index=pd.Index(np.asarray(self.buildings, dtype=object), name='Building'))
+        campus_peak = self.campus_load[self.campus_peak_index]
+        campus_average = self.campus_load.mean()
+        summary.loc['Campus'] = [campus_peak, self.hours[self.campus_peak_index].astype('datetime64[s]'),
+                                 campus_average, campus_average / campus_peak, campus_peak,
+                                 campus_peak / peak.sum()]
+        return summary
+
+    def export(self, output_dir):
+        """Writes load_profiles.csv, peak_intervals.csv and demand_summary.csv; returns the summary table."""
+        summary = self.demand_summary()
+        self.load_profiles().to_csv(output_dir / LOAD_PROFILES_FILE, index=False)
+        self.peak_intervals().to_csv(output_dir / PEAK_INTERVALS_FILE, index=False)
+        summary.to_csv(output_dir / DEMAND_SUMMARY_FILE)
+        print(f"- Demand analytics (hour-of-week profiles, top {self.top_n} peaks, load factors) exported to "
+              f"{output_dir / LOAD_PROFILES_FILE}, {PEAK_INTERVALS_FILE} and {DEMAND_SUMMARY_FILE}")
+        return summary
+
+def load_demand_summary(output_dir):
+    """demand_summary.csv from the last run (None if demand analytics have not run yet)."""
+    path = output_dir / DEMAND_SUMMARY_FILE
+    return pd.read_csv(path, index_col='Building', parse_dates=['Peak_time']) if path.exists() else None
+
 # --- Task 4: Visual Output with Matplotlib ---
 
-def generate_dashboard_plots(df_combined):
-    """Generates a unified Matplotlib figure with all required charts."""
+def _pyplot():
+    """Imports pyplot on the non-interactive Agg backend; only the plotting stage pays for matplotlib."""
+    import matplotlib
+    matplotlib.use('Agg') # The dashboard is only ever written to PNG
+    import matplotlib.pyplot as plt
+    return plt
+
+def generate_dashboard_plots(df_combined, cube=None, render_mode=RENDER_MODE):
+    """Generates a unified Matplotlib figure with all required charts.
+
+    All four charts are drawn from one AggregationCube (built here if not given).
+    Large campuses (see RENDER_MODE) go through render_dashboard_scalable.
+    """
     if df_combined.empty: 
         print("Cannot generate plots: No combined data.")
         return
+    if cube is None:
+        cube = AggregationCube(df_combined)
+    if render_mode == 'auto':
+        n_days = int((cube.hours.max() - cube.hours.min()) // np.timedelta64(1, 'D')) + 1
+        large = len(cube.buildings) > SCALABLE_PLOT_BUILDINGS or n_days > PLOT_MAX_POINTS
+        render_mode = 'scalable' if large else 'classic'
+    if render_mode == 'scalable':
+        render_dashboard_scalable(cube)
+        return
 
+    plt = _pyplot()
     # Task 4: Create a figure with 2 rows and 2 columns
     fig, axes = plt.subplots(2, 2, figsize=(18, 12))
     plt.suptitle('Campus Energy-Use Dashboard', fontsize=18)
     
     # Chart 1 (Top Left): Trend Line – daily consumption over time for all buildings
-    daily_df = df_combined.groupby('Building')['Usage_kwh'].resample('D').sum().unstack(level=0).fillna(0)
+    daily_df = cube.daily_by_building()
     daily_df.plot(ax=axes[0, 0], kind='line', marker='o')
     axes[0, 0].set_title('Daily Energy Consumption Trend by Building')
     axes[0, 0].set_ylabel('Total kWh')
@@ -167,7 +1752,7 @@ def generate_dashboard_plots(df_combined):
     
     # Chart 2 (Top Right): Bar Chart – compare average weekly usage across buildings
     # Aggregate to weekly average consumption per building
-    weekly_avg = df_combined.groupby(['Building', pd.Grouper(freq='W')])['Usage_kwh'].sum().groupby('Building').mean()
+    weekly_avg = cube.average_weekly_by_building()
     weekly_avg.plot(ax=axes[0, 1], kind='bar', rot=0)
     axes[0, 1].set_title('Average Weekly Total Consumption per Building')
     axes[0, 1].set_ylabel('Avg Weekly kWh')
@@ -175,9 +1760,7 @@ def generate_dashboard_plots(df_combined):
     
     # Chart 3 (Bottom Left): Scatter Plot – plot peak-hour consumption vs. building
     # Calculate consumption grouped by hour-of-day and building (Peak Load Time)
-    peak_hour_df = df_combined.reset_index()
-    peak_hour_df['Hour'] = peak_hour_df['Timestamp'].dt.hour
-    hourly_mean = peak_hour_df.groupby(['Building', 'Hour'])['Usage_kwh'].mean().reset_index()
+    hourly_mean = cube.hourly_mean_by_building()
     
     for name, group in hourly_mean.groupby('Building'):
         axes[1, 0].scatter(group['Hour'], group['Usage_kwh'], label=name, alpha=0.7)
@@ -189,7 +1772,7 @@ def generate_dashboard_plots(df_combined):
     axes[1, 0].grid(True, linestyle='--')
 
     # Chart 4 (Bottom Right): Additional Chart (Daily vs Total)
-    daily_totals = calculate_daily_totals(df_combined)
+    daily_totals = cube.daily_totals()
     daily_totals.plot(ax=axes[1, 1], kind='area', alpha=0.5)
     axes[1, 1].set_title('Campus-Wide Daily Total Consumption')
     axes[1, 1].set_ylabel('Total Daily kWh')
@@ -202,18 +1785,267 @@ def generate_dashboard_plots(df_combined):
     plt.savefig(dashboard_path)
     plt.close()
     print(f"\n- Dashboard saved to {dashboard_path}")
-    
+
+# --- Task 4b: Scalable Dashboard Rendering ---
+
+PANEL_RENDER_VERSION = 1 # Bump when panel styling changes to invalidate cached PNGs
+PANEL_SIZE = (9, 6) # inches at 100 dpi; four panels tile the 18 x 12 dashboard
+MAX_LEGEND_ENTRIES = 20
+
+def downsample_minmax(x, y, max_points=PLOT_MAX_POINTS):
+    """Keeps the minimum and maximum of each of max_points // 2 equal-width index buckets."""
+    n = len(y)
+    if n <= max_points:
+        return x, y
+    n_buckets = max(1, max_points // 2)
+    bucket = np.arange(n) * n_buckets // n
+    order = np.lexsort((y, bucket))
+    ends = np.searchsorted(bucket[order], np.arange(1, n_buckets + 1))
+    starts = np.r_[0, ends[:-1]]
+    keep = np.unique(np.concatenate([order[starts], order[ends - 1]]))
+    return x[keep], y[keep]
+
+def downsample_lttb(x, y, max_points=PLOT_MAX_POINTS):
+    """Largest-Triangle-Three-Buckets downsampling, which preserves the visual shape of a series."""
+    n = len(y)
+    if n <= max_points or max_points < 3:
+        return x, y
+    xf = x.astype(np.int64).astype(np.float64) if np.issubdtype(x.dtype, np.datetime64) \
+        else x.astype(np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    # max_points - 2 buckets over the interior points; first and last points are always kept
+    edges = np.linspace(1, n - 1, max_points - 1).astype(np.intp)
+    keep = np.empty(max_points, dtype=np.intp)
+    keep[0], keep[-1] = 0, n - 1
+    a = 0
+    for i in range(max_points - 2):
+        lo, hi = edges[i], edges[i + 1]
+        if i + 2 < len(edges):
+            next_x, next_y = xf[hi:edges[i + 2]].mean(), y[hi:edges[i + 2]].mean()
+        else:
+            next_x, next_y = xf[-1], y[-1]
+        area = np.abs((xf[a] - next_x) * (y[lo:hi] - y[a]) - (xf[a] - xf[lo:hi]) * (next_y - y[a]))
+        a = lo + int(np.argmax(area))
+        keep[i + 1] = a
+    return x[keep], y[keep]
+
+def _downsample(x, y, max_points=PLOT_MAX_POINTS, method=PLOT_DOWNSAMPLE):
+    if method == 'minmax':
+        return downsample_minmax(x, y, max_points)
+    return downsample_lttb(x, y, max_points)
+
+def _render_panel(job):
+    """Draws one dashboard panel to job['path'] with the object-oriented Agg API.
+
+    Runs in worker processes, so it never touches pyplot's global state.
+    """
+    from matplotlib.figure import Figure
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    fig = Figure(figsize=job.get('size', PANEL_SIZE), dpi=100)
+    FigureCanvasAgg(fig)
+    kind, data = job['kind'], job['data']
+    if kind == 'title':
+        fig.text(0.5, 0.5, job['title'], ha='center', va='center', fontsize=18)
+        fig.savefig(job['path'])
+        return job['path']
+
+    ax = fig.add_subplot()
+    if kind == 'lines':
+        for label, (x, y) in data['series'].items():
+            ax.plot(x, y, label=label, linewidth=1)
+        if 0 < len(data['series']) <= MAX_LEGEND_ENTRIES:
+            ax.legend(title='Building', fontsize='small')
+    elif kind == 'bar':
+        ax.bar(np.arange(len(data['values'])), data['values'])
+        if len(data['labels']) <= MAX_LEGEND_ENTRIES * 2:
+            ax.set_xticks(np.arange(len(data['labels'])), data['labels'], rotation=45, ha='right')
+        else:
+            ax.set_xticks([])
+    elif kind == 'scatter':
+        for label, (x, y) in data['series'].items():
+            ax.scatter(x, y, label=label, alpha=0.7, s=12)
+        if 0 < len(data['series']) <= MAX_LEGEND_ENTRIES:
+            ax.legend(title='Building', fontsize='small')
+    elif kind == 'area':
+        x, y = data['x'], data['y']
+        ax.fill_between(x, y, alpha=0.5)
+        ax.plot(x, y, linewidth=1)
+    ax.set_title(job['title'])
+    ax.set_xlabel(job.get('xlabel', ''))
+    ax.set_ylabel(job.get('ylabel', ''))
+    ax.grid(True, linestyle='--')
+    if job.get('dates'):
+        fig.autofmt_xdate()
+    fig.tight_layout()
+    fig.savefig(job['path'])
+    return job['path']
+
+def _panel_key(job):
+    """Content hash of a panel's inputs, used as its cache key."""
+    digest = hashlib.sha1(f"{PANEL_RENDER_VERSION}|{job['kind']}|{job['title']}|{job.get('size')}".encode())
+    def feed(value):
+        if isinstance(value, dict):
+            for key in sorted(value):
+                digest.update(str(key).encode())
+                feed(value[key])
+        elif isinstance(value, (list, tuple)):
+            for item in value:
+                feed(item)
+        else:
+            array = np.asarray(value)
+            digest.update(str(array.dtype).encode())
+            digest.update(np.ascontiguousarray(array).tobytes() if array.dtype != object
+                          else repr(array.tolist()).encode())
+    feed(job['data'])
+    return digest.hexdigest()
+
+def _dashboard_jobs(cube, max_points, method, small_multiples=False):
+    """Panel jobs (without paths) for the four charts, the title strip and optionally per-building small multiples."""
+    daily = cube.daily_by_building()
+    days = daily.index.to_numpy()
+    series = {name: _downsample(days, daily[name].to_numpy(), max_points, method) for name in daily.columns}
+    weekly = cube.average_weekly_by_building()
+    hourly = cube.hourly_mean_by_building()
+    totals = cube.daily_totals()
+    total_x, total_y = _downsample(totals.index.to_numpy(), totals.to_numpy(), max_points, method)
+
+    jobs = {
+        'title': {'kind': 'title', 'title': 'Campus Energy-Use Dashboard', 'data': {}, 'size': (18, 0.8)},
+        'trend': {'kind': 'lines', 'title': 'Daily Energy Consumption Trend by Building',
+                  'ylabel': 'Total kWh', 'dates': True, 'data': {'series': series}},
+        'weekly': {'kind': 'bar', 'title': 'Average Weekly Total Consumption per Building',
+                   'ylabel': 'Avg Weekly kWh',
+                   'data': {'labels': list(weekly.index), 'values': weekly.to_numpy()}},
+        'hourly': {'kind': 'scatter', 'title': 'Hourly Mean Consumption (Peak Load Analysis)',
+                   'xlabel': 'Hour of Day (24h)', 'ylabel': 'Mean Consumption (kWh)',
+                   'data': {'series': {name: (group['Hour'].to_numpy(), group['Usage_kwh'].to_numpy())
+                                       for name, group in hourly.groupby('Building')}}},
+        'campus_daily': {'kind': 'area', 'title': 'Campus-Wide Daily Total Consumption',
+                         'ylabel': 'Total Daily kWh', 'dates': True, 'data': {'x': total_x, 'y': total_y}},
+    }
+    for name, xy in (series.items() if small_multiples else ()):
+        jobs[f"buildings/{name.replace(' ', '_')}"] = {
+            'kind': 'lines', 'title': f'Daily Energy Consumption: {name}', 'ylabel': 'Total kWh',
+            'dates': True, 'size': (6, 3.5), 'data': {'series': {name: xy}}}
+    return jobs
+
+def render_dashboard_scalable(cube, output_dir=None, workers=PLOT_WORKERS,
+                              max_points=PLOT_MAX_POINTS, method=PLOT_DOWNSAMPLE, small_multiples=None):
+    """Renders the dashboard as cached, downsampled panels in a process pool.
+
+    Each chart (and, with small_multiples, one chart per building; default
+    PLOT_SMALL_MULTIPLES) is its own PNG in PANELS_DIR. Panels whose input
+    data hash is already in PANEL_CACHE_DIR are copied instead of redrawn;
+    the rest are drawn in parallel. The title strip and four charts are then
+    tiled into dashboard.png. Returns (rendered, cached) panel counts.
+    """
+    output_dir = output_dir or OUTPUT_DIR
+    small_multiples = PLOT_SMALL_MULTIPLES if small_multiples is None else small_multiples
+    panels_dir, cache_dir = output_dir / PANELS_DIR, output_dir / PANEL_CACHE_DIR
+    (panels_dir / 'buildings').mkdir(parents=True, exist_ok=True)
+    cache_dir.mkdir(parents=True, exist_ok=True)
+
+    jobs = _dashboard_jobs(cube, max_points, method, small_multiples)
+    to_render, used = [], set()
+    for name, job in jobs.items():
+        cache_path = cache_dir / f"{_panel_key(job)}.png"
+        used.add(cache_path.name)
+        job['path'] = cache_path
+        if not cache_path.exists():
+            to_render.append(job)
+
+    if workers and workers > 1 and len(to_render) > 1:
+        from concurrent.futures import ProcessPoolExecutor
+        with ProcessPoolExecutor(max_workers=min(workers, len(to_render))) as pool:
+            list(pool.map(_render_panel, to_render, chunksize=max(1, len(to_render) // (workers * 4))))
+    else:
+        for job in to_render:
+            _render_panel(job)
+
+    for name, job in jobs.items():
+        shutil.copyfile(job['path'], panels_dir / f'{name}.png')
+    # Keep the cache bounded to the panels of the latest run
+    for stale in cache_dir.glob('*.png'):
+        if stale.name not in used:
+            stale.unlink()
+
+    import matplotlib.image
+    tiles = {name: matplotlib.image.imread(panels_dir / f'{name}.png')
+             for name in ('title', 'trend', 'weekly', 'hourly', 'campus_daily')}
+    dashboard = np.concatenate([tiles['title'],
+                                np.concatenate([tiles['trend'], tiles['weekly']], axis=1),
+                                np.concatenate([tiles['hourly'], tiles['campus_daily']], axis=1)], axis=0)
+    dashboard_path = output_dir / 'dashboard.png'
+    matplotlib.image.imsave(dashboard_path, dashboard)
+    print(f"\n- Dashboard saved to {dashboard_path} ({len(to_render)} panels rendered, "
+          f"{len(jobs) - len(to_render)} reused from cache; panels in {panels_dir})")
+    return len(to_render), len(jobs) - len(to_render)
+
 # --- Task 5: Persistence and Executive Summary ---
 
-def export_and_summarize(df_combined, building_summary):
-    """Exports data and creates a text summary."""
-    # Export 1: cleaned_energy_data.csv (Combined and cleaned raw data)
+def export_cleaned_csv(df_combined):
+    """Export 1: cleaned_energy_data.csv (Combined and cleaned raw data).
+
+    The binary columnar store written during ingestion is the primary copy; the
+    CSV is kept for compatibility and can be switched off.
+    """
     df_combined.to_csv(OUTPUT_DIR / 'cleaned_energy_data.csv')
     print(f"- Cleaned raw data exported to {OUTPUT_DIR / 'cleaned_energy_data.csv'}")
 
+def export_and_summarize(df_combined, building_summary, export_csv=True, cube=None, anomalies=None,
+                         demand=None):
+    """Exports data and creates a text summary."""
+    if export_csv:
+        export_cleaned_csv(df_combined)
+
+    peak_hour_kwh = None
+    if not building_summary.empty:
+        # Find the hour with the highest overall mean consumption
+        peak_hour_kwh = (cube if cube is not None else AggregationCube(df_combined)).peak_hour()
+
+    write_summary_outputs(building_summary, peak_hour_kwh, df_combined.index.min(), df_combined.index.max(),
+                          anomalies, demand=demand)
+
+def _anomaly_summary(anomalies):
+    """Executive summary lines for the flagged hours (None when detection did not run)."""
+    if anomalies is None:
+        return ("   - The daily trend line shows energy usage is stable but could have significant spikes "
+                "on certain days, which need further investigation.")
+    if anomalies.empty and anomalies.attrs.get('scored_hours') == 0:
+        return (f"   - Not enough history for anomaly detection yet: an hour is only scored once "
+                f"{ANOMALY_MIN_WEEKS} earlier weeks have a reading for that hour of the week.")
+    if anomalies.empty:
+        return (f"   - No hour deviated from its usual hour-of-week level by more than "
+                f"{ANOMALY_THRESHOLD} robust standard deviations.")
+    spikes = int((anomalies['Type'] == 'spike').sum())
+    lines = [f"   - {len(anomalies)} anomalous hours ({spikes} spikes, {len(anomalies) - spikes} drops) in "
+             f"{anomalies['Building'].nunique()} building(s); full list in {ANOMALIES_FILE}. Largest:"]
+    largest = anomalies.loc[anomalies['Robust_z'].abs().sort_values(ascending=False).index[:ANOMALY_SUMMARY_ROWS]]
+    for row in largest.itertuples(index=False):
+        lines.append(f"     * {pd.Timestamp(row.Timestamp).strftime('%Y-%m-%d %H:00')} {row.Building}: "
+                     f"{row.Usage_kwh:.2f} kWh vs {row.Expected_kwh:.2f} expected ({row.Type}, z = {row.Robust_z:.1f})")
+    return "\n".join(lines)
+
+def _demand_summary_lines(demand):
+    """Executive summary lines for the coincident campus peak (empty when demand analytics did not run)."""
+    if demand is None or 'Campus' not in demand.index:
+        return ""
+    campus = demand.loc['Campus']
+    return (f"\n   - Coincident campus peak: {campus['Peak_kwh']:.2f} kWh in the hour starting "
+            f"{pd.Timestamp(campus['Peak_time']).strftime('%Y-%m-%d %H:00')} (load factor {campus['Load_factor']:.2f}, "
+            f"coincidence factor {campus['Coincidence_factor']:.2f}; per-building figures in {DEMAND_SUMMARY_FILE}).")
+
+def write_summary_outputs(building_summary, peak_hour_kwh, period_start, period_end, anomalies=None,
+                          echo=True, demand=None):
+    """Writes building_summary.csv and executive_summary.txt from precomputed figures.
+
+    Both files are replaced atomically, so a reader never sees half a file while
+    watch mode refreshes them. echo=False skips the console copy of the summary.
+    """
     # Export 2: building_summary.csv (Aggregated data summary - REQUIRED OUTPUT CSV)
-    building_summary.to_csv(OUTPUT_DIR / 'building_summary.csv')
-    print(f"- Building summary (REQUIRED OUTPUT CSV) exported to {OUTPUT_DIR / 'building_summary.csv'}")
+    _write_atomic(OUTPUT_DIR / 'building_summary.csv', building_summary.to_csv().encode('utf-8'))
+    if echo:
+        print(f"- Building summary (REQUIRED OUTPUT CSV) exported to {OUTPUT_DIR / 'building_summary.csv'}")
 
     # Create Executive Summary (executive_summary.txt - REQUIRED OUTPUT TXT)
     if building_summary.empty:
@@ -225,69 +2057,701 @@ def export_and_summarize(df_combined, building_summary):
         total_campus_consumption = building_summary['Total_kwh'].sum()
         highest_consumer = building_summary.index[0]
         highest_consumption = building_summary.loc[highest_consumer, 'Total_kwh']
-        peak_hour_data = df_combined.reset_index()
-        peak_hour_data['Hour'] = peak_hour_data['Timestamp'].dt.hour
-        # Find the hour with the highest overall mean consumption
-        peak_hour_kwh = peak_hour_data.groupby('Hour')['Usage_kwh'].mean().idxmax()
-        
+
     summary_content = f"""
 *** EXECUTIVE ENERGY SUMMARY ***
 Date Generated: {pd.Timestamp.now().strftime('%Y-%m-%d %H:%M:%S')}
 
 Total Campus Consumption (Observed Period): {total_campus_consumption:.2f} kWh
-Analysis Period: {df_combined.index.min().strftime('%Y-%m-%d')} to {df_combined.index.max().strftime('%Y-%m-%d')}
+Analysis Period: {period_start.strftime('%Y-%m-%d')} to {period_end.strftime('%Y-%m-%d')}
 
 1. HIGHEST CONSUMER:
    - Building: {highest_consumer}
    - Total Consumption: {highest_consumption:.2f} kWh
 
 2. PEAK LOAD TIME:
-   - The campus-wide average consumption peaks consistently around Hour {peak_hour_kwh}:00.
+   - The campus-wide average consumption peaks consistently around Hour {peak_hour_kwh}:00.{_demand_summary_lines(demand)}
    - Recommendation: Investigate activities contributing to high load during this hour.
 
 3. TRENDS:
    - Weekly usage comparisons (Bar Chart) clearly show Building {highest_consumer} has the largest average weekly footprint.
-   - The daily trend line shows energy usage is stable but could have significant spikes on certain days, which need further investigation.
+{_anomaly_summary(anomalies)}
 
 (End of Summary)
 """
     summary_path = OUTPUT_DIR / 'executive_summary.txt'
-    with summary_path.open('w') as f:
-        f.write(summary_content.strip())
-        
+    _write_atomic(summary_path, summary_content.strip().encode('utf-8'))
+    if not echo:
+        return
+
     print(f"- Executive summary (REQUIRED OUTPUT TXT) saved to {summary_path}")
     print("\n--- EXECUTIVE SUMMARY (CONSOLE) ---")
     print(summary_content.strip())
     
-def main():
+def summarize_streaming():
+    """Out-of-core path: aggregates file chunks directly, never holding the full dataset."""
+    with instrument('stream_aggregate') as stage:
+        aggregates = stream_aggregate(DATA_DIR)
+        stage.rows = sum(s['count'] for s in aggregates.buildings.values())
+    if not aggregates.buildings:
+        return
+    with instrument('write_summary_outputs'):
+        write_summary_outputs(aggregates.building_summary(), aggregates.peak_hour(), *aggregates.period())
+    print("\nStreaming aggregation completed (dashboard.png and cleaned_energy_data.csv need the in-memory path).")
+
+def refresh_indexes(df_combined, full_rebuild=False):
+    """Builds the aggregation cube, then the rollup store, anomaly flags and demand analytics from it.
+
+    Returns (cube, anomalies, demand summary).
+    """
+    rows = len(df_combined)
+    # Single aggregation pass shared by the dashboard, the executive summary and the rollups
+    with instrument('aggregation_cube', rows):
+        cube = AggregationCube(df_combined)
+    with instrument('build_rollup_store'):
+        build_rollup_store(cube, OUTPUT_DIR / ROLLUP_DIR)
+    with instrument('detect_anomalies', rows):
+        anomalies = run_anomaly_detection(cube, OUTPUT_DIR, full_rebuild=full_rebuild)
+    with instrument('demand_profile', rows):
+        demand = DemandProfile(cube).export(OUTPUT_DIR)
+    return cube, anomalies, demand
+
+def main(full_rebuild=False, export_csv=True, streaming=False, render_mode=RENDER_MODE, workers=INGEST_WORKERS):
+    """Runs the whole pipeline: ingest, model, aggregate, plot and summarize."""
     OUTPUT_DIR.mkdir(exist_ok=True)
     print("Starting Capstone Project: Campus Energy Dashboard")
+
+    if streaming:
+        summarize_streaming()
+        return
     
-    # 1. Data Ingestion
-    df_combined = ingest_data(DATA_DIR)
+    # 1. Data Ingestion (only data appended since the last run is parsed)
+    with instrument('ingest_incremental') as stage:
+        df_combined, aggregates = ingest_incremental(DATA_DIR, OUTPUT_DIR, full_rebuild=full_rebuild,
+                                                     workers=workers)
+        stage.rows = len(df_combined)
     if df_combined.empty:
         # If ingestion failed, exit gracefully after printing the error message in ingest_data
         return
+    rows = len(df_combined)
+    # The cube, rollups and anomaly state come from the float64 frame; only then is it compacted
+    cube, anomalies, demand = refresh_indexes(df_combined, full_rebuild)
+    df_combined = compact_usage(df_combined)
+    report_memory(df_combined)
 
     # 3. OOP Modeling (Convert data back to OOP structure for reporting)
-    manager = BuildingManager()
-    for name in df_combined['Building'].unique():
-        # Pass only the necessary data to the Building object
-        df_building = df_combined[df_combined['Building'] == name].drop(columns=['Building'])
-        manager.add_building(name, df_building)
+    with instrument('model_buildings', rows):
+        manager = model_buildings(df_combined)
         
-    # 2. Core Aggregation Logic
-    building_summary_df = building_wise_summary(df_combined)
+    # 2. Core Aggregation Logic (kept up to date incrementally by ingest_incremental)
+    with instrument('building_summary'):
+        building_summary_df = aggregates.building_summary()
 
     # 4. Visualization
-    generate_dashboard_plots(df_combined)
+    with instrument('generate_dashboard_plots', rows):
+        generate_dashboard_plots(df_combined, cube, render_mode)
 
 
     # 5. Persistence and Executive Summary
-    export_and_summarize(df_combined, building_summary_df)
+    with instrument('export_and_summarize', rows):
+        export_and_summarize(df_combined, building_summary_df, export_csv=export_csv, cube=cube,
+                             anomalies=anomalies, demand=demand)
     
     print("\nCampus Energy Dashboard pipeline completed successfully.")
     print(f"Check the '{OUTPUT_DIR}' folder for all generated files (PNG, CSV, TXT, LOG).")
 
+# --- Live Watch Mode ---
+
+def _apply_updates(df_combined, dropped, frames):
+    """df_combined without the dropped buildings, merged with the new per-file frames.
+
+    Stays float64: checkpoint() persists the result.
+    """
+    if dropped and not df_combined.empty:
+        df_combined = df_combined[~df_combined['Building'].isin(dropped)]
+    return combine_frames([df_combined] + frames, usage_dtype='float64')
+
+class LiveDashboard:
+    """Near real-time pipeline: tails DATA_DIR and keeps the outputs fresh on one asyncio loop.
+
+    Four tasks hand work to each other through a queue and events, so file
+    reads, aggregation and rendering never wait on one another:
+      - poll: every poll_seconds, finds changed CSVs with the ingest manifest and
+        parses only their appended rows (in a worker thread);
+      - aggregate: folds the new rows into RunningAggregates and the BuildingManager;
+      - summary: rewrites building_summary.csv and executive_summary.txt once no
+        rows arrived for debounce_seconds (but at most max_delay_seconds late);
+      - dashboard: re-renders dashboard.png at most every plot_interval_seconds.
+    Update latency is measured from the CSV's modification time to the
+    refreshed file. The columnar store, manifest, rollups and anomaly flags are
+    written by checkpoint() when watching stops.
+    """
+    def __init__(self, data_dir=DATA_DIR, poll_seconds=WATCH_POLL_SECONDS,
+                 debounce_seconds=WATCH_DEBOUNCE_SECONDS, max_delay_seconds=WATCH_MAX_DELAY_SECONDS,
+                 plot_interval_seconds=WATCH_PLOT_INTERVAL_SECONDS, render_mode=RENDER_MODE):
+        self.data_dir = data_dir
+        self.poll_seconds = poll_seconds
+        self.debounce_seconds = debounce_seconds
+        self.max_delay_seconds = max_delay_seconds
+        self.plot_interval_seconds = plot_interval_seconds
+        self.render_mode = render_mode
+
+        # Catch up with everything written while nobody was watching
+        self.df_combined, self.aggregates = ingest_incremental(data_dir, OUTPUT_DIR)
+        manifest_path = OUTPUT_DIR / MANIFEST_FILE
+        self.manifest = json.loads(manifest_path.read_text(encoding='utf-8')) if manifest_path.exists() else {}
+        self.manager = model_buildings(compact_usage(self.df_combined)) if not self.df_combined.empty else BuildingManager()
+        self.anomalies = load_anomalies(OUTPUT_DIR)
+        self.demand = load_demand_summary(OUTPUT_DIR)
+
+        self.pending_frames, self.dropped = [], set() # Not yet merged into df_combined
+        self.touched, self.stale = set(), set() # Store partitions to rewrite at the checkpoint
+        self.summary_arrivals, self.plot_arrivals = [], [] # File mtimes of updates not yet published
+        self.updates = 0
+        self.latencies = {'summary': [], 'dashboard': []}
+
+    def _scan(self):
+        """Parses the rows appended since the manifest offsets (runs in a worker thread)."""
+        plan = _plan_changed_files(sorted(self.data_dir.glob('*.csv')), self.manifest)
+        results = []
+        if plan['files']:
+            for result in _parse_files(plan['files'], 1, TIMESTAMP_FORMAT, plan['starts'], plan['columns']):
+                stat = plan['stats'][result['file']]
+                entry = _manifest_entry(self.data_dir, result, stat) if result['error'] is None else None
+                results.append((result, entry, stat.st_mtime))
+        return plan, results
+
+    async def _poll(self):
+        while True:
+            plan, results = await asyncio.to_thread(self._scan)
+            manifest = plan['manifest']
+            for name in plan['stale']:
+                await self._queue.put(('drop', name, time.time()))
+            for result, entry, mtime in results:
+                frame = _log_file_result(result)
+                if frame is None:
+                    # Keep the previous offset so the tail is retried on the next poll
+                    previous = self.manifest.get(result['file'])
+                    if previous and previous['building'] not in plan['stale']:
+                        manifest[result['file']] = previous
+                    continue
+                manifest[result['file']] = entry
+                await self._queue.put(('rows', frame, mtime))
+            # Updated before the next scan so no tail is read twice
+            self.manifest = manifest
+            await asyncio.sleep(self.poll_seconds)
+
+    async def _aggregate(self):
+        while True:
+            kind, payload, arrived = await self._queue.get()
+            if kind == 'drop':
+                self.aggregates.drop_building(payload)
+                self.manager.remove_building(payload)
+                self.dropped.add(payload)
+                self.stale.add(payload)
+                self.pending_frames = [f for f in self.pending_frames if f['Building'].iloc[0] != payload]
+                self.touched = {t for t in self.touched if t[0] != payload}
+            elif not payload.empty:
+                name = payload['Building'].iloc[0]
+                self.aggregates.update(payload)
+                self.manager.append_readings(name, payload.drop(columns=['Building']))
+                self.pending_frames.append(payload)
+                self.touched |= _touched_partitions([payload])
+            else:
+                continue
+            self.updates += 1
+            self.summary_arrivals.append(arrived)
+            self.plot_arrivals.append(arrived)
+            self._summary_due.set()
+            self._plot_due.set()
+
+    async def _publish_summary(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            await self._summary_due.wait()
+            first_update = loop.time()
+            # Debounce: wait for a quiet period, but never longer than max_delay_seconds
+            while True:
+                seen = self.updates
+                await asyncio.sleep(self.debounce_seconds)
+                if self.updates == seen or loop.time() - first_update >= self.max_delay_seconds:
+                    break
+            self._summary_due.clear()
+            arrivals, self.summary_arrivals = self.summary_arrivals, []
+            if not self.aggregates.buildings:
+                continue
+            figures = (self.aggregates.building_summary(), self.aggregates.peak_hour(), *self.aggregates.period())
+            await asyncio.to_thread(write_summary_outputs, *figures, self.anomalies, False, self.demand)
+            self._report('summary', arrivals)
+
+    async def _render_dashboard(self):
+        loop = asyncio.get_running_loop()
+        last_render = -np.inf
+        while True:
+            await self._plot_due.wait()
+            # Rate limit: at most one render per plot_interval_seconds
+            wait = last_render + self.plot_interval_seconds - loop.time()
+            if wait > 0:
+                await asyncio.sleep(wait)
+            self._plot_due.clear()
+            arrivals, self.plot_arrivals = self.plot_arrivals, []
+            frames, dropped = self.pending_frames, self.dropped
+            self.pending_frames, self.dropped = [], set()
+            self.df_combined = await asyncio.to_thread(_apply_updates, self.df_combined, dropped, frames)
+            if self.df_combined.empty:
+                continue
+            last_render = loop.time()
+            await asyncio.to_thread(generate_dashboard_plots, self.df_combined, None, self.render_mode)
+            self._report('dashboard', arrivals)
+
+    def _report(self, output, arrivals):
+        """Logs how long the published updates took from file write to refreshed output."""
+        if not arrivals:
+            return
+        latency = time.time() - np.asarray(arrivals)
+        self.latencies[output].extend(latency.tolist())
+        message = (f"[watch] {output} refreshed with {len(arrivals)} update(s): "
+                   f"latency mean={latency.mean():.2f}s max={latency.max():.2f}s")
+        print(message)
+        logging.info(message)
+
+    async def run(self, duration=None):
+        """Runs the watch tasks until one fails, duration seconds pass, or the loop is interrupted."""
+        self._queue = asyncio.Queue()
+        self._summary_due, self._plot_due = asyncio.Event(), asyncio.Event()
+        tasks = [asyncio.create_task(coro) for coro in
+                 (self._poll(), self._aggregate(), self._publish_summary(), self._render_dashboard())]
+        try:
+            done, _ = await asyncio.wait(tasks, timeout=duration, return_when=asyncio.FIRST_EXCEPTION)
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+        for task in done:
+            task.result() # Re-raises the failure
+
+    def checkpoint(self):
+        """Persists what was ingested while watching and refreshes every output once."""
+        self.df_combined = _apply_updates(self.df_combined, self.dropped, self.pending_frames)
+        self.pending_frames, self.dropped = [], set()
+        if self.df_combined.empty:
+            return
+        _save_ingest_state(OUTPUT_DIR, self.df_combined, self.aggregates, self.manifest,
+                           self.touched, self.stale)
+        _, self.anomalies, self.demand = refresh_indexes(self.df_combined)
+        write_summary_outputs(self.aggregates.building_summary(), self.aggregates.peak_hour(),
+                              *self.aggregates.period(), self.anomalies, echo=False, demand=self.demand)
+        for output, latencies in self.latencies.items():
+            if latencies:
+                print(f"[watch] {output}: {len(latencies)} updates published, latency "
+                      f"median={np.median(latencies):.2f}s p95={np.percentile(latencies, 95):.2f}s "
+                      f"max={max(latencies):.2f}s")
+
+def watch(duration=None, **options):
+    """Watches DATA_DIR until interrupted (or for duration seconds), then checkpoints the state."""
+    dashboard = LiveDashboard(DATA_DIR, **options)
+    print(f"\nWatching '{DATA_DIR}' for new readings (Ctrl+C to stop)...")
+    try:
+        asyncio.run(dashboard.run(duration))
+    except KeyboardInterrupt:
+        print("\nStopping watch mode.")
+    dashboard.checkpoint()
+    return dashboard
+
+# --- Local HTTP Query Service ---
+
+SERVICE_ENDPOINTS = ('summary', 'daily', 'weekly')
+
+def _json_records(result):
+    """JSON-ready rows of a summary table or series (ISO timestamps, NaN as null)."""
+    if isinstance(result, pd.Series):
+        result = result.to_frame()
+    if result.empty:
+        return []
+    return json.loads(result.reset_index().to_json(orient='records', date_format='iso'))
+
+def _json_error(message):
+    return json.dumps({'error': message}).encode('utf-8')
+
+class QueryCache:
+    """Thread-safe LRU cache of encoded responses, tied to one version of the ingested data.
+
+    get() and put() take the current data version; when it differs from the one
+    the entries were computed for, the cache is emptied first, so an answer is
+    never served from data that an ingest has since replaced.
+    """
+    def __init__(self, max_entries=QUERY_CACHE_SIZE):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.version = None
+        self.hits = self.misses = self.invalidations = 0
+        self.lock = threading.Lock()
+
+    def _validate(self, version):
+        if version != self.version:
+            if self.entries:
+                self.invalidations += 1
+            self.entries.clear()
+            self.version = version
+
+    def get(self, key, version):
+        with self.lock:
+            self._validate(version)
+            value = self.entries.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value, version):
+        with self.lock:
+            if version != self.version:
+                return # The data changed while this answer was being computed
+            self.entries[key] = value
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {'entries': len(self.entries), 'max_entries': self.max_entries, 'hits': self.hits,
+                'misses': self.misses, 'hit_rate': round(self.hits / lookups, 4) if lookups else None,
+                'invalidations': self.invalidations}
+
+class EnergyQueryService:
+    """JSON answers to building/time-range queries over the columnar store, through a QueryCache.
+
+    /summary, /daily and /weekly run building_wise_summary, calculate_daily_totals
+    and calculate_weekly_aggregates on the readings of the requested buildings
+    (building=..., repeated or comma-separated; all by default) in [start, end).
+    The mtime and size of the store index serve as the data version, so the
+    first request after an ingest clears the cache. /stats reports request
+    latency and the cache hit rate.
+    """
+    def __init__(self, output_dir=None, cache_size=QUERY_CACHE_SIZE):
+        # Resolved here, not in the signature, so an OUTPUT_DIR set by init_runtime is used
+        self.store_dir = (OUTPUT_DIR if output_dir is None else Path(output_dir)) / CLEANED_STORE_DIR
+        self.cache = QueryCache(cache_size)
+        self.latencies = deque(maxlen=SERVE_LATENCY_WINDOW) # Seconds, most recent requests
+        self.requests = Counter() # Per endpoint
+        self.errors = 0
+        self.started = time.time()
+        self._buildings = (None, frozenset()) # (data version, building names in the store)
+        self.lock = threading.Lock()
+
+    def data_version(self):
+        try:
+            stat = (self.store_dir / STORE_INDEX_FILE).stat()
+        except FileNotFoundError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def _known_buildings(self, version):
+        if self._buildings[0] != version:
+            index = json.loads((self.store_dir / STORE_INDEX_FILE).read_text(encoding='utf-8'))
+            self._buildings = (version, frozenset(meta['building'] for meta in index.values()))
+        return self._buildings[1]
+
+    @staticmethod
+    def _parse(params):
+        """Normalised (buildings, start, end) from parsed query parameters; raises ValueError."""
+        names = {name.strip() for value in params.get('building', []) for name in value.split(',')}
+        buildings = tuple(sorted(names - {''})) or None
+        start, end = (pd.Timestamp(params[key][-1]) if params.get(key) else None for key in ('start', 'end'))
+        if start is not None and end is not None and end <= start:
+            raise ValueError("end must be after start")
+        return buildings, start, end
+
+    def _compute(self, endpoint, buildings, start, end):
+        """(JSON rows, readings used) for one query, read from the matching store partitions."""
+        df = load_columnar_store(self.store_dir, buildings, start, end, usage_dtype='float64')
+        if end is not None and not df.empty:
+            df = df[df.index < end] # The store's end bound is inclusive, the service's exclusive
+        if endpoint == 'summary':
+            result = building_wise_summary(df)
+        elif endpoint == 'daily':
+            result = calculate_daily_totals(df)
+        else:
+            result = calculate_weekly_aggregates(df)
+        return _json_records(result), len(df)
+
+    def handle(self, path, query_string):
+        """(HTTP status, JSON body, cache status) for one GET request."""
+        endpoint = path.strip('/')
+        if endpoint == 'stats':
+            return 200, json.dumps(self.stats()).encode('utf-8'), 'BYPASS'
+        if endpoint not in SERVICE_ENDPOINTS:
+            return 404, _json_error(f"Unknown endpoint {path!r}; use /summary, /daily, /weekly or /stats"), 'BYPASS'
+        try:
+            buildings, start, end = self._parse(urllib.parse.parse_qs(query_string))
+        except ValueError as e:
+            return 400, _json_error(str(e)), 'BYPASS'
+        version = self.data_version()
+        if version is None:
+            return 503, _json_error("No cleaned data yet. Run the 'ingest' command first."), 'BYPASS'
+        unknown = set(buildings or ()) - self._known_buildings(version)
+        if unknown:
+            return 404, _json_error(f"Unknown building(s): {', '.join(sorted(unknown))}"), 'BYPASS'
+
+        key = (endpoint, buildings, start, end)
+        body = self.cache.get(key, version)
+        if body is not None:
+            return 200, body, 'HIT'
+        rows, readings = self._compute(endpoint, buildings, start, end)
+        body = json.dumps({'endpoint': endpoint, 'buildings': list(buildings) if buildings else 'all',
+                           'start': start.isoformat() if start is not None else None,
+                           'end': end.isoformat() if end is not None else None,
+                           'readings': readings, 'rows': rows}).encode('utf-8')
+        self.cache.put(key, body, version)
+        return 200, body, 'MISS'
+
+    def record(self, endpoint, status, latency_s):
+        if endpoint not in SERVICE_ENDPOINTS + ('stats',):
+            endpoint = 'unknown'
+        with self.lock:
+            self.requests[endpoint] += 1
+            self.errors += status >= 400
+            self.latencies.append(latency_s)
+
+    def stats(self):
+        with self.lock:
+            latencies = np.asarray(self.latencies) * 1000
+            requests, errors = dict(self.requests), self.errors
+        latency = None
+        if len(latencies):
+            latency = {'median': round(float(np.median(latencies)), 3),
+                       'p95': round(float(np.percentile(latencies, 95)), 3),
+                       'p99': round(float(np.percentile(latencies, 99)), 3),
+                       'max': round(float(latencies.max()), 3), 'window': len(latencies)}
+        return {'uptime_s': round(time.time() - self.started, 1), 'requests': requests, 'errors': errors,
+                'latency_ms': latency, 'cache': self.cache.stats(), 'data_version': self.data_version()}
+
+    def report(self):
+        """One-line latency and hit-rate report, also written to the log."""
+        stats = self.stats()
+        latency, cache = stats['latency_ms'], stats['cache']
+        line = f"[serve] {sum(stats['requests'].values())} requests ({stats['errors']} errors)"
+        if latency:
+            line += f", latency median={latency['median']:.2f}ms p95={latency['p95']:.2f}ms max={latency['max']:.2f}ms"
+        if cache['hit_rate'] is not None:
+            line += f", cache hit rate {cache['hit_rate']:.1%} ({cache['invalidations']} invalidations)"
+        logging.info(line)
+        return line
+
+def _query_handler(service):
+    """Request handler class bound to service (http.server is only imported when serving)."""
+    from http.server import BaseHTTPRequestHandler
+
+    class QueryHandler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1' # Keep-alive connections
+
+        def do_GET(self):
+            started = time.perf_counter()
+            path, _, query_string = self.path.partition('?')
+            try:
+                status, body, cache_status = service.handle(path, query_string)
+            except Exception as e:
+                logging.exception(f"Query {self.path!r} failed")
+                status, body, cache_status = 500, _json_error(str(e)), 'BYPASS'
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.send_header('X-Cache', cache_status)
+            self.end_headers()
+            self.wfile.write(body)
+            service.record(path.strip('/'), status, time.perf_counter() - started)
+
+        def log_message(self, format, *args):
+            logging.debug(f"{self.address_string()} - {format % args}")
+
+    return QueryHandler
+
+def serve(host=SERVE_HOST, port=SERVE_PORT, cache_size=QUERY_CACHE_SIZE, duration=None):
+    """Serves EnergyQueryService over HTTP until interrupted (or for duration seconds)."""
+    from http.server import ThreadingHTTPServer
+    service = EnergyQueryService(OUTPUT_DIR, cache_size)
+    server = ThreadingHTTPServer((host, port), _query_handler(service))
+    # Port 0 picks a free port; the line below tells clients (and the load test) which one
+    print(f"Serving energy queries on http://{host}:{server.server_port}/ "
+          f"(/summary, /daily, /weekly, /stats; Ctrl+C to stop)", flush=True)
+    if duration is not None:
+        timer = threading.Timer(duration, server.shutdown)
+        timer.daemon = True
+        timer.start()
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\nStopping query service.")
+    finally:
+        server.server_close()
+    print(service.report(), flush=True)
+    return service
+
+# --- Command-Line Interface ---
+
+def _load_cleaned_data():
+    """Cleaned readings from the columnar store written by 'ingest' (None if there are none yet)."""
+    store_dir = OUTPUT_DIR / CLEANED_STORE_DIR
+    if not (store_dir / STORE_INDEX_FILE).exists():
+        print(f"Error: No cleaned data in '{store_dir}'. Run the 'ingest' command first.")
+        return None
+    with instrument('load_columnar_store') as stage:
+        df_combined = load_columnar_store(store_dir, usage_dtype='float64')
+        stage.rows = len(df_combined)
+    return df_combined
+
+def run_ingest(args):
+    """CLI handler for 'ingest': parses new readings, then refreshes the rollups, anomaly flags and demand analytics."""
+    with instrument('ingest_incremental') as stage:
+        df_combined, _ = ingest_incremental(DATA_DIR, OUTPUT_DIR, full_rebuild=args.full_rebuild,
+                                            workers=args.workers)
+        stage.rows = len(df_combined)
+    if not df_combined.empty:
+        refresh_indexes(df_combined, args.full_rebuild)
+        report_memory(compact_usage(df_combined))
+
+def run_summarize(args):
+    """CLI handler for 'summarize': summary files from the saved running totals, anomaly flags and demand figures."""
+    if args.streaming:
+        summarize_streaming()
+        return
+    aggregates_path = OUTPUT_DIR / AGGREGATES_FILE
+    aggregates = RunningAggregates.load(aggregates_path) if aggregates_path.exists() else RunningAggregates()
+    if not aggregates.buildings:
+        print(f"Error: No running totals in '{aggregates_path}'. Run the 'ingest' command first.")
+        return
+    anomalies = load_anomalies(OUTPUT_DIR)
+    demand = load_demand_summary(OUTPUT_DIR)
+    if not args.no_csv:
+        df_combined = _load_cleaned_data()
+        if df_combined is not None:
+            export_cleaned_csv(df_combined)
+    with instrument('write_summary_outputs'):
+        write_summary_outputs(aggregates.building_summary(), aggregates.peak_hour(), *aggregates.period(),
+                              anomalies, demand=demand)
+
+def run_plot(args):
+    """CLI handler for 'plot': the dashboard from the columnar store (the only command that loads matplotlib)."""
+    df_combined = _load_cleaned_data()
+    if df_combined is None or df_combined.empty:
+        return
+    with instrument('aggregation_cube', len(df_combined)):
+        cube = AggregationCube(df_combined)
+    df_combined = compact_usage(df_combined)
+    report_memory(df_combined)
+    with instrument('generate_dashboard_plots', len(df_combined)):
+        generate_dashboard_plots(df_combined, cube, args.render_mode)
+
+def run_watch(args):
+    """CLI handler for 'watch': near real-time updates of the summary files and dashboard."""
+    watch(duration=args.duration, poll_seconds=args.poll, debounce_seconds=args.debounce,
+          max_delay_seconds=args.max_delay, plot_interval_seconds=args.plot_interval,
+          render_mode=args.render_mode)
+
+def run_query(args):
+    """CLI handler for the 'query' subcommand."""
+    _import_now('pd', 'np') # Otherwise the first query's time would be mostly the import
+    started = time.perf_counter()
+    try:
+        result = query_energy(args.building, args.start, args.end, args.freq, args.rollup_dir)
+    except (FileNotFoundError, KeyError, ValueError) as e:
+        print(f"Error: {e}")
+        return
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    print(result.to_string() if not result.empty else "No readings in the requested range.")
+    print(f"\n(Answered from rollups in {elapsed_ms:.1f} ms)")
+
+def run_serve(args):
+    """CLI handler for 'serve': the local JSON query service."""
+    serve(args.host, args.port, args.cache_size, args.duration)
+
+def build_parser():
+    """Argument parser: global options, the subcommands, and the flags of the one-shot full pipeline."""
+    parser = argparse.ArgumentParser(
+        description="Campus Energy-Use Dashboard pipeline. Without a command the whole pipeline runs; "
+                    "global options go before the command.")
+    subparsers = parser.add_subparsers(dest='command')
+    # Subcommand flags that share a name with a full-pipeline flag default to SUPPRESS,
+    # so an omitted flag does not overwrite the top-level value
+    ingest_parser = subparsers.add_parser('ingest', help="parse new meter readings into the columnar store, "
+                                                         "rollups and anomaly flags")
+    ingest_parser.add_argument('--full-rebuild', action='store_true', default=argparse.SUPPRESS,
+                               help="ignore the ingest manifest and re-read every CSV from scratch")
+    ingest_parser.add_argument('--workers', type=int, default=argparse.SUPPRESS,
+                               help="worker processes used to parse the meter files")
+    summarize_parser = subparsers.add_parser('summarize', help="write building_summary.csv and "
+                                                               "executive_summary.txt from the ingested data")
+    summarize_parser.add_argument('--no-csv', action='store_true', default=argparse.SUPPRESS,
+                                  help="skip the cleaned_energy_data.csv compatibility export")
+    summarize_parser.add_argument('--streaming', action='store_true', default=argparse.SUPPRESS,
+                                  help="aggregate the CSVs chunk by chunk for datasets larger than memory")
+    plot_parser = subparsers.add_parser('plot', help="render dashboard.png from the ingested data")
+    plot_parser.add_argument('--render-mode', choices=('auto', 'classic', 'scalable'), default=argparse.SUPPRESS,
+                             help="dashboard rendering: one classic figure, or downsampled cached panels")
+    watch_parser = subparsers.add_parser('watch', help="tail the data folder and keep the outputs up to date")
+    watch_parser.add_argument('--poll', type=float, default=WATCH_POLL_SECONDS, help="seconds between file scans")
+    watch_parser.add_argument('--debounce', type=float, default=WATCH_DEBOUNCE_SECONDS,
+                              help="quiet seconds before the summary files are rewritten")
+    watch_parser.add_argument('--max-delay', type=float, default=WATCH_MAX_DELAY_SECONDS,
+                              help="longest the summary files may lag behind new readings")
+    watch_parser.add_argument('--plot-interval', type=float, default=WATCH_PLOT_INTERVAL_SECONDS,
+                              help="minimum seconds between dashboard re-renders")
+    watch_parser.add_argument('--duration', type=float, help="stop after this many seconds (default: until Ctrl+C)")
+    watch_parser.add_argument('--render-mode', choices=('auto', 'classic', 'scalable'), default=argparse.SUPPRESS,
+                              help="dashboard rendering: one classic figure, or downsampled cached panels")
+    query_parser = subparsers.add_parser('query', help="answer a kWh range query from the rollup store")
+    query_parser.add_argument('--building', help="building name (default: whole campus)")
+    query_parser.add_argument('--start', help="range start, e.g. 2024-10-01")
+    query_parser.add_argument('--end', help="range end (exclusive), e.g. 2024-11-01")
+    query_parser.add_argument('--freq', choices=ROLLUP_LEVELS, help="bucket size (default: one total)")
+    query_parser.add_argument('--rollup-dir', help=f"rollup store (default: {ROLLUP_DIR} in the output folder)")
+    serve_parser = subparsers.add_parser('serve', help="serve building/time-range JSON queries over local HTTP")
+    serve_parser.add_argument('--host', default=SERVE_HOST)
+    serve_parser.add_argument('--port', type=int, default=SERVE_PORT, help="TCP port (0 picks a free one)")
+    serve_parser.add_argument('--cache-size', type=int, default=QUERY_CACHE_SIZE,
+                              help="cached query responses kept (least recently used evicted)")
+    serve_parser.add_argument('--duration', type=float, help="stop after this many seconds (default: until Ctrl+C)")
+    parser.add_argument('--full-rebuild', action='store_true',
+                        help="ignore the ingest manifest and re-read every CSV from scratch")
+    parser.add_argument('--no-csv', action='store_true',
+                        help="skip the cleaned_energy_data.csv compatibility export")
+    parser.add_argument('--streaming', action='store_true',
+                        help="aggregate the CSVs chunk by chunk for datasets larger than memory")
+    parser.add_argument('--workers', type=int, default=INGEST_WORKERS,
+                        help=f"worker processes used to parse the meter files (default: one per CPU "
+                             f"with {INGEST_PARALLEL_MIN_FILES} or more files, else 1)")
+    parser.add_argument('--render-mode', choices=('auto', 'classic', 'scalable'), default=RENDER_MODE,
+                        help="dashboard rendering: one classic figure, or downsampled cached panels")
+    parser.add_argument('--small-multiples', action='store_true',
+                        help="scalable rendering also draws one chart per building (redrawn as data arrives)")
+    parser.add_argument('--no-metrics', action='store_true',
+                        help="turn off per-stage timing and memory metrics")
+    parser.add_argument('--metrics-file', help="also append per-stage metrics as JSON Lines to this file")
+    parser.add_argument('--trace-memory', action='store_true',
+                        help="measure per-stage peak memory with tracemalloc instead of process RSS")
+    parser.add_argument('--memory-budget', type=float, metavar='MB',
+                        help="report the combined frame and stage peaks against this memory budget")
+    parser.add_argument('--float32', action='store_true',
+                        help="keep Usage_kwh as float32 in memory (half the size, ~7 significant digits); "
+                             "saved data stays float64")
+    return parser
+
+def cli(argv=None):
+    """Command-line entry point: explicit runtime set-up, then one subcommand or the full pipeline."""
+    args = build_parser().parse_args(argv)
+    init_runtime()
+    configure_instrumentation(not args.no_metrics, args.metrics_file, args.trace_memory)
+    configure_memory(args.memory_budget, 'float32' if args.float32 else 'float64')
+    configure_rendering(args.small_multiples)
+    handlers = {'ingest': run_ingest, 'summarize': run_summarize, 'plot': run_plot, 'query': run_query,
+                'watch': run_watch, 'serve': run_serve}
+    if args.command in handlers:
+        handlers[args.command](args)
+    else:
+        main(full_rebuild=args.full_rebuild, export_csv=not args.no_csv, streaming=args.streaming,
+             render_mode=args.render_mode, workers=args.workers)
+
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    cli()
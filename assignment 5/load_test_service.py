@@ -0,0 +1,158 @@
+# Name: Bhoomi Raghav
+# Roll number: 2501730254
+# Course Code: ETCCPP102
+# Capstone Assignment: Campus Energy-Use Dashboard (query service load test)
+# Date: 2026-10-18
+
+import argparse
+import http.client
+import json
+import re
+import subprocess
+import sys
+import time
+import urllib.parse
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import numpy as np
+
+# --- Configuration ---
+DEFAULT_REQUESTS = 2000
+DEFAULT_CONCURRENCY = 8
+DEFAULT_DISTINCT = 100 # Distinct queries in the mix; repeats are what the cache can serve
+MAX_RANGE_DAYS = 60
+STARTUP_TIMEOUT_S = 30
+SEED = 42
+PIPELINE_SCRIPT = Path(__file__).resolve().parent / 'energyusedashboardpipeline.py'
+
+# --- Local Instance ---
+
+def start_local_service(project_dir, cache_size=None):
+    """Starts 'serve --port 0' in project_dir and returns (process, base URL) once it listens."""
+    command = [sys.executable, str(PIPELINE_SCRIPT), '--no-metrics', 'serve', '--port', '0']
+    if cache_size is not None:
+        command += ['--cache-size', str(cache_size)]
+    process = subprocess.Popen(command, cwd=project_dir, stdout=subprocess.PIPE, text=True)
+    deadline = time.monotonic() + STARTUP_TIMEOUT_S
+    while time.monotonic() < deadline:
+        line = process.stdout.readline()
+        if not line:
+            break
+        match = re.search(r'(http://\S+?)/ ', line)
+        if match:
+            return process, match.group(1)
+    process.kill()
+    raise RuntimeError("The query service did not start; run the 'ingest' command first.")
+
+# --- Load Generator ---
+
+def fetch_json(base_url, path):
+    connection = http.client.HTTPConnection(urllib.parse.urlsplit(base_url).netloc)
+    try:
+        connection.request('GET', path)
+        response = connection.getresponse()
+        body = response.read()
+    finally:
+        connection.close()
+    if response.status != 200:
+        raise RuntimeError(f"GET {path} returned {response.status}: {body.decode('utf-8', 'replace')}")
+    return json.loads(body)
+
+def build_query_mix(base_url, distinct, rng):
+    """distinct random building/time-range queries over the period held by the service."""
+    buildings = [row['Building'] for row in fetch_json(base_url, '/summary')['rows']]
+    days = [row['Timestamp'][:10] for row in fetch_json(base_url, '/daily')['rows']]
+    paths = []
+    for _ in range(distinct):
+        params = []
+        if rng.random() > 0.2: # The rest are campus-wide
+            picked = rng.choice(len(buildings), size=min(len(buildings), rng.integers(1, 4)), replace=False)
+            params.append(('building', ','.join(buildings[i] for i in sorted(picked))))
+        first = int(rng.integers(0, len(days) - 1))
+        last = min(len(days) - 1, first + int(rng.integers(1, MAX_RANGE_DAYS + 1)))
+        params += [('start', days[first]), ('end', days[last])]
+        endpoint = rng.choice(('summary', 'daily', 'weekly'))
+        paths.append(f"/{endpoint}?{urllib.parse.urlencode(params)}")
+    return paths
+
+def _worker(base_url, paths):
+    """Issues paths over one keep-alive connection; returns (latency s, status, X-Cache) per request."""
+    connection = http.client.HTTPConnection(urllib.parse.urlsplit(base_url).netloc)
+    results = []
+    try:
+        for path in paths:
+            started = time.perf_counter()
+            connection.request('GET', path)
+            response = connection.getresponse()
+            response.read()
+            results.append((time.perf_counter() - started, response.status, response.getheader('X-Cache')))
+    finally:
+        connection.close()
+    return results
+
+def run_load(base_url, paths, concurrency):
+    """Spreads paths over concurrency connections and returns the client-side results."""
+    chunks = [paths[i::concurrency] for i in range(concurrency)]
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = [row for chunk in pool.map(lambda c: _worker(base_url, c), chunks) for row in chunk]
+    return results, time.perf_counter() - started
+
+def summarize_results(results, elapsed_s):
+    latencies = np.array([row[0] for row in results]) * 1000
+    statuses = [row[1] for row in results]
+    cache = [row[2] for row in results]
+    return {'requests': len(results), 'elapsed_s': round(elapsed_s, 3),
+            'throughput_rps': round(len(results) / elapsed_s, 1) if elapsed_s > 0 else None,
+            'errors': sum(status >= 400 for status in statuses),
+            'latency_ms': {'median': round(float(np.median(latencies)), 3),
+                           'p95': round(float(np.percentile(latencies, 95)), 3),
+                           'p99': round(float(np.percentile(latencies, 99)), 3),
+                           'max': round(float(latencies.max()), 3)},
+            'cache_hits': cache.count('HIT'), 'cache_misses': cache.count('MISS')}
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test for the energy query service "
+                                                 "(energyusedashboardpipeline.py serve)")
+    parser.add_argument('--url', help="base URL of a running service (default: start a local instance)")
+    parser.add_argument('--project-dir', default='.',
+                        help="folder with data/ and output/ for the local instance (ingested beforehand)")
+    parser.add_argument('--requests', type=int, default=DEFAULT_REQUESTS)
+    parser.add_argument('--concurrency', type=int, default=DEFAULT_CONCURRENCY)
+    parser.add_argument('--distinct', type=int, default=DEFAULT_DISTINCT,
+                        help="distinct queries in the mix (fewer means more cache hits)")
+    parser.add_argument('--cache-size', type=int, help="cache size of the local instance")
+    parser.add_argument('--output', help="also write the results as JSON to this file")
+    args = parser.parse_args()
+
+    process = None
+    base_url = args.url
+    if base_url is None:
+        process, base_url = start_local_service(args.project_dir, args.cache_size)
+    try:
+        rng = np.random.default_rng(SEED)
+        query_mix = build_query_mix(base_url, args.distinct, rng)
+        paths = [query_mix[i] for i in rng.integers(0, len(query_mix), args.requests)]
+        print(f"Load test: {args.requests} requests ({args.distinct} distinct queries) "
+              f"over {args.concurrency} connections against {base_url}")
+        results, elapsed_s = run_load(base_url, paths, args.concurrency)
+        report = {'client': summarize_results(results, elapsed_s), 'server': fetch_json(base_url, '/stats')}
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait()
+
+    client, server = report['client'], report['server']
+    print(f"  throughput       {client['throughput_rps']:10.1f} requests/s ({client['errors']} errors)")
+    print(f"  client latency   median={client['latency_ms']['median']:.2f}ms p95={client['latency_ms']['p95']:.2f}ms "
+          f"p99={client['latency_ms']['p99']:.2f}ms max={client['latency_ms']['max']:.2f}ms")
+    print(f"  server latency   median={server['latency_ms']['median']:.2f}ms p95={server['latency_ms']['p95']:.2f}ms")
+    print(f"  cache            {client['cache_hits']} hits / {client['cache_misses']} misses in this run, "
+          f"server hit rate {server['cache']['hit_rate']:.1%}")
+    if args.output:
+        Path(args.output).write_text(json.dumps(report, indent=2))
+        print(f"Results written to {args.output}")
+
+if __name__ == "__main__":
+    main()